@@ -6,8 +6,242 @@ in isolated cloud environments.
 """
 
 from e2b import Sandbox
-from typing import Dict, Optional, List
+from typing import Callable, Dict, Optional, List
+from collections import deque
+from pathlib import Path
+import asyncio
+import atexit
+import functools
+import hashlib
+import io
 import json
+import tarfile
+import threading
+import time
+
+
+DRIVER_DIR = Path(__file__).parent / 'posthog_driver'
+DRIVER_FILES = ('__init__.py', 'client.py', 'exceptions.py')
+
+# Written by e2b.Dockerfile: sha256sum output for the baked-in driver files
+TEMPLATE_MANIFEST = '/home/user/posthog_driver.sha256'
+
+
+def _read_driver_files() -> Dict[str, bytes]:
+    """Contents of each local driver file, keyed by filename."""
+    sources = {}
+    for filename in DRIVER_FILES:
+        try:
+            sources[filename] = (DRIVER_DIR / filename).read_bytes()
+        except FileNotFoundError:
+            pass
+    return sources
+
+
+# Driver files are static for the lifetime of the process
+_DRIVER_SOURCES = _read_driver_files()
+_DRIVER_HASHES = {
+    filename: hashlib.sha256(content).hexdigest()
+    for filename, content in _DRIVER_SOURCES.items()
+}
+
+DRIVER_ARCHIVE = '/tmp/posthog_driver.tgz'
+
+
+@functools.lru_cache(maxsize=None)
+def _driver_archive(filenames: tuple) -> bytes:
+    """Gzipped tar of the given driver files, rooted at posthog_driver/."""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode='w:gz') as tar:
+        for filename in filenames:
+            content = _DRIVER_SOURCES.get(filename)
+            if content is None:
+                continue
+            info = tarfile.TarInfo(f'posthog_driver/{filename}')
+            info.size = len(content)
+            info.mode = 0o644
+            info.mtime = int(time.time())
+            tar.addfile(info, io.BytesIO(content))
+    return buffer.getvalue()
+
+
+def upload_driver(sandbox: Sandbox, filenames: Optional[List[str]] = None):
+    """
+    Upload PostHog driver files to /home/user/posthog_driver in a sandbox.
+
+    Files are sent as a single tar archive and unpacked inside the
+    sandbox, so the upload costs one write plus one command regardless
+    of how many files are included.
+
+    Args:
+        sandbox: Target E2B sandbox
+        filenames: Subset of driver files to upload (default: all)
+
+    Raises:
+        RuntimeError: Archive could not be unpacked in the sandbox
+    """
+    archive = _driver_archive(tuple(filenames or DRIVER_FILES))
+    sandbox.files.write(DRIVER_ARCHIVE, archive)
+
+    result = sandbox.commands.run(
+        f'mkdir -p /home/user && tar -xzf {DRIVER_ARCHIVE} -C /home/user'
+    )
+    if result.exit_code != 0:
+        raise RuntimeError(f"Failed to unpack driver: {result.stderr}")
+
+
+class SandboxPool:
+    """
+    Bounded pool of warm E2B sandboxes.
+
+    Sandboxes handed back via release() keep their uploaded driver and
+    installed dependencies, so the next acquire() skips sandbox boot and
+    pip install entirely. Idle sandboxes are killed after idle_timeout.
+    """
+
+    def __init__(self, max_size: int = 4, idle_timeout: float = 300.0):
+        """
+        Initialize an empty pool.
+
+        Args:
+            max_size: Maximum number of idle sandboxes kept warm
+            idle_timeout: Seconds an idle sandbox is kept before eviction
+        """
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self._idle = deque()  # (sandbox, released_at) pairs, newest on the right
+        self._lock = threading.Lock()
+        self._timer = None
+
+    def acquire(self, factory: Callable[[], Sandbox]) -> Sandbox:
+        """
+        Get a warm sandbox, provisioning a new one if none is idle.
+
+        Args:
+            factory: Callable that creates and prepares a fresh sandbox
+
+        Returns:
+            Ready-to-use sandbox
+        """
+        while True:
+            with self._lock:
+                if not self._idle:
+                    break
+                sandbox, _ = self._idle.pop()
+
+            if self._is_alive(sandbox):
+                return sandbox
+            self._kill(sandbox)
+
+        return factory()
+
+    def release(self, sandbox: Sandbox):
+        """
+        Return a sandbox to the pool, killing it if the pool is full.
+
+        Args:
+            sandbox: Sandbox previously obtained from acquire()
+        """
+        with self._lock:
+            if len(self._idle) < self.max_size:
+                self._idle.append((sandbox, time.monotonic()))
+                self._schedule_eviction()
+                return
+
+        self._kill(sandbox)
+
+    def evict_idle(self):
+        """Kill sandboxes that have been idle longer than idle_timeout."""
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = []
+
+        with self._lock:
+            self._timer = None
+            while self._idle and self._idle[0][1] <= cutoff:
+                stale.append(self._idle.popleft()[0])
+            if self._idle:
+                self._schedule_eviction()
+
+        for sandbox in stale:
+            self._kill(sandbox)
+
+    def close(self):
+        """Kill all idle sandboxes and stop the eviction timer."""
+        with self._lock:
+            if self._timer:
+                self._timer.cancel()
+                self._timer = None
+            idle = [sandbox for sandbox, _ in self._idle]
+            self._idle.clear()
+
+        for sandbox in idle:
+            self._kill(sandbox)
+
+    def _schedule_eviction(self):
+        """Arm the eviction timer (caller must hold the lock)."""
+        if self._timer is None:
+            self._timer = threading.Timer(self.idle_timeout, self.evict_idle)
+            self._timer.daemon = True
+            self._timer.start()
+
+    @staticmethod
+    def _is_alive(sandbox: Sandbox) -> bool:
+        """Cheap liveness probe for a pooled sandbox."""
+        try:
+            return sandbox.commands.run('true').exit_code == 0
+        except Exception:
+            return False
+
+    @staticmethod
+    def _kill(sandbox: Sandbox):
+        """Kill a sandbox, ignoring errors from already-dead sandboxes."""
+        try:
+            sandbox.kill()
+        except Exception:
+            pass
+
+    def __len__(self) -> int:
+        """Number of idle sandboxes currently in the pool."""
+        return len(self._idle)
+
+
+_POOLS: Dict[tuple, SandboxPool] = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_sandbox_pool(
+    e2b_api_key: str,
+    max_size: int = 4,
+    template_id: Optional[str] = None
+) -> SandboxPool:
+    """
+    Get the shared sandbox pool for an E2B API key and template.
+
+    Args:
+        e2b_api_key: E2B API key the pooled sandboxes belong to
+        max_size: Pool size used when the pool is first created
+        template_id: E2B template the pooled sandboxes were created from
+
+    Returns:
+        Process-wide SandboxPool for this key/template pair
+    """
+    key = (e2b_api_key, template_id)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        if pool is None:
+            pool = _POOLS[key] = SandboxPool(max_size=max_size)
+        return pool
+
+
+@atexit.register
+def _close_sandbox_pools():
+    """Kill pooled sandboxes on interpreter shutdown."""
+    with _POOLS_LOCK:
+        pools = list(_POOLS.values())
+        _POOLS.clear()
+
+    for pool in pools:
+        pool.close()
 
 
 class PostHogAgentExecutor:
@@ -16,7 +250,7 @@ class PostHogAgentExecutor:
 
     Handles:
     - Sandbox creation and cleanup
-    - Driver file uploads
+    - Driver file uploads (or syncing a pre-built template)
     - Dependency installation
     - Script execution with proper environment
     - Error handling and output parsing
@@ -28,7 +262,9 @@ class PostHogAgentExecutor:
         posthog_api_key: str,
         posthog_project_id: str,
         posthog_project_api_key: Optional[str] = None,
-        posthog_api_url: str = "https://us.posthog.com"
+        posthog_api_url: str = "https://us.posthog.com",
+        connection_pool_size: int = 4,
+        template_id: Optional[str] = None
     ):
         """
         Initialize executor with API credentials.
@@ -39,56 +275,91 @@ class PostHogAgentExecutor:
             posthog_project_id: PostHog project ID
             posthog_project_api_key: PostHog Project API key (for event capture)
             posthog_api_url: PostHog API base URL (US/EU/self-hosted)
+            connection_pool_size: Warm sandboxes kept for reuse across
+                executor sessions (0 disables pooling)
+            template_id: E2B template built from e2b.Dockerfile with the
+                driver and dependencies pre-installed. When None, a stock
+                sandbox is used and set up on creation.
         """
         self.e2b_api_key = e2b_api_key
         self.posthog_api_key = posthog_api_key
         self.posthog_project_id = posthog_project_id
         self.posthog_project_api_key = posthog_project_api_key
         self.posthog_api_url = posthog_api_url
+        self.connection_pool_size = connection_pool_size
+        self.template_id = template_id
         self.sandbox = None
 
     def __enter__(self):
-        """Context manager entry - create and setup sandbox."""
-        # Create E2B sandbox
-        self.sandbox = Sandbox(api_key=self.e2b_api_key)
-
-        # Upload driver files
-        self._upload_driver()
-
-        # Install dependencies
-        self._install_dependencies()
-
+        """Context manager entry - acquire a warm sandbox or create one."""
+        self.sandbox = self._acquire_sandbox()
         return self
 
-    def _upload_driver(self):
-        """Upload PostHog driver files to sandbox."""
-        import os
-        from pathlib import Path
-
-        # Get driver directory
-        driver_dir = Path(__file__).parent / 'posthog_driver'
+    def _acquire_sandbox(self) -> Sandbox:
+        """Take a sandbox from the shared pool, or create one if pooling is off."""
+        if self.connection_pool_size > 0:
+            pool = get_sandbox_pool(
+                self.e2b_api_key, self.connection_pool_size, self.template_id
+            )
+            return pool.acquire(self._create_sandbox)
+        return self._create_sandbox()
+
+    def _release_sandbox(self, sandbox: Sandbox):
+        """Return a sandbox to the shared pool, or kill it if pooling is off."""
+        if self.connection_pool_size > 0:
+            get_sandbox_pool(
+                self.e2b_api_key, template_id=self.template_id
+            ).release(sandbox)
+        else:
+            sandbox.kill()
+
+    def _create_sandbox(self) -> Sandbox:
+        """Create a sandbox with the driver uploaded and dependencies installed."""
+        if self.template_id:
+            # Driver and dependencies are baked into the template
+            sandbox = Sandbox(
+                api_key=self.e2b_api_key,
+                template=self.template_id
+            )
+            self._sync_template_driver(sandbox)
+            return sandbox
 
-        # Files to upload
-        files_to_upload = {
-            '__init__.py': driver_dir / '__init__.py',
-            'client.py': driver_dir / 'client.py',
-            'exceptions.py': driver_dir / 'exceptions.py'
-        }
+        # Create E2B sandbox
+        sandbox = Sandbox(api_key=self.e2b_api_key)
 
-        # Upload each file
-        for filename, filepath in files_to_upload.items():
-            if filepath.exists():
-                with open(filepath, 'r') as f:
-                    content = f.read()
-                    self.sandbox.files.write(
-                        f'/home/user/posthog_driver/{filename}',
-                        content
-                    )
+        # Upload driver files
+        upload_driver(sandbox)
 
-    def _install_dependencies(self):
+        # Install dependencies
+        self._install_dependencies(sandbox)
+
+        return sandbox
+
+    def _sync_template_driver(self, sandbox: Sandbox):
+        """Re-upload driver files that changed since the template was built."""
+        try:
+            manifest = sandbox.files.read(TEMPLATE_MANIFEST)
+        except Exception:
+            manifest = ''
+
+        # sha256sum format: "<hash>  posthog_driver/<filename>"
+        baked = {}
+        for line in manifest.splitlines():
+            parts = line.split()
+            if len(parts) == 2:
+                baked[Path(parts[1]).name] = parts[0]
+
+        stale = [
+            filename for filename, digest in _DRIVER_HASHES.items()
+            if baked.get(filename) != digest
+        ]
+        if stale:
+            upload_driver(sandbox, stale)
+
+    def _install_dependencies(self, sandbox: Sandbox):
         """Install required Python packages in sandbox."""
-        # Install requests and python-dotenv
-        result = self.sandbox.commands.run('pip install requests python-dotenv')
+        # zstandard lets requests negotiate zstd-compressed responses
+        result = sandbox.commands.run('pip install requests python-dotenv zstandard orjson')
         if result.exit_code != 0:
             raise RuntimeError(f"Failed to install dependencies: {result.stderr}")
 
@@ -113,15 +384,29 @@ class PostHogAgentExecutor:
                 - error: error message if failed
                 - description: script description
         """
-        # Replace API key placeholders
-        script = script.replace('<api_key_placeholder>', self.posthog_api_key)
-        script = script.replace('<project_id_placeholder>', self.posthog_project_id)
-        script = script.replace('<project_api_key_placeholder>',
-                               self.posthog_project_api_key or '')
-        script = script.replace('<api_url_placeholder>', self.posthog_api_url)
+        return self._execute_in(self.sandbox, script, description)
 
-        # Execute script with environment variables
-        result = self.sandbox.run_code(
+    async def execute_script_async(
+        self,
+        script: str,
+        description: str = "",
+        timeout: int = 60
+    ) -> Dict:
+        """
+        Async variant of execute_script; runs without blocking the event loop.
+
+        Returns:
+            Execution result dictionary (see execute_script)
+        """
+        return await asyncio.to_thread(
+            self.execute_script, script, description, timeout
+        )
+
+    def _execute_in(self, sandbox: Sandbox, script: str, description: str) -> Dict:
+        """Run a script in the given sandbox and build the result dictionary."""
+        # Credentials are passed as environment variables, never spliced
+        # into the script source
+        result = sandbox.run_code(
             code=script,
             envs={
                 'PYTHONPATH': '/home/user',
@@ -180,35 +465,100 @@ class PostHogAgentExecutor:
 
     def batch_execute(
         self,
-        scripts: List[Dict[str, str]]
+        scripts: List[Dict[str, str]],
+        fail_fast: bool = True
     ) -> List[Dict]:
         """
-        Execute multiple scripts in sequence.
+        Execute multiple independent scripts concurrently.
+
+        Must not be called from a running event loop; use
+        batch_execute_async there instead.
 
         Args:
             scripts: List of dicts with 'code' and 'description' keys
+            fail_fast: Run scripts one at a time and stop at the first
+                failure, so no script runs after a failed one
 
         Returns:
-            List of execution results
+            List of execution results, in the same order as scripts
         """
-        results = []
-        for script_info in scripts:
-            result = self.execute_script(
-                script_info['code'],
-                description=script_info.get('description', '')
-            )
-            results.append(result)
+        return asyncio.run(self.batch_execute_async(scripts, fail_fast))
+
+    async def batch_execute_async(
+        self,
+        scripts: List[Dict[str, str]],
+        fail_fast: bool = True
+    ) -> List[Dict]:
+        """
+        Execute multiple independent scripts concurrently.
 
-            # Stop on first error if desired
-            if not result['success']:
-                break
+        Scripts are spread over the executor's own sandbox plus up to
+        connection_pool_size - 1 extra sandboxes from the pool, so
+        wall-clock time approaches the slowest script rather than the sum.
 
-        return results
+        With fail_fast, scripts run one at a time in the executor's sandbox
+        instead: scripts running alongside a failed one could not be
+        stopped, and their side effects (captured events, created cohorts)
+        would happen without being reported.
+
+        Args:
+            scripts: List of dicts with 'code' and 'description' keys
+            fail_fast: Run scripts one at a time and stop at the first
+                failure, so no script runs after a failed one
+
+        Returns:
+            List of execution results, in the same order as scripts; with
+            fail_fast, the scripts that ran, ending with the failed one
+        """
+        if not scripts:
+            return []
+
+        workers = 1 if fail_fast else min(
+            len(scripts), max(1, self.connection_pool_size)
+        )
+        extra = await asyncio.gather(*[
+            asyncio.to_thread(self._acquire_sandbox) for _ in range(workers - 1)
+        ])
+
+        pending = deque(enumerate(scripts))
+        results: List[Optional[Dict]] = [None] * len(scripts)
+        failed = False
+
+        async def worker(sandbox: Sandbox):
+            nonlocal failed
+            while pending and not (fail_fast and failed):
+                index, script_info = pending.popleft()
+                description = script_info.get('description', '')
+                try:
+                    result = await asyncio.to_thread(
+                        self._execute_in, sandbox, script_info['code'], description
+                    )
+                except Exception as e:
+                    result = {
+                        'success': False,
+                        'output': '',
+                        'error': str(e),
+                        'description': description
+                    }
+                results[index] = result
+                failed = failed or not result['success']
+
+        try:
+            await asyncio.gather(*[worker(sb) for sb in [self.sandbox, *extra]])
+        finally:
+            for sandbox in extra:
+                self._release_sandbox(sandbox)
+
+        # Only fail_fast can leave scripts unrun, and it runs them in order
+        return [result for result in results if result is not None]
 
     def __exit__(self, *args):
-        """Context manager exit - cleanup sandbox."""
-        if self.sandbox:
-            self.sandbox.kill()
+        """Context manager exit - return sandbox to the pool or kill it."""
+        if not self.sandbox:
+            return
+
+        self._release_sandbox(self.sandbox)
+        self.sandbox = None
 
     def __repr__(self) -> str:
         """String representation."""
@@ -8,10 +8,25 @@ allowing Claude to answer natural language questions about your PostHog analytic
 The integration runs in E2B sandboxes for security and isolation.
 """
 
+import io
 import os
+import re
+import time
+import atexit
 import json
+import threading
+from itertools import islice
+import httpx
+from concurrent.futures import ThreadPoolExecutor
 from anthropic import Anthropic
 from e2b import Sandbox
+from agent_executor import upload_driver
+
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
 
 # ============================================================================
 # CONFIGURATION
@@ -22,6 +37,48 @@ E2B_API_KEY = os.getenv('E2B_API_KEY')
 POSTHOG_API_KEY = os.getenv('POSTHOG_API_KEY')
 POSTHOG_PROJECT_ID = os.getenv('POSTHOG_PROJECT_ID')
 
+# Required environment variables and an example value for each
+_REQUIRED_ENV = {
+    'ANTHROPIC_API_KEY': 'sk-ant-...',
+    'E2B_API_KEY': 'e2b_...',
+    'POSTHOG_API_KEY': 'phx_...',
+    'POSTHOG_PROJECT_ID': '12345',
+}
+
+# Shared keep-alive pool so repeated Claude calls reuse TCP/TLS connections
+HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+)
+atexit.register(HTTP_CLIENT.close)
+
+# Runs sandbox tool calls while Claude is still streaming the rest of a turn
+TOOL_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="posthog-tool")
+atexit.register(TOOL_EXECUTOR.shutdown, wait=False)
+
+# Upper bound on questions answered in parallel by run_claude_agent
+MAX_CONCURRENT_QUESTIONS = 4
+
+# Analytics answers are reused for this long before asking again
+CACHE_TTL_SECONDS = 300
+
+# ============================================================================
+# RESULT CACHE - Skips repeat Claude calls and sandbox queries
+# ============================================================================
+
+_ANSWER_CACHE = {}  # normalized question -> (stored_at, final answer text)
+_QUERY_CACHE = {}   # HogQL query -> (stored_at, successful query result)
+
+def _cache_get(cache: dict, key):
+    """Return a cached value if it is younger than CACHE_TTL_SECONDS."""
+    entry = cache.get(key)
+    if entry and time.monotonic() - entry[0] < CACHE_TTL_SECONDS:
+        return entry[1]
+    return None
+
+def _cache_put(cache: dict, key, value):
+    """Store a value with the current timestamp."""
+    cache[key] = (time.monotonic(), value)
+
 # ============================================================================
 # TOOL DEFINITION - This is what Claude sees
 # ============================================================================
@@ -83,6 +140,7 @@ QUERY_TEMPLATES = {
         WHERE timestamp >= now() - INTERVAL {days} DAY
         GROUP BY event
         ORDER BY users DESC
+        LIMIT 10
     """,
 
     "conversion_analysis": """
@@ -129,99 +187,126 @@ QUERY_TEMPLATES = {
     """
 }
 
+# Keyword patterns in priority order: the first category that matches wins
+_QUESTION_PATTERNS = [
+    (re.compile(pattern, re.IGNORECASE), template)
+    for pattern, template in [
+        (r"top events|most common|popular events", "top_events"),
+        (r"drop off|funnel|user journey", "user_funnel"),
+        (r"conversion|purchase|buy|subscribe", "conversion_analysis"),
+        (r"activity|engagement|active users", "activity_distribution"),
+        (r"time|when|hour|day", "time_patterns"),
+    ]
+]
+
+_PERIOD_DAYS = {"7_days": 7, "30_days": 30, "90_days": 90}
+
+# Every template rendered for every supported period
+_RENDERED_QUERIES = {
+    (name, days): template.format(days=days)
+    for name, template in QUERY_TEMPLATES.items()
+    for days in _PERIOD_DAYS.values()
+}
+
 def question_to_query(question: str, time_period: str = "30_days") -> str:
     """Convert natural language question to HogQL query."""
 
-    days_map = {"7_days": 7, "30_days": 30, "90_days": 90}
-    days = days_map.get(time_period, 30)
-
-    question_lower = question.lower()
-
-    # Pattern matching
-    if any(word in question_lower for word in ["top events", "most common", "popular events"]):
-        return QUERY_TEMPLATES["top_events"].format(days=days)
+    days = _PERIOD_DAYS.get(time_period, 30)
 
-    elif any(word in question_lower for word in ["drop off", "funnel", "user journey"]):
-        return QUERY_TEMPLATES["user_funnel"].format(days=days)
-
-    elif any(word in question_lower for word in ["conversion", "purchase", "buy", "subscribe"]):
-        return QUERY_TEMPLATES["conversion_analysis"].format(days=days)
-
-    elif any(word in question_lower for word in ["activity", "engagement", "active users"]):
-        return QUERY_TEMPLATES["activity_distribution"].format(days=days)
-
-    elif any(word in question_lower for word in ["time", "when", "hour", "day"]):
-        return QUERY_TEMPLATES["time_patterns"].format(days=days)
-
-    else:
-        # Default to top events
-        return QUERY_TEMPLATES["top_events"].format(days=days)
+    # Pattern matching (defaults to top events)
+    template = next(
+        (name for pattern, name in _QUESTION_PATTERNS if pattern.search(question)),
+        "top_events"
+    )
+    return _RENDERED_QUERIES[(template, days)]
 
 # ============================================================================
 # E2B EXECUTOR - Runs queries in isolated sandbox
 # ============================================================================
 
-def execute_posthog_query_in_e2b(sandbox, query: str) -> dict:
-    """Execute a PostHog query inside an E2B sandbox."""
-
-    script = f'''
+# Static runner script: credentials and the query arrive as environment
+# variables, so the source is identical on every call
+_REMOTE_RUNNER = '''
 import sys
 sys.path.insert(0, '/home/user')
 from posthog_driver import PostHogClient
 import json
+import os
+
+# orjson (C extension) is much faster on large result sets when present
+try:
+    import orjson
+    dumps = lambda obj: orjson.dumps(obj).decode()
+except ImportError:
+    dumps = json.dumps
 
 try:
     client = PostHogClient(
-        api_key="{POSTHOG_API_KEY}",
-        project_id="{POSTHOG_PROJECT_ID}"
+        api_key=os.environ["POSTHOG_API_KEY"],
+        project_id=os.environ["POSTHOG_PROJECT_ID"]
     )
 
-    results = client.query("""{query}""")
-
-    # Convert results to JSON-serializable format
-    output = []
-    for row in results:
-        if isinstance(row, dict):
-            output.append(row)
-        else:
-            # Convert list/tuple to dict with generic keys
-            output.append({{"col_" + str(i): val for i, val in enumerate(row)}})
+    results = client.query(os.environ["HOGQL_QUERY"])
 
-    print(json.dumps({{"success": True, "results": output}}))
+    # Rows are already JSON-serializable (dicts or positional lists)
+    print(dumps({"success": True, "results": results}))
 
 except Exception as e:
-    print(json.dumps({{"success": False, "error": str(e)}}))
+    print(json.dumps({"success": False, "error": str(e)}))
 '''
 
-    result = sandbox.run_code(code=script, envs={'PYTHONPATH': '/home/user'})
+def execute_posthog_query_in_e2b(sandbox, query: str) -> dict:
+    """Execute a PostHog query inside an E2B sandbox."""
+
+    cached = _cache_get(_QUERY_CACHE, query)
+    if cached is not None:
+        return cached
+
+    result = sandbox.run_code(
+        code=_REMOTE_RUNNER,
+        envs={
+            'PYTHONPATH': '/home/user',
+            'POSTHOG_API_KEY': POSTHOG_API_KEY or '',
+            'POSTHOG_PROJECT_ID': POSTHOG_PROJECT_ID or '',
+            'HOGQL_QUERY': query
+        }
+    )
 
     if result.error:
         return {"success": False, "error": result.error}
 
     try:
-        return json.loads(result.logs.stdout)
+        parsed = _json_loads(result.logs.stdout)
     except:
         return {"success": False, "error": "Failed to parse results", "raw": result.logs.stdout}
 
+    if parsed.get("success"):
+        _cache_put(_QUERY_CACHE, query, parsed)
+    return parsed
+
 # ============================================================================
 # TOOL EXECUTOR - Called when Claude invokes the tool
 # ============================================================================
 
-def execute_posthog_tool(sandbox, tool_input: dict) -> str:
-    """Execute the PostHog tool - called when Claude uses the tool."""
+def execute_posthog_tool(sandbox, tool_input: dict, out=None) -> str:
+    """Execute the PostHog tool - called when Claude uses the tool.
+
+    Progress lines go to ``out`` (default: stdout), so concurrent questions
+    can keep their tool logs with their own answers.
+    """
 
     question = tool_input.get("question", "")
     time_period = tool_input.get("time_period", "30_days")
 
-    print(f"\n🔍 Claude asked: '{question}'")
-    print(f"⏱️  Time period: {time_period}")
+    print(f"\n🔍 Claude asked: '{question}'", file=out)
+    print(f"⏱️  Time period: {time_period}", file=out)
 
     # Convert question to query
     hogql_query = question_to_query(question, time_period)
-    print(f"🔧 Generated HogQL query")
+    print(f"🔧 Generated HogQL query", file=out)
 
     # Execute in E2B
-    print("☁️  Executing in E2B sandbox...")
+    print("☁️  Executing in E2B sandbox...", file=out)
     result = execute_posthog_query_in_e2b(sandbox, hogql_query)
 
     if not result.get("success"):
@@ -229,153 +314,214 @@ def execute_posthog_tool(sandbox, tool_input: dict) -> str:
 
     # Format results for Claude
     results = result.get("results", [])
-    print(f"✅ Retrieved {len(results)} results\n")
+    print(f"✅ Retrieved {len(results)} results\n", file=out)
 
-    # Return formatted results
-    output = f"Query Results ({len(results)} rows):\n\n"
+    # Return formatted results (first 10 rows)
+    lines = [f"Query Results ({len(results)} rows):\n"]
 
     if results:
-        # Show first 10 results
-        for i, row in enumerate(results[:10], 1):
-            output += f"{i}. "
-            if isinstance(row, dict):
-                output += ", ".join(f"{k}: {v}" for k, v in row.items())
-            else:
-                output += str(row)
-            output += "\n"
+        lines.extend(
+            f"{i}. " + (
+                ", ".join(f"{k}: {v}" for k, v in row.items())
+                if isinstance(row, dict) else ", ".join(map(str, row))
+            )
+            for i, row in enumerate(islice(results, 10), 1)
+        )
 
         if len(results) > 10:
-            output += f"\n... and {len(results) - 10} more results"
+            lines.append(f"\n... and {len(results) - 10} more results")
     else:
-        output += "No results found"
+        lines.append("No results found")
+
+    lines.append(f"\nQuery executed: {hogql_query[:200]}...")
 
-    output += f"\n\nQuery executed: {hogql_query[:200]}..."
+    output = "\n".join(lines)
 
     return output
 
 # ============================================================================
-# CLAUDE AGENT LOOP
+# WARM SANDBOX - Created once per process and reused across agent runs
 # ============================================================================
 
-def run_claude_agent():
-    """Run the Claude agent with PostHog tool integration."""
+_WARM_SANDBOX = None
+_WARM_SANDBOX_LOCK = threading.Lock()
 
-    print("\n" + "=" * 80)
-    print("  Claude Agent SDK + PostHog Driver Integration")
-    print("=" * 80)
+def get_warm_sandbox():
+    """Return the process-wide sandbox, creating and provisioning it on first use."""
+    global _WARM_SANDBOX
 
-    # Validate API keys
-    if ANTHROPIC_API_KEY == 'YOUR_ANTHROPIC_KEY_HERE':
-        print("\n❌ Error: ANTHROPIC_API_KEY not set!")
-        print("Set it via: export ANTHROPIC_API_KEY='sk-ant-...'")
-        return
+    with _WARM_SANDBOX_LOCK:
+        if _WARM_SANDBOX is None:
+            print("☁️  Creating E2B sandbox...")
+            sandbox = Sandbox(api_key=E2B_API_KEY)
 
-    if E2B_API_KEY == 'YOUR_E2B_KEY_HERE':
-        print("\n❌ Error: E2B_API_KEY not set!")
-        print("Set it via: export E2B_API_KEY='e2b_...'")
-        return
+            print("📦 Uploading PostHog driver...")
+            upload_driver(sandbox)
 
-    # Initialize Claude client
-    print("\n🤖 Initializing Claude Agent...")
-    anthropic = Anthropic(api_key=ANTHROPIC_API_KEY)
+            print("📥 Installing dependencies...")
+            sandbox.commands.run('pip install requests python-dotenv zstandard orjson')
 
-    # Create E2B sandbox
-    print("☁️  Creating E2B sandbox...")
-    sandbox = Sandbox(api_key=E2B_API_KEY)
+            _WARM_SANDBOX = sandbox
+        return _WARM_SANDBOX
 
-    try:
-        # Upload PostHog driver to sandbox
-        print("📦 Uploading PostHog driver...")
-        driver_files = {
-            '__init__.py': 'posthog_driver/__init__.py',
-            'client.py': 'posthog_driver/client.py',
-            'exceptions.py': 'posthog_driver/exceptions.py'
-        }
-
-        for remote_name, local_path in driver_files.items():
-            with open(local_path, 'r') as f:
-                sandbox.files.write(f'/home/user/posthog_driver/{remote_name}', f.read())
+@atexit.register
+def _kill_warm_sandbox():
+    """Shut down the warm sandbox when the process exits."""
+    global _WARM_SANDBOX
 
-        # Install dependencies
-        print("📥 Installing dependencies...")
-        sandbox.commands.run('pip install requests python-dotenv')
+    with _WARM_SANDBOX_LOCK:
+        if _WARM_SANDBOX is not None:
+            print("\n🧹 Cleaning up sandbox...")
+            try:
+                _WARM_SANDBOX.kill()
+            except Exception:
+                pass
+            _WARM_SANDBOX = None
 
-        print("✅ Setup complete!\n")
+# ============================================================================
+# CLAUDE AGENT LOOP
+# ============================================================================
 
-        # Example conversations
-        conversations = [
-            "What are the top 5 most common events in the last 30 days?",
-            "Where do users drop off in the funnel?",
-            "What drives conversion?",
-            "Show me the activity distribution of users"
-        ]
+def stream_claude_turn(anthropic, sandbox, messages: list, out=None):
+    """Stream one Claude turn, dispatching tool calls as soon as they complete.
 
-        for question in conversations:
-            print("\n" + "=" * 80)
-            print(f"💬 User: {question}")
-            print("=" * 80)
+    Each ``tool_use`` block is submitted to TOOL_EXECUTOR on its
+    ``content_block_stop`` event, so the sandbox query overlaps with the
+    remaining tokens of the response. Tool progress lines go to ``out``.
 
-            # Create message with tool
-            messages = [
+    Returns:
+        Tuple of (final message, list of (tool_use block, future)).
+    """
+    pending = []
+
+    with anthropic.messages.stream(
+        model="claude-3-5-sonnet-20240620",
+        max_tokens=4096,
+        tools=[POSTHOG_TOOL],
+        messages=messages
+    ) as stream:
+        for event in stream:
+            if event.type == "content_block_stop" and event.content_block.type == "tool_use":
+                tool_use = event.content_block
+                pending.append((
+                    tool_use,
+                    TOOL_EXECUTOR.submit(
+                        execute_posthog_tool, sandbox, tool_use.input, out
+                    )
+                ))
+        response = stream.get_final_message()
+
+    return response, pending
+
+def _ask(question: str, anthropic, sandbox, out=None):
+    """Answer one question, running the tool-use loop until Claude is done.
+
+    Tool progress lines for this question are written to ``out``.
+
+    Returns:
+        Tuple of (final answer text, whether it came from the answer cache).
+    """
+    cache_key = question.strip().lower()
+    cached_answer = _cache_get(_ANSWER_CACHE, cache_key)
+    if cached_answer is not None:
+        return cached_answer, True
+
+    # Create message with tool
+    messages = [
+        {
+            "role": "user",
+            "content": question
+        }
+    ]
+
+    # Call Claude; tool calls start while the turn is still streaming
+    response, pending = stream_claude_turn(anthropic, sandbox, messages, out)
+
+    # Process response
+    while response.stop_reason == "tool_use":
+        # Add assistant response and tool results to messages
+        messages.append({
+            "role": "assistant",
+            "content": response.content
+        })
+
+        messages.append({
+            "role": "user",
+            "content": [
                 {
-                    "role": "user",
-                    "content": question
+                    "type": "tool_result",
+                    "tool_use_id": tool_use.id,
+                    "content": future.result()
                 }
+                for tool_use, future in pending
             ]
+        })
 
-            # Call Claude
-            response = anthropic.messages.create(
-                model="claude-3-5-sonnet-20240620",
-                max_tokens=4096,
-                tools=[POSTHOG_TOOL],
-                messages=messages
-            )
+        # Get final response
+        response, pending = stream_claude_turn(anthropic, sandbox, messages, out)
 
-            # Process response
-            while response.stop_reason == "tool_use":
-                # Extract tool use
-                tool_use = next(block for block in response.content if block.type == "tool_use")
-
-                # Execute tool
-                tool_result = execute_posthog_tool(sandbox, tool_use.input)
-
-                # Add assistant response and tool result to messages
-                messages.append({
-                    "role": "assistant",
-                    "content": response.content
-                })
-
-                messages.append({
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "tool_result",
-                            "tool_use_id": tool_use.id,
-                            "content": tool_result
-                        }
-                    ]
-                })
-
-                # Get final response
-                response = anthropic.messages.create(
-                    model="claude-3-5-sonnet-20240620",
-                    max_tokens=4096,
-                    tools=[POSTHOG_TOOL],
-                    messages=messages
-                )
-
-            # Print Claude's final answer
-            final_text = next(
-                (block.text for block in response.content if hasattr(block, "text")),
-                "No response"
-            )
-            print(f"\n🤖 Claude: {final_text}")
-            print("\n" + "-" * 80)
+    final_text = next(
+        (block.text for block in response.content if hasattr(block, "text")),
+        "No response"
+    )
+    _cache_put(_ANSWER_CACHE, cache_key, final_text)
+    return final_text, False
 
-    finally:
-        print("\n🧹 Cleaning up sandbox...")
-        sandbox.kill()
-        print("✅ Done!\n")
+def run_claude_agent():
+    """Run the Claude agent with PostHog tool integration.
+
+    The example questions are asked concurrently, so their Claude turns
+    overlap. Each question's tool log is buffered and printed with its
+    answer. All questions share the one warm sandbox, whose single kernel
+    runs ``run_code`` calls one at a time, so the PostHog queries themselves
+    still execute one after another.
+    """
+
+    print("\n" + "=" * 80)
+    print("  Claude Agent SDK + PostHog Driver Integration")
+    print("=" * 80)
+
+    # Validate API keys before any sandbox or network work
+    missing = [name for name in _REQUIRED_ENV if not os.environ.get(name)]
+    if missing:
+        print(f"\n❌ Error: {', '.join(missing)} not set!")
+        for name in missing:
+            print(f"Set it via: export {name}='{_REQUIRED_ENV[name]}'")
+        return
+
+    # Initialize Claude client
+    print("\n🤖 Initializing Claude Agent...")
+    anthropic = Anthropic(api_key=ANTHROPIC_API_KEY, http_client=HTTP_CLIENT)
+
+    # Reuse the warm sandbox (created on the first run in this process)
+    sandbox = get_warm_sandbox()
+    print("✅ Setup complete!\n")
+
+    # Example conversations
+    conversations = [
+        "What are the top 5 most common events in the last 30 days?",
+        "Where do users drop off in the funnel?",
+        "What drives conversion?",
+        "Show me the activity distribution of users"
+    ]
+
+    # Questions are independent, so ask them concurrently and print in order,
+    # each with its own buffered tool log
+    logs = [io.StringIO() for _ in conversations]
+    with ThreadPoolExecutor(max_workers=min(len(conversations), MAX_CONCURRENT_QUESTIONS)) as pool:
+        answers = list(pool.map(
+            lambda q, log: _ask(q, anthropic, sandbox, log), conversations, logs
+        ))
+
+    for question, log, (final_text, cached) in zip(conversations, logs, answers):
+        print("\n" + "=" * 80)
+        print(f"💬 User: {question}")
+        print("=" * 80)
+        print(log.getvalue(), end="")
+        print(f"\n🤖 Claude{' (cached)' if cached else ''}: {final_text}")
+        print("\n" + "-" * 80)
+
+    print("✅ Done!\n")
 
 # ============================================================================
 # MAIN
@@ -8,9 +8,18 @@ and documents the findings.
 """
 
 import os
+import re
+import atexit
+import httpx
 from anthropic import Anthropic
 from e2b import Sandbox
 
+# Shared keep-alive pool so repeated Claude calls reuse TCP/TLS connections
+HTTP_CLIENT = httpx.Client(
+    limits=httpx.Limits(max_keepalive_connections=100, max_connections=200)
+)
+atexit.register(HTTP_CLIENT.close)
+
 # Tool that lets Claude generate HogQL
 TOOL = {
     "name": "run_posthog_analysis",
@@ -70,27 +79,31 @@ TOOL = {
     }
 }
 
+# Imports of the public posthog SDK, rewritten to use this driver
+_IMPORT_FIXES = {
+    'from posthog import': 'from posthog_driver import',
+    'import posthog': 'import posthog_driver as posthog',
+}
+_POSTHOG_IMPORT = re.compile(r'\bfrom posthog import\b|\bimport posthog\b')
+
+# Whole lines that construct a PostHogClient or assign a PostHog client
+_CLIENT_INIT_LINE = re.compile(
+    r'^(?:[^\n]*PostHogClient\(|(?=[^\n]*client = )(?=[^\n]*PostHog))[^\n]*\n?',
+    re.MULTILINE
+)
+
 def execute_tool(sandbox, python_script, description):
     """Execute Claude's generated Python script in E2B."""
 
     print(f"📊 Analysis: {description}\n")
 
     # Fix any incorrect imports Claude might have generated
-    python_script = python_script.replace('from posthog import', 'from posthog_driver import')
-    python_script = python_script.replace('import posthog', 'import posthog_driver as posthog')
+    python_script = _POSTHOG_IMPORT.sub(
+        lambda m: _IMPORT_FIXES[m.group(0)], python_script
+    )
 
     # Remove any client initialization Claude added (we do it ourselves)
-    lines = python_script.split('\n')
-    filtered_lines = []
-    skip_next = False
-    for line in lines:
-        if 'PostHogClient()' in line or 'PostHogClient(' in line:
-            continue  # Skip Claude's client initialization
-        if 'client = ' in line and 'PostHog' in line:
-            continue
-        filtered_lines.append(line)
-
-    python_script = '\n'.join(filtered_lines)
+    python_script = _CLIENT_INIT_LINE.sub('', python_script)
 
     # Write Claude's script to sandbox with proper setup
     full_script = f'''
@@ -120,7 +133,10 @@ def main():
     print("=" * 70 + "\n")
 
     # Initialize
-    anthropic = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
+    anthropic = Anthropic(
+        api_key=os.getenv('ANTHROPIC_API_KEY'),
+        http_client=HTTP_CLIENT
+    )
     sandbox = Sandbox(api_key=os.getenv('E2B_API_KEY'))
 
     try:
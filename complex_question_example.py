@@ -4,8 +4,12 @@ Complex Question Example: Claude + PostHog Advanced Analytics
 """
 
 import os
+import re
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from anthropic import Anthropic
 from e2b import Sandbox
+from agent_executor import upload_driver
 
 # Tool definition
 TOOL = {
@@ -20,24 +24,55 @@ TOOL = {
     }
 }
 
-def execute_tool(sandbox, question):
-    """Execute PostHog query in E2B sandbox."""
-
-    script = f'''
+# Analysis script run inside the sandbox; written once per sandbox by main()
+ANALYSIS_SCRIPT_PATH = '/home/user/complex_query.py'
+ANALYSIS_SCRIPT = '''
+import json
+import os
 import sys
+import time
+from datetime import datetime, timedelta, timezone
 sys.path.insert(0, '/home/user')
 from posthog_driver import PostHogClient
 
 client = PostHogClient(
-    api_key="{os.getenv('POSTHOG_API_KEY')}",
-    project_id="{os.getenv('POSTHOG_PROJECT_ID')}"
+    api_key=os.environ["POSTHOG_API_KEY"],
+    project_id=os.environ["POSTHOG_PROJECT_ID"]
 )
 
-print("=== ANALYZING YOUR PRODUCT DATA ===\\n")
+# Results are kept on the sandbox's disk so repeated tool calls within a
+# session do not re-run identical queries
+CACHE_PATH = '/tmp/complex_query_cache.json'
+CACHE_TTL_SECONDS = 300
 
-# Query 1: User Journey - Drop-off Analysis
-print("📊 CONVERSION FUNNEL:")
-print("-" * 60)
+def cached_query_many(queries):
+    """query_many() with a TTL cache keyed by whitespace-normalized SQL and values."""
+    try:
+        with open(CACHE_PATH) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    now = time.time()
+    bound = json.dumps(QUERY_VALUES, sort_keys=True)
+    keys = [' '.join(q.split()) + bound for q in queries]
+    missing = [i for i, key in enumerate(keys)
+               if key not in cache or now - cache[key][0] >= CACHE_TTL_SECONDS]
+
+    fetched = dict(zip(missing, client.query_many(
+        [queries[i] for i in missing], QUERY_VALUES, return_exceptions=True
+    )))
+    if fetched:
+        for i, result in fetched.items():
+            if not isinstance(result, Exception):
+                cache[keys[i]] = [now, result]
+        # Concurrent tool calls may run this script at once; replace atomically
+        tmp_path = f"{CACHE_PATH}.{os.getpid()}"
+        with open(tmp_path, 'w') as f:
+            json.dump(cache, f)
+        os.replace(tmp_path, CACHE_PATH)
+
+    return [fetched[i] if i in fetched else cache[key][1] for i, key in enumerate(keys)]
 
 funnel_steps = [
     ('Viewed pages', '$pageview'),
@@ -46,155 +81,215 @@ funnel_steps = [
     ('Completed purchase', 'subscription_purchased'),
 ]
 
-prev_users = None
-for step_name, event_name in funnel_steps:
-    query = f"""
-    SELECT count(DISTINCT distinct_id) as users
+# The 30-day window starts at a fixed UTC hour: a literal bound (plus a date
+# bound on the partition key) lets ClickHouse prune whole parts, and rounding
+# keeps the query cache key stable within the hour
+window_start = (datetime.now(timezone.utc) - timedelta(days=30)).replace(minute=0, second=0, microsecond=0)
+
+# Event lists and the window are bound as HogQL placeholder values, so the
+# query text stays the same no matter which events are analysed
+QUERY_VALUES = {
+    'funnel_events': [event_name for step_name, event_name in funnel_steps],
+    'conversion_events': ['subscription_purchased', 'movie_buy_complete', 'movie_rent_complete'],
+    'since': window_start.strftime('%Y-%m-%d %H:%M:%S'),
+    'since_date': window_start.strftime('%Y-%m-%d'),
+}
+
+# Converters vs non-converters in one pass: events are rolled up per user and
+# each user is tested once against the converter subquery (a semi-join)
+activity_query = """
+SELECT
+    sumIf(user_events, is_converter) / countIf(is_converter) as conv_avg,
+    sumIf(user_events, NOT is_converter) / countIf(NOT is_converter) as nonconv_avg,
+    countIf(is_converter) as n_converters
+FROM (
+    SELECT
+        distinct_id,
+        count() as user_events,
+        distinct_id IN (
+            SELECT DISTINCT distinct_id
+            FROM events
+            WHERE has({conversion_events}, event)
+                AND timestamp >= toDateTime({since}, 'UTC')
+                AND toDate(timestamp) >= toDate({since_date})
+        ) as is_converter
     FROM events
-    WHERE event = '{{event_name}}'
-        AND timestamp >= now() - INTERVAL 30 DAY
-    """
+    WHERE timestamp >= toDateTime({since}, 'UTC')
+        AND toDate(timestamp) >= toDate({since_date})
+    GROUP BY distinct_id
+)
+"""
 
-    try:
-        result = client.query(query)
-        users = result[0][0] if result and len(result) > 0 else 0
-
-        if prev_users is not None:
-            drop_off = prev_users - users
-            drop_off_pct = (drop_off / prev_users * 100) if prev_users > 0 else 0
-            conversion_pct = (users / prev_users * 100) if prev_users > 0 else 0
-            print(f"{{step_name:<25}} {{users:>6}} users  ({{conversion_pct:>5.1f}}% converted, {{drop_off:>4}} dropped)")
+# Funnel, timing and feature adoption share one 30-day scan; the block column
+# says which report section each row belongs to
+analytics_query = """
+WITH recent AS (
+    SELECT event, distinct_id, timestamp
+    FROM events
+    WHERE timestamp >= toDateTime({since}, 'UTC')
+        AND toDate(timestamp) >= toDate({since_date})
+)
+SELECT 'funnel' as block, event as name, 0 as bucket, uniq(distinct_id) as users, count() as total
+FROM recent
+WHERE has({funnel_events}, event)
+GROUP BY event
+UNION ALL
+SELECT 'timing', '', bucket, 0, conversions
+FROM (
+    -- One integer key per day-hour bucket, split back into day and hour locally
+    SELECT toDayOfWeek(timestamp) * 24 + toHour(timestamp) as bucket, count() as conversions
+    FROM recent
+    WHERE has({conversion_events}, event)
+    GROUP BY bucket
+    ORDER BY conversions DESC
+    LIMIT 5
+)
+UNION ALL
+SELECT * FROM (
+    SELECT 'features', event, 0, uniq(distinct_id) as unique_users, count()
+    FROM recent
+    WHERE NOT startsWith(event, '$')  -- Exclude system events
+    GROUP BY event
+    ORDER BY unique_users DESC
+    LIMIT 10
+)
+"""
+
+# Both queries go out together; a failed one comes back as its exception
+analytics_result, activity_result = cached_query_many([analytics_query, activity_query])
+
+# Split the combined rows back into their report sections
+funnel_counts, time_rows, feature_rows = {}, [], []
+if not isinstance(analytics_result, Exception):
+    # Columns arrive already typed from the JSON payload; no coercion needed
+    for block, name, bucket, users, total in analytics_result:
+        if block == 'funnel':
+            funnel_counts[name] = users
+        elif block == 'timing':
+            time_rows.append((*divmod(bucket, 24), total))
         else:
-            print(f"{{step_name:<25}} {{users:>6}} users")
+            feature_rows.append((name, users, total))
+    time_rows.sort(key=lambda row: row[2], reverse=True)
+    feature_rows.sort(key=lambda row: row[1], reverse=True)
 
-        prev_users = users
-    except Exception as e:
-        print(f"{{step_name:<25}} Error: {{e}}")
+print("=== ANALYZING YOUR PRODUCT DATA ===\\n")
 
-# Query 2: User Activity vs Conversion
-print("\\n📈 USER ACTIVITY vs CONVERSION:")
+# Query 1: User Journey - Drop-off Analysis
+print("📊 CONVERSION FUNNEL:")
 print("-" * 60)
 
-# Get converters
-converter_query = """
-SELECT DISTINCT distinct_id
-FROM events
-WHERE event IN ('subscription_purchased', 'movie_buy_complete', 'movie_rent_complete')
-    AND timestamp >= now() - INTERVAL 30 DAY
-"""
-
-converters = client.query(converter_query)
-converter_ids = [str(row[0]) for row in converters] if converters else []
-
-print(f"Converters: {{len(converter_ids)}} users")
+try:
+    if isinstance(analytics_result, Exception):
+        raise analytics_result
+    step_users = [funnel_counts.get(event_name, 0) for step_name, event_name in funnel_steps]
+
+    # Each step is compared with the one before it
+    lines = [f"{funnel_steps[0][0]:<25} {step_users[0]:>6} users"]
+    lines.extend(
+        f"{step_name:<25} {users:>6} users  "
+        f"({(users / prev_users * 100 if prev_users > 0 else 0):>5.1f}% converted, "
+        f"{prev_users - users:>4} dropped)"
+        for (step_name, event_name), prev_users, users
+        in zip(funnel_steps[1:], step_users, step_users[1:])
+    )
+    print("\\n".join(lines))
+except Exception as e:
+    print(f"Funnel error: {e}")
 
-# Get activity levels for converters vs non-converters
-if len(converter_ids) > 0:
-    converter_ids_str = "', '".join(converter_ids[:50])  # Limit for query size
+# Query 2: User Activity vs Conversion
+print("\\n📈 USER ACTIVITY vs CONVERSION:")
+print("-" * 60)
 
-    # Converter activity
-    converter_activity_query = f"""
-    SELECT count() / count(DISTINCT distinct_id) as avg_events_per_user
-    FROM events
-    WHERE distinct_id IN ('{{converter_ids_str}}')
-        AND timestamp >= now() - INTERVAL 30 DAY
-    """
+try:
+    if isinstance(activity_result, Exception):
+        raise activity_result
+    converter_avg, non_converter_avg, n_converters = activity_result[0] if activity_result else (0, 0, 0)
 
-    try:
-        result = client.query(converter_activity_query)
-        converter_avg = float(result[0][0]) if result else 0
-        print(f"Converters avg activity: {{converter_avg:.1f}} events/user")
-    except:
-        converter_avg = 0
-
-    # Non-converter activity
-    non_converter_query = f"""
-    SELECT count() / count(DISTINCT distinct_id) as avg_events_per_user
-    FROM events
-    WHERE distinct_id NOT IN ('{{converter_ids_str}}')
-        AND timestamp >= now() - INTERVAL 30 DAY
-    """
+    print(f"Converters: {n_converters} users")
 
-    try:
-        result = client.query(non_converter_query)
-        non_converter_avg = float(result[0][0]) if result else 0
-        print(f"Non-converters avg activity: {{non_converter_avg:.1f}} events/user")
+    if n_converters > 0:
+        print(f"Converters avg activity: {converter_avg:.1f} events/user")
+        print(f"Non-converters avg activity: {non_converter_avg:.1f} events/user")
 
         if non_converter_avg > 0:
             multiplier = converter_avg / non_converter_avg
-            print(f"\\n💡 Converters are {{multiplier:.1f}}x more active!")
-    except:
-        pass
+            print(f"\\n💡 Converters are {multiplier:.1f}x more active!")
+except Exception as e:
+    print(f"Error: {e}")
 
 # Query 3: Time-based patterns
 print("\\n⏰ CONVERSION TIMING PATTERNS:")
 print("-" * 60)
 
-time_query = """
-SELECT
-    toDayOfWeek(timestamp) as day_of_week,
-    toHour(timestamp) as hour,
-    count() as conversions
-FROM events
-WHERE event IN ('subscription_purchased', 'movie_buy_complete', 'movie_rent_complete')
-    AND timestamp >= now() - INTERVAL 30 DAY
-GROUP BY day_of_week, hour
-ORDER BY conversions DESC
-LIMIT 5
-"""
-
 try:
-    results = client.query(time_query)
+    if isinstance(analytics_result, Exception):
+        raise analytics_result
     days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
-    print("Best conversion times:")
-    for row in results:
-        day_num = int(row[0]) - 1  # Adjust for 0-indexing
+    lines = ["Best conversion times:"]
+    for day_of_week, hour, count in time_rows:
+        day_num = day_of_week - 1  # Adjust for 0-indexing
         day_name = days[day_num] if 0 <= day_num < 7 else 'Unknown'
-        hour = int(row[1])
-        count = int(row[2])
-        print(f"  {{day_name}} at {{hour:02d}}:00 - {{count}} conversions")
+        lines.append(f"  {day_name} at {hour:02d}:00 - {count} conversions")
+    print("\\n".join(lines))
 except Exception as e:
-    print(f"  Error: {{e}}")
+    print(f"  Error: {e}")
 
 # Query 4: Feature adoption
 print("\\n🎯 FEATURE ADOPTION:")
 print("-" * 60)
 
-feature_query = """
-SELECT
-    event,
-    count(DISTINCT distinct_id) as unique_users,
-    count() as total_events,
-    count() / count(DISTINCT distinct_id) as avg_per_user
-FROM events
-WHERE timestamp >= now() - INTERVAL 30 DAY
-    AND event NOT LIKE '$%'  -- Exclude system events
-GROUP BY event
-ORDER BY unique_users DESC
-"""
-
 try:
-    results = client.query(feature_query)
-    print(f"{'Feature':<30} {'Users':>8} {'Total':>8} {'Avg/User':>10}")
-    print("-" * 60)
-    for row in results[:10]:
-        feature = str(row[0])[:28]
-        users = int(row[1])
-        total = int(row[2])
-        avg = float(row[3])
-        print(f"{{feature:<30}} {{users:>8}} {{total:>8}} {{avg:>10.1f}}")
+    if isinstance(analytics_result, Exception):
+        raise analytics_result
+    lines = [f"{'Feature':<30} {'Users':>8} {'Total':>8} {'Avg/User':>10}", "-" * 60]
+    lines.extend(
+        f"{feature[:28]:<30} {users:>8} {total:>8} {(total / users if users else 0.0):>10.1f}"
+        for feature, users, total in feature_rows
+    )
+    print("\\n".join(lines))
 except Exception as e:
-    print(f"Error: {{e}}")
+    print(f"Error: {e}")
 
 print("\\n" + "=" * 60)
 '''
 
-    # Write and execute script
-    sandbox.files.write('/home/user/complex_query.py', script)
-    result = sandbox.commands.run('cd /home/user && python3 complex_query.py')
+def execute_tool(sandbox, question, on_stdout=None):
+    """Run the analysis script already written to the sandbox by main().
+
+    Args:
+        sandbox: Sandbox with the driver and analysis script installed
+        question: Question Claude asked (the report covers all of them)
+        on_stdout: Optional callback receiving report output as it is printed
+
+    Returns:
+        Full report text, or stderr if the script produced no output
+    """
+    # Unbuffered so each report section reaches on_stdout as soon as it prints
+    result = sandbox.commands.run(
+        f'cd /home/user && python3 -u {ANALYSIS_SCRIPT_PATH}',
+        on_stdout=on_stdout
+    )
     return result.stdout or result.stderr
 
+# Tool output per normalized question, reused for the rest of the session
+_TOOL_CACHE = {}
+_PUNCTUATION = re.compile(r'[^\w\s]')
+
+def _question_key(question):
+    """Hash a question after lowercasing and stripping punctuation/extra spaces."""
+    normalized = ' '.join(_PUNCTUATION.sub('', question.lower()).split())
+    return hashlib.blake2b(normalized.encode()).hexdigest()
+
+def cached_execute_tool(sandbox, question, on_stdout=None):
+    """execute_tool(), skipping the sandbox for a question already answered."""
+    key = _question_key(question)
+    if key not in _TOOL_CACHE:
+        _TOOL_CACHE[key] = execute_tool(sandbox, question, on_stdout)
+    elif on_stdout:
+        on_stdout(_TOOL_CACHE[key])
+    return _TOOL_CACHE[key]
+
 def main():
     print("\n" + "=" * 70)
     print("  Claude + PostHog: Complex Analytics Question")
@@ -202,16 +297,22 @@ def main():
 
     # Initialize
     anthropic = Anthropic(api_key=os.getenv('ANTHROPIC_API_KEY'))
-    sandbox = Sandbox(api_key=os.getenv('E2B_API_KEY'))
+    # Credentials are set once for the sandbox; every script run inherits them
+    sandbox = Sandbox(
+        api_key=os.getenv('E2B_API_KEY'),
+        envs={
+            'POSTHOG_API_KEY': os.getenv('POSTHOG_API_KEY') or '',
+            'POSTHOG_PROJECT_ID': os.getenv('POSTHOG_PROJECT_ID') or ''
+        }
+    )
 
     try:
-        # Upload PostHog driver
+        # Upload PostHog driver (one archive write + extract)
         print("📦 Setting up sandbox...")
-        for filename in ['__init__.py', 'client.py', 'exceptions.py']:
-            with open(f'posthog_driver/{filename}', 'r') as f:
-                sandbox.files.write(f'/home/user/posthog_driver/{filename}', f.read())
+        upload_driver(sandbox)
 
-        sandbox.commands.run('pip install requests python-dotenv -q')
+        sandbox.commands.run('pip install requests python-dotenv zstandard orjson -q')
+        sandbox.files.write(ANALYSIS_SCRIPT_PATH, ANALYSIS_SCRIPT)
         print("✅ Ready!\n")
 
         # Ask Claude a complex question
@@ -245,19 +346,40 @@ Provide actionable insights and recommendations."""
 
             print(f"🔍 Claude is using {len(tool_uses)} tool call(s)\n")
 
-            # Execute each tool and collect results
-            tool_results = []
-            for tool_use in tool_uses:
-                print(f"Executing: {tool_use.name}\n")
-                result = execute_tool(sandbox, tool_use.input.get("question", ""))
-                print(f"{result}\n")
-                print("─" * 70 + "\n")
-
-                tool_results.append({
+            if len(tool_uses) == 1:
+                # A single report is rendered progressively as the sandbox prints it
+                print(f"Executing: {tool_uses[0].name}\n")
+                results = [cached_execute_tool(
+                    sandbox,
+                    tool_uses[0].input.get("question", ""),
+                    on_stdout=lambda chunk: print(chunk, end="", flush=True)
+                )]
+                print("\n" + "─" * 70 + "\n")
+            else:
+                # Tool calls are independent, so run each distinct question
+                # concurrently and report the results in order
+                questions = [tool_use.input.get("question", "") for tool_use in tool_uses]
+                unique = list(dict.fromkeys(questions))
+                with ThreadPoolExecutor(max_workers=len(unique)) as pool:
+                    answers = dict(zip(unique, pool.map(
+                        lambda question: cached_execute_tool(sandbox, question),
+                        unique
+                    )))
+                results = [answers[question] for question in questions]
+
+                for tool_use, result in zip(tool_uses, results):
+                    print(f"Executing: {tool_use.name}\n")
+                    print(f"{result}\n")
+                    print("─" * 70 + "\n")
+
+            tool_results = [
+                {
                     "type": "tool_result",
                     "tool_use_id": tool_use.id,
                     "content": result
-                })
+                }
+                for tool_use, result in zip(tool_uses, results)
+            ]
 
             # Send results back to Claude
             messages.append({"role": "assistant", "content": response.content})
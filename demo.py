@@ -5,49 +5,85 @@ This demo walks through every capability of the PostHog driver,
 showing exactly what it does and how it works.
 """
 
+import io
+import os
 import sys
 import json
-from posthog_driver import PostHogClient
-from posthog_driver.exceptions import AuthenticationError
+import argparse
 import time
 
+try:
+    import orjson
+except ImportError:  # stdlib json fallback
+    orjson = None
 
-def print_header(title):
+# Skip the ENTER prompts between steps (CI, benchmarks, piped output)
+_NONINTERACTIVE = bool(os.environ.get("POSTHOG_DEMO_NONINTERACTIVE"))
+
+
+def print_header(title, out=None):
     """Print a formatted section header."""
-    print("\n" + "=" * 80)
-    print(f"  {title}")
-    print("=" * 80)
+    print("\n" + "=" * 80, file=out)
+    print(f"  {title}", file=out)
+    print("=" * 80, file=out)
 
 
-def print_step(step_num, description):
+def print_step(step_num, description, out=None):
     """Print a step description."""
-    print(f"\n▶ STEP {step_num}: {description}")
-    print("-" * 80)
+    print(f"\n▶ STEP {step_num}: {description}", file=out)
+    print("-" * 80, file=out)
 
 
-def print_result(label, data, truncate=True):
+def print_result(label, data, truncate=True, out=None):
     """Print formatted result."""
-    print(f"\n✓ {label}:")
-    if isinstance(data, (dict, list)):
-        json_str = json.dumps(data, indent=2)
-        if truncate and len(json_str) > 500:
-            print(json_str[:500] + "\n  ... (truncated)")
-        else:
-            print(json_str)
+    print(f"\n✓ {label}:", file=out)
+    if isinstance(data, (dict, list)) and not truncate and orjson is not None:
+        # The whole payload is printed anyway, so use the faster encoder
+        print(orjson.dumps(
+            data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        ).decode(), file=out)
+    elif isinstance(data, (dict, list)):
+        # Stream the encoder and stop once past the limit so large payloads
+        # are never serialized in full just to be cut down to 500 chars.
+        chunks = []
+        size = 0
+        for chunk in json.JSONEncoder(indent=2).iterencode(data):
+            chunks.append(chunk)
+            size += len(chunk)
+            if truncate and size > 500:
+                print("".join(chunks)[:500] + "\n  ... (truncated)", file=out)
+                return
+        print("".join(chunks), file=out)
     else:
-        print(f"  {data}")
+        print(f"  {data}", file=out)
+
+
+def flush_output(out):
+    """Write a step's buffered output to stdout in one call and reset it."""
+    sys.stdout.write(out.getvalue())
+    sys.stdout.flush()
+    out.seek(0)
+    out.truncate()
 
 
-def wait_for_enter(message="Press ENTER to continue..."):
-    """Wait for user to press enter."""
+def wait_for_enter(message="Press ENTER to continue...", out=None):
+    """Wait for user to press enter (no-op in non-interactive mode).
+
+    Any output buffered in ``out`` is flushed first so the prompt follows it.
+    """
+    if out is not None:
+        flush_output(out)
+    if _NONINTERACTIVE:
+        return
     input(f"\n💡 {message}")
 
 
 def demo_intro():
     """Introduction to the demo."""
-    print("\n" + "╔" + "=" * 78 + "╗")
-    print("║" + " " * 20 + "PostHog Driver - Step-by-Step Demo" + " " * 24 + "║")
-    print("╚" + "=" * 78 + "╝")
+    buf = io.StringIO()
+    print("\n" + "╔" + "=" * 78 + "╗", file=buf)
+    print("║" + " " * 20 + "PostHog Driver - Step-by-Step Demo" + " " * 24 + "║", file=buf)
+    print("╚" + "=" * 78 + "╝", file=buf)
 
     print("""
 This demo will show you EXACTLY what the PostHog driver does:
@@ -62,14 +98,15 @@ This demo will show you EXACTLY what the PostHog driver does:
 8. 🤖 Execute in E2B sandbox (simulated)
 
 Each step will show the code, explain what it does, and display the results.
-""")
+""", file=buf)
 
-    wait_for_enter("Press ENTER to start the demo")
+    wait_for_enter("Press ENTER to start the demo", out=buf)
 
 
 def demo_step_1_initialization():
     """Step 1: Initialize the PostHog client."""
-    print_header("STEP 1: Initialize PostHog Client")
+    buf = io.StringIO()
+    print_header("STEP 1: Initialize PostHog Client", out=buf)
 
     print("""
 What this does:
@@ -79,7 +116,7 @@ What this does:
 - Sets up session management
 
 Code:
-""")
+""", file=buf)
 
     print("""
     from posthog_driver import PostHogClient
@@ -90,7 +127,11 @@ Code:
         project_api_key='phc_project_key',    # For event capture
         api_url='https://us.posthog.com'      # US or EU cloud
     )
-""")
+""", file=buf)
+
+    # Imported here so steps 8-9 and --help don't pull in the requests stack
+    from posthog_driver import PostHogClient
+    from posthog_driver.exceptions import AuthenticationError
 
     # Actually create client (with mock credentials for demo)
     try:
@@ -104,7 +145,7 @@ Code:
             "project_id": client.project_id,
             "timeout": client.timeout,
             "max_retries": client.max_retries
-        })
+        }, out=buf)
 
         print("""
 ✨ What just happened:
@@ -112,29 +153,30 @@ Code:
 - Authentication headers set (Bearer token)
 - Regional endpoints configured
 - Ready to make API calls
-""")
+""", file=buf)
 
-        wait_for_enter()
+        wait_for_enter(out=buf)
         return client
 
     except AuthenticationError as e:
-        print(f"\n⚠️  Demo Mode: {e}")
-        print("\n(For real use, you'd need valid PostHog API credentials)")
-        wait_for_enter()
+        print(f"\n⚠️  Demo Mode: {e}", file=buf)
+        print("\n(For real use, you'd need valid PostHog API credentials)", file=buf)
+        wait_for_enter(out=buf)
         return None
 
 
 def demo_step_2_driver_contract(client):
     """Step 2: Demonstrate driver contract methods."""
-    print_header("STEP 2: Driver Contract - Discover PostHog Data")
+    buf = io.StringIO()
+    print_header("STEP 2: Driver Contract - Discover PostHog Data", out=buf)
 
     print("""
 The driver implements a standard 3-method contract that allows AI agents
 to DYNAMICALLY discover and query data without hardcoded schemas.
-""")
+""", file=buf)
 
     # 2A: list_objects()
-    print_step("2A", "list_objects() - What types of data are available?")
+    print_step("2A", "list_objects() - What types of data are available?", out=buf)
 
     print("""
 Code:
@@ -144,22 +186,22 @@ What this does:
 - Asks PostHog: "What types of entities can I query?"
 - Returns a list of available data types
 - NO hardcoding needed - it's dynamic!
-""")
+""", file=buf)
 
     objects = client.list_objects()
-    print_result("Available Data Types", objects)
+    print_result("Available Data Types", objects, out=buf)
 
     print("""
 ✨ Why this matters:
 - AI agents can discover capabilities at runtime
 - No need to pre-program every possible entity
 - Works across different PostHog versions
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
     # 2B: get_fields()
-    print_step("2B", "get_fields('events') - What fields does an 'event' have?")
+    print_step("2B", "get_fields('events') - What fields does an 'event' have?", out=buf)
 
     print("""
 Code:
@@ -169,55 +211,59 @@ What this does:
 - Asks: "What fields/properties does an 'event' have?"
 - Returns complete schema with types and descriptions
 - AI can understand data structure dynamically
-""")
+""", file=buf)
 
     event_schema = client.get_fields('events')
-    print_result("Event Schema", event_schema)
+    print_result("Event Schema", event_schema, out=buf)
 
     print("""
 ✨ Why this matters:
 - Agent knows exactly what data is available
 - Type information helps with query generation
 - Descriptions explain what each field means
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
     # 2C: Show schemas for other entities
-    print_step("2C", "get_fields() for other entities")
+    print_step("2C", "get_fields() for other entities", out=buf)
 
     print("""
 Let's see schemas for different PostHog entities:
-""")
+""", file=buf)
 
+    # Collect the whole listing and buffer it with one write
+    lines = []
     for entity in ['insights', 'persons', 'cohorts']:
         schema = client.get_fields(entity)
-        print(f"\n📋 {entity.upper()} has {len(schema)} fields:")
+        lines.append(f"\n📋 {entity.upper()} has {len(schema)} fields:")
         for field_name, field_def in list(schema.items())[:3]:
-            print(f"   - {field_name}: {field_def['type']}")
+            lines.append(f"   - {field_name}: {field_def['type']}")
         if len(schema) > 3:
-            print(f"   ... and {len(schema) - 3} more")
+            lines.append(f"   ... and {len(schema) - 3} more")
+    buf.write("\n".join(lines) + "\n")
 
     print("""
 ✨ Key insight:
 The agent now knows the ENTIRE data model of PostHog without any hardcoding!
 It can construct intelligent queries based on this knowledge.
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_step_3_queries(client):
     """Step 3: Execute HogQL queries."""
-    print_header("STEP 3: Query Analytics Data with HogQL")
+    buf = io.StringIO()
+    print_header("STEP 3: Query Analytics Data with HogQL", out=buf)
 
     print("""
 HogQL is PostHog's SQL-like query language. It lets you query events,
 users, and analytics data using familiar SQL syntax.
-""")
+""", file=buf)
 
     # Example query 1
-    print_step("3A", "Count events by type")
+    print_step("3A", "Count events by type", out=buf)
 
     hogql = """
     SELECT
@@ -243,25 +289,25 @@ What this query does:
 4. Returns top 10 most common events
 
 This answers: "What are users doing most in my app?"
-""")
+""", file=buf)
 
-    print_result("Query", hogql.strip())
+    print_result("Query", hogql.strip(), out=buf)
 
     print("""
 Expected Output (example):
 [
-  {"event": "Page View", "count": 15234},
-  {"event": "Button Click", "count": 8921},
-  {"event": "User Signup", "count": 1543},
-  {"event": "Purchase", "count": 892},
+  ["Page View", 15234],
+  ["Button Click", 8921],
+  ["User Signup", 1543],
+  ["Purchase", 892],
   ...
 ]
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
     # Example query 2
-    print_step("3B", "Analyze user behavior")
+    print_step("3B", "Analyze user behavior", out=buf)
 
     hogql2 = """
     SELECT
@@ -290,9 +336,9 @@ What this query does:
 4. Identifies "power users"
 
 This answers: "Who are my most engaged users?"
-""")
+""", file=buf)
 
-    print_result("Query", hogql2.strip())
+    print_result("Query", hogql2.strip(), out=buf)
 
     print("""
 ✨ Why HogQL is powerful:
@@ -300,22 +346,23 @@ This answers: "Who are my most engaged users?"
 - Use familiar SQL syntax
 - Access PostHog's full data model
 - No need to export data first
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_step_4_event_tracking(client):
     """Step 4: Event tracking."""
-    print_header("STEP 4: Track Events (Analytics Data In)")
+    buf = io.StringIO()
+    print_header("STEP 4: Track Events (Analytics Data In)", out=buf)
 
     print("""
 PostHog tracks user behavior through events. The driver can send events
 to PostHog in real-time or batches.
-""")
+""", file=buf)
 
     # Single event
-    print_step("4A", "Capture a single event")
+    print_step("4A", "Capture a single event", out=buf)
 
     print("""
 Code:
@@ -336,7 +383,7 @@ What this does:
 4. Event appears instantly in PostHog dashboards
 
 Real-world use: Track every significant user action
-""")
+""", file=buf)
 
     print_result("Event Payload", {
         "event": "Feature Used",
@@ -347,12 +394,12 @@ Real-world use: Track every significant user action
             "source": "settings_page"
         },
         "timestamp": "2024-01-15T10:30:00Z"
-    })
+    }, out=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
     # Batch events
-    print_step("4B", "Capture batch events (high-volume)")
+    print_step("4B", "Capture batch events (high-volume)", out=buf)
 
     print("""
 Code:
@@ -380,28 +427,29 @@ What this does:
 3. Max 20MB per batch (thousands of events)
 
 Real-world use: Import historical data or track high-traffic apps
-""")
+""", file=buf)
 
     print("""
 ✨ Performance:
 - Single events: ~1ms latency
 - Batch events: 100+ events in one request
 - No rate limits on event capture!
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_step_5_cohorts(client):
     """Step 5: User cohorts and segmentation."""
-    print_header("STEP 5: User Cohorts & Segmentation")
+    buf = io.StringIO()
+    print_header("STEP 5: User Cohorts & Segmentation", out=buf)
 
     print("""
 Cohorts are groups of users based on behavior or properties.
 Examples: "Power Users", "Churn Risk", "Paid Customers"
-""")
+""", file=buf)
 
-    print_step("5A", "List all cohorts")
+    print_step("5A", "List all cohorts", out=buf)
 
     print("""
 Code:
@@ -424,11 +472,11 @@ What this returns:
 ]
 
 Use case: See all user segments at a glance
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("5B", "Create a new cohort (power users)")
+    print_step("5B", "Create a new cohort (power users)", out=buf)
 
     print("""
 Code:
@@ -451,11 +499,11 @@ What this does:
 3. Can be used in funnels, insights, targeting
 
 Use case: Identify users for retention campaigns
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("5C", "Get users in a cohort")
+    print_step("5C", "Get users in a cohort", out=buf)
 
     print("""
 Code:
@@ -477,7 +525,7 @@ What this returns:
 ]
 
 Use case: Export power users for outreach, testimonials, etc.
-""")
+""", file=buf)
 
     print("""
 ✨ Cohort power:
@@ -485,21 +533,22 @@ Use case: Export power users for outreach, testimonials, etc.
 - Use in experiments and feature flags
 - Cross-reference with events
 - Export for external tools
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_step_6_feature_flags(client):
     """Step 6: Feature flags and experiments."""
-    print_header("STEP 6: Feature Flags & A/B Testing")
+    buf = io.StringIO()
+    print_header("STEP 6: Feature Flags & A/B Testing", out=buf)
 
     print("""
 Feature flags control which users see which features.
 Experiments (A/B tests) measure impact with statistical analysis.
-""")
+""", file=buf)
 
-    print_step("6A", "List all feature flags")
+    print_step("6A", "List all feature flags", out=buf)
 
     print("""
 Code:
@@ -525,11 +574,11 @@ What this returns:
 ]
 
 Use case: See all active feature rollouts
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("6B", "Evaluate flag for specific user")
+    print_step("6B", "Evaluate flag for specific user", out=buf)
 
     print("""
 Code:
@@ -553,11 +602,11 @@ else:
     show_old_dashboard()
 
 Use case: Progressive rollouts, user targeting
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("6C", "Get A/B test results")
+    print_step("6C", "Get A/B test results", out=buf)
 
     print("""
 Code:
@@ -595,14 +644,15 @@ What this returns:
 - Recommended winner
 
 Use case: Data-driven feature decisions
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_step_7_export(client):
     """Step 7: Data export for ETL."""
-    print_header("STEP 7: Export Data for Data Warehouse (ETL)")
+    buf = io.StringIO()
+    print_header("STEP 7: Export Data for Data Warehouse (ETL)", out=buf)
 
     print("""
 Export PostHog data to your data warehouse for:
@@ -610,9 +660,9 @@ Export PostHog data to your data warehouse for:
 - Long-term storage
 - Custom ML models
 - Business intelligence tools
-""")
+""", file=buf)
 
-    print_step("7A", "Export events for date range")
+    print_step("7A", "Export events for date range", out=buf)
 
     print("""
 Code:
@@ -646,11 +696,11 @@ Then you can:
 - Upload to S3, BigQuery, Snowflake
 - Join with other data sources
 - Build custom dashboards
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("7B", "Export cohort data")
+    print_step("7B", "Export cohort data", out=buf)
 
     print("""
 Code:
@@ -668,28 +718,29 @@ What you get:
 - Can sync to CRM (Salesforce, HubSpot)
 
 Use case: Enrich customer data across systems
-""")
+""", file=buf)
 
     print("""
 ✨ Best practices:
 - For large exports, use PostHog's native batch export (to S3/BigQuery)
 - For custom queries, use export_events() method
 - Respect rate limits: 2400 queries/hour
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_step_8_e2b_sandbox():
     """Step 8: E2B sandbox execution."""
-    print_header("STEP 8: Execute in E2B Sandbox (Cloud Environment)")
+    buf = io.StringIO()
+    print_header("STEP 8: Execute in E2B Sandbox (Cloud Environment)", out=buf)
 
     print("""
 E2B sandboxes are isolated cloud VMs where AI agents run code securely.
 The PostHog driver is designed to work seamlessly in these environments.
-""")
+""", file=buf)
 
-    print_step("8A", "Setup E2B sandbox")
+    print_step("8A", "Setup E2B sandbox", out=buf)
 
     print("""
 Code:
@@ -719,11 +770,11 @@ What happens:
 - No access to your filesystem
 - Rate limits enforced
 - Automatic cleanup
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("8B", "Use script templates")
+    print_step("8B", "Use script templates", out=buf)
 
     print("""
 Pre-built templates for common operations:
@@ -753,11 +804,11 @@ Available templates:
 - track_errors
 
 Use case: AI agents can execute complex analytics WITHOUT writing code
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
-    print_step("8C", "Real-world E2B workflow")
+    print_step("8C", "Real-world E2B workflow", out=buf)
 
     print("""
 AI Agent Workflow Example:
@@ -800,7 +851,7 @@ Agent responds:
 "I found 23 users at risk of churning. They were active 2-4 weeks ago
 but haven't been seen in the last 7 days. Would you like me to export
 this list for your retention campaign?"
-""")
+""", file=buf)
 
     print("""
 ✨ Why this matters:
@@ -808,24 +859,15 @@ this list for your retention campaign?"
 - No need to manually write SQL
 - Secure isolated execution
 - Results formatted for agent understanding
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
-def demo_step_9_personas():
-    """Step 9: Persona-based workflows."""
-    print_header("STEP 9: Persona-Aware Workflows")
-
-    print("""
-The driver understands typical PostHog user needs and provides
-ready-made workflows for different team roles.
-""")
-
-    personas = {
-        "Product Engineer": {
-            "needs": "Feature impact analysis, bug tracking",
-            "example": """
+_PERSONAS = {
+    "Product Engineer": {
+        "needs": "Feature impact analysis, bug tracking",
+        "example": """
 # Did our new feature improve engagement?
 client.query('''
     SELECT
@@ -838,19 +880,19 @@ client.query('''
     GROUP BY date
 ''')
             """
-        },
-        "Technical PM": {
-            "needs": "Funnel analysis, A/B test results",
-            "example": """
+    },
+    "Technical PM": {
+        "needs": "Funnel analysis, A/B test results",
+        "example": """
 # Where do users drop off in signup?
 for step in ['Signup Started', 'Email Verified', 'Completed']:
     count = client.query(f"SELECT count(DISTINCT distinct_id) FROM events WHERE event = '{step}'")
     print(f"{step}: {count[0]['count']} users")
             """
-        },
-        "Data Analyst": {
-            "needs": "Complex queries, data export",
-            "example": """
+    },
+    "Data Analyst": {
+        "needs": "Complex queries, data export",
+        "example": """
 # What behaviors correlate with conversion?
 client.query('''
     SELECT
@@ -863,10 +905,10 @@ client.query('''
     ORDER BY conv_rate DESC
 ''')
             """
-        },
-        "Growth Marketer": {
-            "needs": "Channel performance, attribution",
-            "example": """
+    },
+    "Growth Marketer": {
+        "needs": "Channel performance, attribution",
+        "example": """
 # Which channels drive best users?
 client.query('''
     SELECT
@@ -878,10 +920,10 @@ client.query('''
     GROUP BY channel
 ''')
             """
-        },
-        "Customer Success": {
-            "needs": "User journeys, power user identification",
-            "example": """
+    },
+    "Customer Success": {
+        "needs": "User journeys, power user identification",
+        "example": """
 # Who are our power users?
 client.query('''
     SELECT
@@ -894,17 +936,38 @@ client.query('''
     HAVING activity >= 100
 ''')
             """
-        }
     }
+}
 
-    for i, (persona, info) in enumerate(personas.items(), 1):
-        print(f"\n{i}. {persona}")
-        print(f"   Needs: {info['needs']}")
-        print(f"\n   Example workflow:")
-        print(info['example'])
 
+def _render_personas(personas):
+    """Render the persona walkthrough shown in step 9 as a single string."""
+    parts = []
+    for i, (persona, info) in enumerate(personas.items(), 1):
+        parts.append(f"\n{i}. {persona}\n")
+        parts.append(f"   Needs: {info['needs']}\n")
+        parts.append("\n   Example workflow:\n")
+        parts.append(info['example'] + "\n")
         if i < len(personas):
-            print("\n   " + "-" * 70)
+            parts.append("\n   " + "-" * 70 + "\n")
+    return "".join(parts)
+
+
+# Static, so rendered once at import instead of on every step 9 call
+_PERSONAS_RENDERED = _render_personas(_PERSONAS)
+
+
+def demo_step_9_personas():
+    """Step 9: Persona-based workflows."""
+    buf = io.StringIO()
+    print_header("STEP 9: Persona-Aware Workflows", out=buf)
+
+    print("""
+The driver understands typical PostHog user needs and provides
+ready-made workflows for different team roles.
+""", file=buf)
+
+    buf.write(_PERSONAS_RENDERED)
 
     print("""
 
@@ -912,14 +975,15 @@ client.query('''
 - 10+ ready-to-use functions
 - Real-world scenarios
 - Best practices embedded
-""")
+""", file=buf)
 
-    wait_for_enter()
+    wait_for_enter(out=buf)
 
 
 def demo_summary():
     """Final summary."""
-    print_header("SUMMARY: What You Just Saw")
+    buf = io.StringIO()
+    print_header("SUMMARY: What You Just Saw", out=buf)
 
     print("""
 The PostHog Driver for Claude Agent SDK enables:
@@ -988,11 +1052,25 @@ Ready to use!
    → See README.md for setup
    → Run examples/basic_usage.py to try it
    → Check examples/persona_workflows.py for real-world scenarios
-""")
+""", file=buf)
+
+    flush_output(buf)
 
 
 def main():
     """Run the complete demo."""
+    global _NONINTERACTIVE
+
+    parser = argparse.ArgumentParser(description="PostHog driver step-by-step demo")
+    parser.add_argument(
+        "-y", "--yes",
+        action="store_true",
+        help="run every step without waiting for ENTER "
+             "(same as POSTHOG_DEMO_NONINTERACTIVE=1)"
+    )
+    if parser.parse_args().yes:
+        _NONINTERACTIVE = True
+
     demo_intro()
 
     # Step 1: Initialize
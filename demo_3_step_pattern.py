@@ -7,19 +7,37 @@ This is a visual demonstration that doesn't require API keys.
 It shows you the exact pattern used in the real integration.
 """
 
+import sys
+
+# Banner pieces, built once at import
+_RULE = "=" * 70
+_DIVIDER = "─" * 70
+_BOX_TOP = "┌" + "─" * 68 + "┐"
+_BOX_BOTTOM = "└" + "─" * 68 + "┘"
+
+
+def _write(lines):
+    """Emit the buffered lines with a single write and clear the buffer."""
+    sys.stdout.write("\n".join(lines) + "\n")
+    sys.stdout.flush()
+    lines.clear()
+
+
 def demo():
-    print("\n" + "=" * 70)
-    print("  CLAUDE AGENT SDK + POSTHOG DRIVER: 3-STEP PATTERN")
-    print("=" * 70 + "\n")
+    # Each section is collected here and written in one go before its prompt
+    lines = []
+    lines.append("\n" + _RULE)
+    lines.append("  CLAUDE AGENT SDK + POSTHOG DRIVER: 3-STEP PATTERN")
+    lines.append(_RULE + "\n")
 
     # ========================================================================
     # STEP 1: Define the Tool
     # ========================================================================
-    print("┌" + "─" * 68 + "┐")
-    print("│  STEP 1: Define the Tool (What Claude Can Do)                     │")
-    print("└" + "─" * 68 + "┘\n")
+    lines.append(_BOX_TOP)
+    lines.append("│  STEP 1: Define the Tool (What Claude Can Do)                     │")
+    lines.append(_BOX_BOTTOM + "\n")
 
-    print("This tells Claude: 'You can query PostHog analytics'\n")
+    lines.append("This tells Claude: 'You can query PostHog analytics'\n")
 
     TOOL = {
         "name": "query_posthog",
@@ -36,233 +54,239 @@ def demo():
         }
     }
 
-    print("Tool Definition:")
-    print("```python")
-    print("TOOL = {")
-    print("    'name': 'query_posthog',")
-    print("    'description': 'Query PostHog analytics data',")
-    print("    'input_schema': {")
-    print("        'type': 'object',")
-    print("        'properties': {")
-    print("            'question': {'type': 'string'}")
-    print("        }")
-    print("    }")
-    print("}")
-    print("```\n")
-
+    lines.append("Tool Definition:")
+    lines.append("```python")
+    lines.append("TOOL = {")
+    lines.append("    'name': 'query_posthog',")
+    lines.append("    'description': 'Query PostHog analytics data',")
+    lines.append("    'input_schema': {")
+    lines.append("        'type': 'object',")
+    lines.append("        'properties': {")
+    lines.append("            'question': {'type': 'string'}")
+    lines.append("        }")
+    lines.append("    }")
+    lines.append("}")
+    lines.append("```\n")
+
+    _write(lines)
     input("Press Enter to continue to Step 2...")
-    print()
+    lines.append("")
 
     # ========================================================================
     # STEP 2: Call Claude with Tool
     # ========================================================================
-    print("┌" + "─" * 68 + "┐")
-    print("│  STEP 2: Call Claude with Tool (Give Claude the Ability)          │")
-    print("└" + "─" * 68 + "┘\n")
-
-    print("User asks: 'What are the top events?'\n")
-
-    print("Your code calls Claude API:")
-    print("```python")
-    print("from anthropic import Anthropic")
-    print()
-    print("anthropic = Anthropic(api_key=ANTHROPIC_API_KEY)")
-    print()
-    print("response = anthropic.messages.create(")
-    print("    model='claude-3-5-sonnet-20241022',")
-    print("    tools=[TOOL],  # ← Claude can now use query_posthog")
-    print("    messages=[{")
-    print("        'role': 'user',")
-    print("        'content': 'What are the top events?'")
-    print("    }]")
-    print(")")
-    print("```\n")
-
-    print("Claude receives:")
-    print("  • User question: 'What are the top events?'")
-    print("  • Available tools: [query_posthog]")
-    print()
-    print("Claude thinks:")
-    print("  'I need analytics data to answer this question.")
-    print("   I have access to query_posthog tool.")
-    print("   I'll use it!'\n")
-
-    print("Claude responds with:")
-    print("```json")
-    print("{")
-    print("  'stop_reason': 'tool_use',")
-    print("  'content': [")
-    print("    {")
-    print("      'type': 'tool_use',")
-    print("      'name': 'query_posthog',")
-    print("      'input': {")
-    print("        'question': 'What are the top events?'")
-    print("      }")
-    print("    }")
-    print("  ]")
-    print("}")
-    print("```\n")
-
+    lines.append(_BOX_TOP)
+    lines.append("│  STEP 2: Call Claude with Tool (Give Claude the Ability)          │")
+    lines.append(_BOX_BOTTOM + "\n")
+
+    lines.append("User asks: 'What are the top events?'\n")
+
+    lines.append("Your code calls Claude API:")
+    lines.append("```python")
+    lines.append("from anthropic import Anthropic")
+    lines.append("")
+    lines.append("anthropic = Anthropic(api_key=ANTHROPIC_API_KEY)")
+    lines.append("")
+    lines.append("response = anthropic.messages.create(")
+    lines.append("    model='claude-3-5-sonnet-20241022',")
+    lines.append("    tools=[TOOL],  # ← Claude can now use query_posthog")
+    lines.append("    messages=[{")
+    lines.append("        'role': 'user',")
+    lines.append("        'content': 'What are the top events?'")
+    lines.append("    }]")
+    lines.append(")")
+    lines.append("```\n")
+
+    lines.append("Claude receives:")
+    lines.append("  • User question: 'What are the top events?'")
+    lines.append("  • Available tools: [query_posthog]")
+    lines.append("")
+    lines.append("Claude thinks:")
+    lines.append("  'I need analytics data to answer this question.")
+    lines.append("   I have access to query_posthog tool.")
+    lines.append("   I'll use it!'\n")
+
+    lines.append("Claude responds with:")
+    lines.append("```json")
+    lines.append("{")
+    lines.append("  'stop_reason': 'tool_use',")
+    lines.append("  'content': [")
+    lines.append("    {")
+    lines.append("      'type': 'tool_use',")
+    lines.append("      'name': 'query_posthog',")
+    lines.append("      'input': {")
+    lines.append("        'question': 'What are the top events?'")
+    lines.append("      }")
+    lines.append("    }")
+    lines.append("  ]")
+    lines.append("}")
+    lines.append("```\n")
+
+    _write(lines)
     input("Press Enter to continue to Step 3...")
-    print()
+    lines.append("")
 
     # ========================================================================
     # STEP 3: Execute Tool
     # ========================================================================
-    print("┌" + "─" * 68 + "┐")
-    print("│  STEP 3: Execute Tool in E2B (When Claude Requests It)            │")
-    print("└" + "─" * 68 + "┘\n")
-
-    print("Your code receives Claude's tool_use request\n")
-
-    print("Check if Claude wants to use a tool:")
-    print("```python")
-    print("if response.stop_reason == 'tool_use':")
-    print("    # Claude wants to use the tool!")
-    print("    tool_use = response.content[0]")
-    print("    ")
-    print("    # Extract the question")
-    print("    question = tool_use.input['question']")
-    print("    # → 'What are the top events?'")
-    print("```\n")
-
+    lines.append(_BOX_TOP)
+    lines.append("│  STEP 3: Execute Tool in E2B (When Claude Requests It)            │")
+    lines.append(_BOX_BOTTOM + "\n")
+
+    lines.append("Your code receives Claude's tool_use request\n")
+
+    lines.append("Check if Claude wants to use a tool:")
+    lines.append("```python")
+    lines.append("if response.stop_reason == 'tool_use':")
+    lines.append("    # Claude wants to use the tool!")
+    lines.append("    tool_use = response.content[0]")
+    lines.append("    ")
+    lines.append("    # Extract the question")
+    lines.append("    question = tool_use.input['question']")
+    lines.append("    # → 'What are the top events?'")
+    lines.append("```\n")
+
+    _write(lines)
     input("Press Enter to see E2B execution...")
-    print()
-
-    print("Execute in E2B sandbox:")
-    print("```python")
-    print("from e2b import Sandbox")
-    print()
-    print("# Create isolated cloud sandbox")
-    print("sandbox = Sandbox.create(api_key=E2B_API_KEY)")
-    print()
-    print("# Upload PostHog driver")
-    print("sandbox.files.write('/home/user/posthog_driver/__init__.py', ...)")
-    print("sandbox.files.write('/home/user/posthog_driver/client.py', ...)")
-    print()
-    print("# Execute query script")
-    print("script = '''")
-    print("from posthog_driver import PostHogClient")
-    print()
-    print("client = PostHogClient(api_key='...', project_id='...')")
-    print("results = client.query(\"SELECT event, count() FROM events...\")")
-    print("print(results)")
-    print("'''")
-    print()
-    print("result = sandbox.run_code(code=script)")
-    print("```\n")
-
+    lines.append("")
+
+    lines.append("Execute in E2B sandbox:")
+    lines.append("```python")
+    lines.append("from e2b import Sandbox")
+    lines.append("")
+    lines.append("# Create isolated cloud sandbox")
+    lines.append("sandbox = Sandbox.create(api_key=E2B_API_KEY)")
+    lines.append("")
+    lines.append("# Upload PostHog driver")
+    lines.append("sandbox.files.write('/home/user/posthog_driver/__init__.py', ...)")
+    lines.append("sandbox.files.write('/home/user/posthog_driver/client.py', ...)")
+    lines.append("")
+    lines.append("# Execute query script")
+    lines.append("script = '''")
+    lines.append("from posthog_driver import PostHogClient")
+    lines.append("")
+    lines.append("client = PostHogClient(api_key='...', project_id='...')")
+    lines.append("results = client.query(\"SELECT event, count() FROM events...\")")
+    lines.append("print(results)")
+    lines.append("'''")
+    lines.append("")
+    lines.append("result = sandbox.run_code(code=script)")
+    lines.append("```\n")
+
+    _write(lines)
     input("Press Enter to see results flow...")
-    print()
-
-    print("Results flow back:")
-    print()
-    print("  E2B Sandbox")
-    print("    ↓ Executes query")
-    print("  PostHog API")
-    print("    ↓ Returns data")
-    print("  Your Code")
-    print("    ↓ Formats results")
-    print("  Claude API")
-    print("    ↓ Receives tool result")
-    print("  Claude")
-    print("    ↓ Formats answer")
-    print("  User")
-    print()
-
-    print("Send tool result back to Claude:")
-    print("```python")
-    print("messages.append({'role': 'assistant', 'content': response.content})")
-    print("messages.append({")
-    print("    'role': 'user',")
-    print("    'content': [{")
-    print("        'type': 'tool_result',")
-    print("        'tool_use_id': tool_use.id,")
-    print("        'content': result.logs.stdout")
-    print("    }]")
-    print("})")
-    print()
-    print("# Get Claude's final answer")
-    print("final_response = anthropic.messages.create(")
-    print("    model='claude-3-5-sonnet-20241022',")
-    print("    tools=[TOOL],")
-    print("    messages=messages")
-    print(")")
-    print("```\n")
-
+    lines.append("")
+
+    lines.append("Results flow back:")
+    lines.append("")
+    lines.append("  E2B Sandbox")
+    lines.append("    ↓ Executes query")
+    lines.append("  PostHog API")
+    lines.append("    ↓ Returns data")
+    lines.append("  Your Code")
+    lines.append("    ↓ Formats results")
+    lines.append("  Claude API")
+    lines.append("    ↓ Receives tool result")
+    lines.append("  Claude")
+    lines.append("    ↓ Formats answer")
+    lines.append("  User")
+    lines.append("")
+
+    lines.append("Send tool result back to Claude:")
+    lines.append("```python")
+    lines.append("messages.append({'role': 'assistant', 'content': response.content})")
+    lines.append("messages.append({")
+    lines.append("    'role': 'user',")
+    lines.append("    'content': [{")
+    lines.append("        'type': 'tool_result',")
+    lines.append("        'tool_use_id': tool_use.id,")
+    lines.append("        'content': result.logs.stdout")
+    lines.append("    }]")
+    lines.append("})")
+    lines.append("")
+    lines.append("# Get Claude's final answer")
+    lines.append("final_response = anthropic.messages.create(")
+    lines.append("    model='claude-3-5-sonnet-20241022',")
+    lines.append("    tools=[TOOL],")
+    lines.append("    messages=messages")
+    lines.append(")")
+    lines.append("```\n")
+
+    _write(lines)
     input("Press Enter to see final output...")
-    print()
+    lines.append("")
 
     # ========================================================================
     # FINAL OUTPUT
     # ========================================================================
-    print("┌" + "─" * 68 + "┐")
-    print("│  FINAL OUTPUT: What User Sees                                     │")
-    print("└" + "─" * 68 + "┘\n")
-
-    print("Claude's formatted answer:\n")
-    print("─" * 70)
-    print()
-    print("Based on the query results, here are the top 5 events in the")
-    print("last 7 days:")
-    print()
-    print("1. $pageview - 1,521 total events from 243 unique users")
-    print("   This is your most common event, representing page views across")
-    print("   your application.")
-    print()
-    print("2. user_logged_in - 507 events from 87 unique users")
-    print("   Users are logging in multiple times, averaging about 5.8 logins")
-    print("   per user.")
-    print()
-    print("3. subscription_purchased - 89 events from 80 unique users")
-    print("   Strong conversion event with most users purchasing once.")
-    print()
-    print("4. movie_buy_complete - 75 events from 52 users")
-    print("   Movie purchases are averaging 1.4 per user.")
-    print()
-    print("5. movie_rent_complete - 68 events from 45 users")
-    print("   Similar pattern to purchases.")
-    print()
-    print("─" * 70)
-    print()
+    lines.append(_BOX_TOP)
+    lines.append("│  FINAL OUTPUT: What User Sees                                     │")
+    lines.append(_BOX_BOTTOM + "\n")
+
+    lines.append("Claude's formatted answer:\n")
+    lines.append(_DIVIDER)
+    lines.append("")
+    lines.append("Based on the query results, here are the top 5 events in the")
+    lines.append("last 7 days:")
+    lines.append("")
+    lines.append("1. $pageview - 1,521 total events from 243 unique users")
+    lines.append("   This is your most common event, representing page views across")
+    lines.append("   your application.")
+    lines.append("")
+    lines.append("2. user_logged_in - 507 events from 87 unique users")
+    lines.append("   Users are logging in multiple times, averaging about 5.8 logins")
+    lines.append("   per user.")
+    lines.append("")
+    lines.append("3. subscription_purchased - 89 events from 80 unique users")
+    lines.append("   Strong conversion event with most users purchasing once.")
+    lines.append("")
+    lines.append("4. movie_buy_complete - 75 events from 52 users")
+    lines.append("   Movie purchases are averaging 1.4 per user.")
+    lines.append("")
+    lines.append("5. movie_rent_complete - 68 events from 45 users")
+    lines.append("   Similar pattern to purchases.")
+    lines.append("")
+    lines.append(_DIVIDER)
+    lines.append("")
 
     # ========================================================================
     # SUMMARY
     # ========================================================================
-    print("\n" + "=" * 70)
-    print("  SUMMARY: The 3-Step Pattern")
-    print("=" * 70 + "\n")
-
-    print("✅ STEP 1: Define Tool")
-    print("   └─ Tell Claude what it can do via tool definition\n")
-
-    print("✅ STEP 2: Call Claude with Tool")
-    print("   └─ Claude decides when to use the tool\n")
-
-    print("✅ STEP 3: Execute Tool When Requested")
-    print("   ├─ Check if Claude wants to use tool (stop_reason == 'tool_use')")
-    print("   ├─ Execute query in E2B sandbox")
-    print("   ├─ Send results back to Claude")
-    print("   └─ Claude formats final answer\n")
-
-    print("=" * 70)
-    print()
-    print("🎯 Key Advantages:")
-    print("   • User asks in plain English")
-    print("   • Claude decides when to query PostHog")
-    print("   • Execution is secure (isolated E2B sandbox)")
-    print("   • Claude formats results intelligently")
-    print()
-
-    print("📁 See the real code in:")
-    print("   • minimal_claude_example.py (100 lines)")
-    print("   • claude_agent_with_posthog.py (350 lines, full agent)")
-    print()
-
-    print("📖 Read more:")
-    print("   • CLAUDE_SDK_SUMMARY.md (complete explanation)")
-    print("   • ARCHITECTURE_CLAUDE.md (visual diagrams)")
-    print()
+    lines.append("\n" + _RULE)
+    lines.append("  SUMMARY: The 3-Step Pattern")
+    lines.append(_RULE + "\n")
+
+    lines.append("✅ STEP 1: Define Tool")
+    lines.append("   └─ Tell Claude what it can do via tool definition\n")
+
+    lines.append("✅ STEP 2: Call Claude with Tool")
+    lines.append("   └─ Claude decides when to use the tool\n")
+
+    lines.append("✅ STEP 3: Execute Tool When Requested")
+    lines.append("   ├─ Check if Claude wants to use tool (stop_reason == 'tool_use')")
+    lines.append("   ├─ Execute query in E2B sandbox")
+    lines.append("   ├─ Send results back to Claude")
+    lines.append("   └─ Claude formats final answer\n")
+
+    lines.append(_RULE)
+    lines.append("")
+    lines.append("🎯 Key Advantages:")
+    lines.append("   • User asks in plain English")
+    lines.append("   • Claude decides when to query PostHog")
+    lines.append("   • Execution is secure (isolated E2B sandbox)")
+    lines.append("   • Claude formats results intelligently")
+    lines.append("")
+
+    lines.append("📁 See the real code in:")
+    lines.append("   • minimal_claude_example.py (100 lines)")
+    lines.append("   • claude_agent_with_posthog.py (350 lines, full agent)")
+    lines.append("")
+
+    lines.append("📖 Read more:")
+    lines.append("   • CLAUDE_SDK_SUMMARY.md (complete explanation)")
+    lines.append("   • ARCHITECTURE_CLAUDE.md (visual diagrams)")
+    lines.append("")
+    _write(lines)
 
 
 if __name__ == '__main__':
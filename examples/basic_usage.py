@@ -7,36 +7,52 @@ Demonstrates core driver contract and basic PostHog operations.
 import sys
 sys.path.insert(0, '..')
 
-from posthog_driver import PostHogClient
-import json
+from posthog_driver import PostHogClient, format_json
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import io
+
+# Banner pieces, built once at import
+_RULE = "=" * 70
+_THIN_RULE = "-" * 70
+_BOX_TOP = "╔" + "=" * 68 + "╗"
+_BOX_BOTTOM = "╚" + "=" * 68 + "╝"
+
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """PostHog client shared by all demos, so they reuse one HTTP session."""
+    return PostHogClient()
 
 
 def driver_contract_demo():
     """Demonstrate the standard driver contract methods."""
-    print("=" * 70)
+    print(_RULE)
     print("DRIVER CONTRACT DEMONSTRATION")
-    print("=" * 70)
+    print(_RULE)
 
-    client = PostHogClient()
+    client = get_client()
 
     # 1. list_objects() - Discover available entity types
     print("\n1. list_objects() - Discover Available Entities")
-    print("-" * 70)
+    print(_THIN_RULE)
     objects = client.list_objects()
     print(f"Available PostHog entities: {', '.join(objects)}")
 
     # 2. get_fields() - Get schema for each entity
     print("\n2. get_fields() - Get Entity Schema")
-    print("-" * 70)
+    print(_THIN_RULE)
     for obj_type in ['events', 'insights', 'persons']:
         print(f"\n{obj_type.upper()} Schema:")
         fields = client.get_fields(obj_type)
-        for field_name, field_def in fields.items():
-            print(f"  {field_name}: {field_def['type']} - {field_def['description']}")
+        print("\n".join(
+            f"  {field_name}: {field_def['type']} - {field_def['description']}"
+            for field_name, field_def in fields.items()
+        ))
 
     # 3. query() - Execute HogQL queries
     print("\n3. query() - Execute HogQL Queries")
-    print("-" * 70)
+    print(_THIN_RULE)
 
     # Simple query - get recent events
     hogql = "SELECT event, timestamp, distinct_id FROM events LIMIT 5"
@@ -45,22 +61,22 @@ def driver_contract_demo():
     try:
         results = client.query(hogql)
         print(f"\nResults ({len(results)} rows):")
-        print(json.dumps(results, indent=2))
+        print(format_json(results))
     except Exception as e:
         print(f"Query error: {e}")
 
 
 def event_tracking_demo():
     """Demonstrate event tracking capabilities."""
-    print("\n" + "=" * 70)
+    print("\n" + _RULE)
     print("EVENT TRACKING DEMONSTRATION")
-    print("=" * 70)
+    print(_RULE)
 
-    client = PostHogClient()
+    client = get_client()
 
     # Capture single event
     print("\n1. Capture Single Event")
-    print("-" * 70)
+    print(_THIN_RULE)
 
     try:
         result = client.capture_event(
@@ -72,13 +88,13 @@ def event_tracking_demo():
             }
         )
         print("Event captured successfully:")
-        print(json.dumps(result, indent=2))
+        print(format_json(result))
     except Exception as e:
         print(f"Event capture error: {e}")
 
     # Capture batch events
     print("\n2. Capture Batch Events")
-    print("-" * 70)
+    print(_THIN_RULE)
 
     try:
         batch_events = [
@@ -101,36 +117,36 @@ def event_tracking_demo():
 
         result = client.capture_batch(batch_events)
         print(f"Batch of {len(batch_events)} events captured successfully:")
-        print(json.dumps(result, indent=2))
+        print(format_json(result))
     except Exception as e:
         print(f"Batch capture error: {e}")
 
 
-def analytics_demo():
+def analytics_demo(out=None):
     """Demonstrate analytics and insights retrieval."""
-    print("\n" + "=" * 70)
-    print("ANALYTICS & INSIGHTS DEMONSTRATION")
-    print("=" * 70)
+    print("\n" + _RULE, file=out)
+    print("ANALYTICS & INSIGHTS DEMONSTRATION", file=out)
+    print(_RULE, file=out)
 
-    client = PostHogClient()
+    client = get_client()
 
     # Get insights
-    print("\n1. List Insights")
-    print("-" * 70)
+    print("\n1. List Insights", file=out)
+    print(_THIN_RULE, file=out)
 
     try:
         insights = client.get_insights(limit=5)
-        print(f"Found {len(insights)} insights:")
+        print(f"Found {len(insights)} insights:", file=out)
         for insight in insights:
-            print(f"\n  - {insight['name']}")
-            print(f"    Type: {insight.get('filters', {}).get('insight', 'N/A')}")
-            print(f"    ID: {insight['id']}")
+            print(f"\n  - {insight['name']}", file=out)
+            print(f"    Type: {insight.get('filters', {}).get('insight', 'N/A')}", file=out)
+            print(f"    ID: {insight['id']}", file=out)
     except Exception as e:
-        print(f"Insights error: {e}")
+        print(f"Insights error: {e}", file=out)
 
     # Query events
-    print("\n2. Query Recent Events")
-    print("-" * 70)
+    print("\n2. Query Recent Events", file=out)
+    print(_THIN_RULE, file=out)
 
     try:
         from datetime import datetime, timedelta
@@ -140,65 +156,71 @@ def analytics_demo():
             after=after_date,
             limit=10
         )
-        print(f"Found {len(events)} events in last 7 days")
+        print(f"Found {len(events)} events in last 7 days", file=out)
         if events:
-            print("\nSample event:")
-            print(json.dumps(events[0], indent=2))
+            print("\nSample event:", file=out)
+            print(format_json(events[0]), file=out)
     except Exception as e:
-        print(f"Event query error: {e}")
+        print(f"Event query error: {e}", file=out)
 
 
-def cohort_demo():
+def cohort_demo(out=None):
     """Demonstrate cohort operations."""
-    print("\n" + "=" * 70)
-    print("COHORT MANAGEMENT DEMONSTRATION")
-    print("=" * 70)
+    print("\n" + _RULE, file=out)
+    print("COHORT MANAGEMENT DEMONSTRATION", file=out)
+    print(_RULE, file=out)
 
-    client = PostHogClient()
+    client = get_client()
 
     # List cohorts
-    print("\n1. List All Cohorts")
-    print("-" * 70)
+    print("\n1. List All Cohorts", file=out)
+    print(_THIN_RULE, file=out)
 
     try:
         cohorts = client.get_cohorts()
-        print(f"Found {len(cohorts)} cohorts:")
+        print(f"Found {len(cohorts)} cohorts:", file=out)
+        lines = []
         for cohort in cohorts:
-            print(f"\n  - {cohort['name']}")
-            print(f"    ID: {cohort['id']}")
-            print(f"    Count: {cohort.get('count', 'N/A')} users")
+            lines.append(f"\n  - {cohort['name']}")
+            lines.append(f"    ID: {cohort['id']}")
+            lines.append(f"    Count: {cohort.get('count', 'N/A')} users")
             if cohort.get('description'):
-                print(f"    Description: {cohort['description']}")
+                lines.append(f"    Description: {cohort['description']}")
+        if lines:
+            print("\n".join(lines), file=out)
     except Exception as e:
-        print(f"Cohort list error: {e}")
+        print(f"Cohort list error: {e}", file=out)
 
 
-def feature_flags_demo():
+def feature_flags_demo(out=None):
     """Demonstrate feature flag operations."""
-    print("\n" + "=" * 70)
-    print("FEATURE FLAGS DEMONSTRATION")
-    print("=" * 70)
+    print("\n" + _RULE, file=out)
+    print("FEATURE FLAGS DEMONSTRATION", file=out)
+    print(_RULE, file=out)
 
-    client = PostHogClient()
+    client = get_client()
 
     # List feature flags
-    print("\n1. List All Feature Flags")
-    print("-" * 70)
+    print("\n1. List All Feature Flags", file=out)
+    print(_THIN_RULE, file=out)
 
     try:
         flags = client.get_feature_flags()
-        print(f"Found {len(flags)} feature flags:")
+        print(f"Found {len(flags)} feature flags:", file=out)
+        lines = []
         for flag in flags[:5]:  # Show first 5
-            print(f"\n  - {flag['name']}")
-            print(f"    Key: {flag['key']}")
-            print(f"    Active: {flag.get('active', False)}")
-            print(f"    Rollout: {flag.get('rollout_percentage', 0)}%")
+            lines.append(f"\n  - {flag['name']}")
+            lines.append(f"    Key: {flag['key']}")
+            lines.append(f"    Active: {flag.get('active', False)}")
+            lines.append(f"    Rollout: {flag.get('rollout_percentage', 0)}%")
+        if lines:
+            print("\n".join(lines), file=out)
     except Exception as e:
-        print(f"Feature flags error: {e}")
+        print(f"Feature flags error: {e}", file=out)
 
     # Evaluate a flag
-    print("\n2. Evaluate Feature Flag for User")
-    print("-" * 70)
+    print("\n2. Evaluate Feature Flag for User", file=out)
+    print(_THIN_RULE, file=out)
 
     try:
         # Note: This requires a valid flag key and project API key
@@ -208,52 +230,77 @@ def feature_flags_demo():
                 key=flag_key,
                 distinct_id="demo_user_123"
             )
-            print(f"Flag '{flag_key}' evaluation:")
-            print(json.dumps(evaluation, indent=2))
+            print(f"Flag '{flag_key}' evaluation:", file=out)
+            print(format_json(evaluation), file=out)
     except Exception as e:
-        print(f"Flag evaluation error: {e}")
+        print(f"Flag evaluation error: {e}", file=out)
 
 
-def health_check_demo():
+def health_check_demo(out=None):
     """Demonstrate connection health check."""
-    print("\n" + "=" * 70)
-    print("HEALTH CHECK DEMONSTRATION")
-    print("=" * 70)
+    print("\n" + _RULE, file=out)
+    print("HEALTH CHECK DEMONSTRATION", file=out)
+    print(_RULE, file=out)
 
-    client = PostHogClient()
+    client = get_client()
 
-    print("\nChecking PostHog API connection...")
+    print("\nChecking PostHog API connection...", file=out)
 
     if client.health_check():
-        print("✓ Connection successful!")
+        print("✓ Connection successful!", file=out)
 
         # Get project info
         project_info = client.get_project_info()
-        print(f"\nProject Name: {project_info.get('name')}")
-        print(f"Project ID: {project_info.get('id')}")
-        print(f"Timezone: {project_info.get('timezone')}")
+        print(f"\nProject Name: {project_info.get('name')}", file=out)
+        print(f"Project ID: {project_info.get('id')}", file=out)
+        print(f"Timezone: {project_info.get('timezone')}", file=out)
     else:
-        print("✗ Connection failed!")
+        print("✗ Connection failed!", file=out)
+
+
+def run_concurrently(tasks, end=''):
+    """
+    Run independent tasks in parallel, printing output in order.
+
+    Each task is called with out= set to its own buffer so their output
+    doesn't interleave; buffers are printed as soon as every earlier task
+    has finished. persona_workflows.py runs its workflows through this too.
+
+    Args:
+        tasks: Callables taking an out= stream
+        end: Printed after each task's output (a newline leaves a blank line)
+    """
+    buffers = [io.StringIO() for _ in tasks]
+    with ThreadPoolExecutor(max_workers=min(8, len(tasks))) as pool:
+        futures = [pool.submit(task, out=buf) for task, buf in zip(tasks, buffers)]
+        for future, buf in zip(futures, buffers):
+            try:
+                future.result()
+            finally:
+                print(buf.getvalue(), end=end)
 
 
 if __name__ == '__main__':
     print("\n")
-    print("╔" + "=" * 68 + "╗")
+    print(_BOX_TOP)
     print("║" + " " * 15 + "PostHog Driver - Basic Usage Examples" + " " * 15 + "║")
-    print("╚" + "=" * 68 + "╝")
+    print(_BOX_BOTTOM)
 
     # Run all demos
     try:
         driver_contract_demo()
         event_tracking_demo()
-        analytics_demo()
-        cohort_demo()
-        feature_flags_demo()
-        health_check_demo()
-
-        print("\n" + "=" * 70)
+        # These only read from PostHog, so their API calls can overlap
+        run_concurrently([
+            analytics_demo,
+            cohort_demo,
+            feature_flags_demo,
+            health_check_demo,
+        ])
+
+        print("\n" + _RULE)
         print("All demonstrations completed successfully!")
-        print("=" * 70 + "\n")
+        print(_RULE + "\n")
 
     except Exception as e:
         print(f"\n\nError running demonstrations: {e}")
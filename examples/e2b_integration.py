@@ -6,26 +6,48 @@ for isolated, cloud-based execution.
 """
 
 import os
-from agent_executor import PostHogAgentExecutor
+from contextlib import ExitStack
+from posthog_driver import format_json
 from script_templates import TEMPLATES
 import json
 
+try:
+    import orjson
+    _loads = orjson.loads  # Its JSONDecodeError subclasses json's
+except ImportError:
+    _loads = json.loads
 
-def example_basic_execution():
-    """
-    Example 1: Basic script execution in E2B sandbox.
-    """
-    print("=" * 70)
-    print("EXAMPLE 1: Basic Script Execution")
-    print("=" * 70)
 
-    with PostHogAgentExecutor(
+def _executor():
+    """Create an executor from the E2B/PostHog environment variables."""
+    # Deferred: importing agent_executor pulls in the e2b SDK (~0.3s)
+    from agent_executor import PostHogAgentExecutor
+
+    return PostHogAgentExecutor(
         e2b_api_key=os.getenv('E2B_API_KEY'),
         posthog_api_key=os.getenv('POSTHOG_PERSONAL_API_KEY'),
         posthog_project_id=os.getenv('POSTHOG_PROJECT_ID')
-    ) as executor:
+    )
+
 
-        script = """
+def _template_script(template_name, template_vars):
+    """Build a script dict by filling a template's {placeholders} in one pass."""
+    # Templates escape literal braces as {{ }}, so they are str.format-ready
+    return {
+        'code': TEMPLATES[template_name].format_map(template_vars),
+        'description': f"Executing template: {template_name}"
+    }
+
+
+# =================================================================
+# EXAMPLE SCRIPTS
+#
+# Each example is split into build_* (the scripts to run) and report_*
+# (printing their results), so all of them can share one sandbox
+# session and one batch_execute call.
+# =================================================================
+
+BASIC_SCRIPT = """
 import sys
 import json
 sys.path.insert(0, '/home/user')
@@ -49,218 +71,257 @@ print(json.dumps({
 }, indent=2))
 """
 
-        result = executor.execute_script(
-            script=script,
-            description="Test PostHog driver in E2B sandbox"
-        )
-
-        print(f"\nSuccess: {result['success']}")
-        print(f"Output:\n{result['output']}")
-
-        if result['error']:
-            print(f"Error: {result['error']}")
 
+def build_basic_execution():
+    """Example 1: Basic script execution in E2B sandbox."""
+    return [{
+        'code': BASIC_SCRIPT,
+        'description': "Test PostHog driver in E2B sandbox"
+    }]
+
+
+def report_basic_execution(results):
+    """Print the result of example 1."""
+    result = results[0]
+    print(f"\nSuccess: {result['success']}")
+    print(f"Output:\n{result['output']}")
+
+    if result['error']:
+        print(f"Error: {result['error']}")
+
+
+def build_template_execution():
+    """Example 2: Using pre-built script templates."""
+    # Execute "get recent events" template
+    return [_template_script('get_recent_events', {
+        'event_name': 'User Signup',
+        'after_date': '2024-01-01',
+        'limit': '10'
+    })]
+
+
+def report_template_execution(results):
+    """Print the result of example 2."""
+    result = results[0]
+    print(f"\nTemplate: get_recent_events")
+    print(f"Success: {result['success']}")
+    print(f"Output:\n{result['output']}")
+
+
+def build_power_user_analysis():
+    """Example 3: Identify power users using template."""
+    return [_template_script('identify_power_users', {
+        'key_event': 'Feature Used',
+        'min_occurrences': '10',
+        'days': '30'
+    })]
+
+
+def report_power_user_analysis(results):
+    """Print the result of example 3."""
+    result = results[0]
+    print(f"\nSuccess: {result['success']}")
+
+    if result['success']:
+        # Parse JSON output
+        try:
+            data = _loads(result['output'])
+            print(f"\nPower Users Found: {data['power_users_count']}")
+            print(f"Criteria: {format_json(data['criteria'])}")
+
+            if data['power_users']:
+                print("\nTop Power Users:")
+                # Rows are [distinct_id, action_count, email]
+                for distinct_id, action_count, email in data['power_users'][:5]:
+                    print(f"  - {email or distinct_id}: {action_count} actions")
+        except json.JSONDecodeError:
+            print(f"Raw output:\n{result['output']}")
+    else:
+        print(f"Error: {result['error']}")
+
+
+def build_batch_execution():
+    """Example 4: Execute multiple scripts in one batch."""
+    return [
+        {
+            'code': TEMPLATES['get_insights'].format_map(
+                {'insight_type': 'TRENDS', 'limit': '5'}
+            ),
+            'description': 'Get trend insights'
+        },
+        {
+            'code': TEMPLATES['get_insights'].format_map(
+                {'insight_type': 'FUNNELS', 'limit': '5'}
+            ),
+            'description': 'Get funnel insights'
+        }
+    ]
 
-def example_template_execution():
-    """
-    Example 2: Using pre-built script templates.
-    """
-    print("\n" + "=" * 70)
-    print("EXAMPLE 2: Template-Based Execution")
-    print("=" * 70)
 
-    with PostHogAgentExecutor(
-        e2b_api_key=os.getenv('E2B_API_KEY'),
-        posthog_api_key=os.getenv('POSTHOG_PERSONAL_API_KEY'),
-        posthog_project_id=os.getenv('POSTHOG_PROJECT_ID')
-    ) as executor:
-
-        # Execute "get recent events" template
-        result = executor.execute_template(
-            template_name='get_recent_events',
-            template_vars={
-                'event_name': 'User Signup',
-                'after_date': '2024-01-01',
-                'limit': '10'
-            },
-            templates=TEMPLATES
-        )
-
-        print(f"\nTemplate: get_recent_events")
+def report_batch_execution(results):
+    """Print the results of example 4."""
+    for i, result in enumerate(results, 1):
+        print(f"\nScript {i}: {result['description']}")
         print(f"Success: {result['success']}")
-        print(f"Output:\n{result['output']}")
-
-
-def example_power_user_analysis():
-    """
-    Example 3: Identify power users using template.
-    """
-    print("\n" + "=" * 70)
-    print("EXAMPLE 3: Power User Identification")
-    print("=" * 70)
-
-    with PostHogAgentExecutor(
-        e2b_api_key=os.getenv('E2B_API_KEY'),
-        posthog_api_key=os.getenv('POSTHOG_PERSONAL_API_KEY'),
-        posthog_project_id=os.getenv('POSTHOG_PROJECT_ID')
-    ) as executor:
-
-        result = executor.execute_template(
-            template_name='identify_power_users',
-            template_vars={
-                'key_event': 'Feature Used',
-                'min_occurrences': '10',
-                'days': '30'
-            },
-            templates=TEMPLATES
-        )
-
-        print(f"\nSuccess: {result['success']}")
 
         if result['success']:
-            # Parse JSON output
             try:
-                data = json.loads(result['output'])
-                print(f"\nPower Users Found: {data['power_users_count']}")
-                print(f"Criteria: {json.dumps(data['criteria'], indent=2)}")
-
-                if data['power_users']:
-                    print("\nTop Power Users:")
-                    for user in data['power_users'][:5]:
-                        print(f"  - {user.get('email', user['distinct_id'])}: "
-                              f"{user['action_count']} actions")
-            except json.JSONDecodeError:
-                print(f"Raw output:\n{result['output']}")
+                data = _loads(result['output'])
+                print(f"Found {data['count']} insights")
+            except:
+                print(f"Output:\n{result['output'][:200]}...")
         else:
             print(f"Error: {result['error']}")
 
 
-def example_batch_execution():
-    """
-    Example 4: Execute multiple scripts in sequence.
+# Its variables are fixed, so the script is composed once at import
+FUNNEL_SCRIPT = TEMPLATES['analyze_funnel'].format_map({
+    'funnel_steps': "['Signup Started', 'Email Verified', 'Profile Completed']"
+})
+
+
+def build_funnel_analysis():
+    """Example 5: Analyze conversion funnel."""
+    return [{'code': FUNNEL_SCRIPT, 'description': "Analyze signup funnel"}]
+
+
+def report_funnel_analysis(results):
+    """Print the result of example 5."""
+    result = results[0]
+    print(f"\nSuccess: {result['success']}")
+
+    if result['success']:
+        try:
+            data = _loads(result['output'])
+            print(f"\nFunnel Analysis ({data['funnel_steps']} steps):")
+
+            for step in data['funnel_analysis']:
+                print(f"\n  Step: {step['step']}")
+                print(f"  Users: {step['users']}")
+                if step['dropoff_rate'] is not None:
+                    print(f"  Drop-off: {step['dropoff_rate']}%")
+        except:
+            print(f"Output:\n{result['output']}")
+    else:
+        print(f"Error: {result['error']}")
+
+
+def build_churn_risk_identification():
+    """Example 6: Identify users at risk of churning."""
+    return [_template_script('identify_churn_risk', {
+        'inactive_days': '7',   # No activity in last 7 days
+        'lookback_days': '30'   # But active in previous 30 days
+    })]
+
+
+def report_churn_risk_identification(results):
+    """Print the result of example 6."""
+    result = results[0]
+    print(f"\nSuccess: {result['success']}")
+
+    if result['success']:
+        try:
+            data = _loads(result['output'])
+            print(f"\nChurn Risk Users: {data['churn_risk_count']}")
+            print(f"Criteria: {format_json(data['criteria'])}")
+
+            if data['users']:
+                print("\nAt-Risk Users:")
+                # Rows are [distinct_id, email, last_seen]
+                for distinct_id, email, last_seen in data['users'][:10]:
+                    print(f"  - {email or distinct_id}")
+                    print(f"    Last seen: {last_seen}")
+        except:
+            print(f"Output:\n{result['output']}")
+    else:
+        print(f"Error: {result['error']}")
+
+
+# (title, build_scripts, report_results)
+EXAMPLES = [
+    ("EXAMPLE 1: Basic Script Execution",
+     build_basic_execution, report_basic_execution),
+    ("EXAMPLE 2: Template-Based Execution",
+     build_template_execution, report_template_execution),
+    ("EXAMPLE 3: Power User Identification",
+     build_power_user_analysis, report_power_user_analysis),
+    ("EXAMPLE 4: Batch Script Execution",
+     build_batch_execution, report_batch_execution),
+    ("EXAMPLE 5: Funnel Analysis",
+     build_funnel_analysis, report_funnel_analysis),
+    ("EXAMPLE 6: Churn Risk Identification",
+     build_churn_risk_identification, report_churn_risk_identification),
+]
+
+
+def run_examples(examples=EXAMPLES, executor=None):
     """
-    print("\n" + "=" * 70)
-    print("EXAMPLE 4: Batch Script Execution")
-    print("=" * 70)
+    Run examples in one sandbox session with a single batch_execute call.
 
-    with PostHogAgentExecutor(
-        e2b_api_key=os.getenv('E2B_API_KEY'),
-        posthog_api_key=os.getenv('POSTHOG_PERSONAL_API_KEY'),
-        posthog_project_id=os.getenv('POSTHOG_PROJECT_ID')
-    ) as executor:
-
-        scripts = [
-            {
-                'code': TEMPLATES['get_insights'].replace(
-                    '{insight_type}', 'TRENDS'
-                ).replace('{limit}', '5'),
-                'description': 'Get trend insights'
-            },
-            {
-                'code': TEMPLATES['get_insights'].replace(
-                    '{insight_type}', 'FUNNELS'
-                ).replace('{limit}', '5'),
-                'description': 'Get funnel insights'
-            }
-        ]
-
-        results = executor.batch_execute(scripts)
-
-        for i, result in enumerate(results, 1):
-            print(f"\nScript {i}: {result['description']}")
-            print(f"Success: {result['success']}")
-
-            if result['success']:
-                try:
-                    data = json.loads(result['output'])
-                    print(f"Found {data['count']} insights")
-                except:
-                    print(f"Output:\n{result['output'][:200]}...")
-            else:
-                print(f"Error: {result['error']}")
-
-
-def example_funnel_analysis():
-    """
-    Example 5: Analyze conversion funnel.
+    Args:
+        examples: (title, build, report) entries, defaults to all of EXAMPLES
+        executor: Already-entered PostHogAgentExecutor to reuse; a new one is
+            opened (and closed) for this call when omitted
     """
-    print("\n" + "=" * 70)
-    print("EXAMPLE 5: Funnel Analysis")
-    print("=" * 70)
+    batches = [build() for _, build, _ in examples]
+    scripts = [script for batch in batches for script in batch]
+
+    # Identical scripts (same template and variables) run once and share
+    # the result
+    unique = {}
+    for script in scripts:
+        unique.setdefault(script['code'], script)
+
+    with ExitStack() as stack:
+        if executor is None:
+            executor = stack.enter_context(_executor())
+        unique_results = executor.batch_execute(
+            list(unique.values()), fail_fast=False
+        )
 
-    with PostHogAgentExecutor(
-        e2b_api_key=os.getenv('E2B_API_KEY'),
-        posthog_api_key=os.getenv('POSTHOG_PERSONAL_API_KEY'),
-        posthog_project_id=os.getenv('POSTHOG_PROJECT_ID')
-    ) as executor:
+    by_code = dict(zip(unique, unique_results))
+    results = [
+        dict(by_code[script['code']], description=script['description'])
+        for script in scripts
+    ]
 
-        funnel_template = TEMPLATES['analyze_funnel'].replace(
-            '{funnel_steps}', "['Signup Started', 'Email Verified', 'Profile Completed']"
-        ).replace('{start_date}', '2024-01-01').replace('{end_date}', '2024-01-31')
+    offset = 0
+    for (title, _, report), batch in zip(examples, batches):
+        print("\n" + "=" * 70)
+        print(title)
+        print("=" * 70)
+        report(results[offset:offset + len(batch)])
+        offset += len(batch)
 
-        result = executor.execute_script(
-            script=funnel_template,
-            description="Analyze signup funnel"
-        )
 
-        print(f"\nSuccess: {result['success']}")
+def example_basic_execution(executor=None):
+    """Example 1: Basic script execution in E2B sandbox."""
+    run_examples(EXAMPLES[0:1], executor)
 
-        if result['success']:
-            try:
-                data = json.loads(result['output'])
-                print(f"\nFunnel Analysis ({data['funnel_steps']} steps):")
-
-                for step in data['funnel_analysis']:
-                    print(f"\n  Step: {step['step']}")
-                    print(f"  Users: {step['users']}")
-                    if step['dropoff_rate'] is not None:
-                        print(f"  Drop-off: {step['dropoff_rate']}%")
-            except:
-                print(f"Output:\n{result['output']}")
-        else:
-            print(f"Error: {result['error']}")
 
+def example_template_execution(executor=None):
+    """Example 2: Using pre-built script templates."""
+    run_examples(EXAMPLES[1:2], executor)
 
-def example_churn_risk_identification():
-    """
-    Example 6: Identify users at risk of churning.
-    """
-    print("\n" + "=" * 70)
-    print("EXAMPLE 6: Churn Risk Identification")
-    print("=" * 70)
 
-    with PostHogAgentExecutor(
-        e2b_api_key=os.getenv('E2B_API_KEY'),
-        posthog_api_key=os.getenv('POSTHOG_PERSONAL_API_KEY'),
-        posthog_project_id=os.getenv('POSTHOG_PROJECT_ID')
-    ) as executor:
-
-        result = executor.execute_template(
-            template_name='identify_churn_risk',
-            template_vars={
-                'inactive_days': '7',   # No activity in last 7 days
-                'lookback_days': '30'   # But active in previous 30 days
-            },
-            templates=TEMPLATES
-        )
+def example_power_user_analysis(executor=None):
+    """Example 3: Identify power users using template."""
+    run_examples(EXAMPLES[2:3], executor)
 
-        print(f"\nSuccess: {result['success']}")
 
-        if result['success']:
-            try:
-                data = json.loads(result['output'])
-                print(f"\nChurn Risk Users: {data['churn_risk_count']}")
-                print(f"Criteria: {json.dumps(data['criteria'], indent=2)}")
-
-                if data['users']:
-                    print("\nAt-Risk Users:")
-                    for user in data['users'][:10]:
-                        print(f"  - {user.get('email', user['distinct_id'])}")
-                        print(f"    Last seen: {user['last_seen']}")
-            except:
-                print(f"Output:\n{result['output']}")
-        else:
-            print(f"Error: {result['error']}")
+def example_batch_execution(executor=None):
+    """Example 4: Execute multiple scripts in one batch."""
+    run_examples(EXAMPLES[3:4], executor)
+
+
+def example_funnel_analysis(executor=None):
+    """Example 5: Analyze conversion funnel."""
+    run_examples(EXAMPLES[4:5], executor)
+
+
+def example_churn_risk_identification(executor=None):
+    """Example 6: Identify users at risk of churning."""
+    run_examples(EXAMPLES[5:6], executor)
 
 
 if __name__ == '__main__':
@@ -290,12 +351,8 @@ if __name__ == '__main__':
     try:
         print("Running E2B integration examples...\n")
 
-        example_basic_execution()
-        example_template_execution()
-        example_power_user_analysis()
-        example_batch_execution()
-        example_funnel_analysis()
-        example_churn_risk_identification()
+        # One sandbox session and one batch for all six examples
+        run_examples()
 
         print("\n" + "=" * 70)
         print("All E2B integration examples completed successfully!")
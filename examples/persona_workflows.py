@@ -13,23 +13,172 @@ Personas covered:
 """
 
 import sys
+import argparse
+import time
+import functools
 sys.path.insert(0, '..')
 
-from posthog_driver import PostHogClient
+from posthog_driver import PostHogClient, format_json
+from basic_usage import run_concurrently
 import json
 from datetime import datetime, timedelta
 
-
+@functools.lru_cache(maxsize=1)
 def setup_client():
-    """Setup PostHog client (uses environment variables)."""
+    """Setup PostHog client (uses environment variables).
+
+    Shared by every workflow so they reuse one HTTP session and its
+    keep-alive connections.
+    """
     return PostHogClient()
 
 
+# Repeat runs within the TTL reuse results instead of rescanning events
+QUERY_CACHE_TTL_SECONDS = 60
+_QUERY_CACHE = {}  # (project_id, normalized HogQL) -> (stored_at, results)
+
+
+def cached_query(client, hogql, values=None):
+    """
+    Run a HogQL query, reusing a recent result for the same project and query.
+
+    Queries are keyed on their whitespace-normalized text plus any bound
+    values, so indentation differences between call sites share one cache
+    entry while different placeholder values do not.
+
+    Args:
+        client: PostHogClient instance
+        hogql: HogQL query string
+        values: Values for {name} placeholders in the query (optional)
+
+    Returns:
+        Query results, as returned by client.query()
+    """
+    key = (
+        client.project_id,
+        " ".join(hogql.split()),
+        json.dumps(values, sort_keys=True, default=str)
+    )
+    entry = _QUERY_CACHE.get(key)
+    if entry and time.monotonic() - entry[0] < QUERY_CACHE_TTL_SECONDS:
+        return entry[1]
+    results = client.query(hogql, values)
+    _QUERY_CACHE[key] = (time.monotonic(), results)
+    return results
+
+
+# Exploratory workflows scan this fraction of events (None = all events);
+# run with --fast to set it to 0.1 while iterating on an analysis
+EXPLORATORY_SAMPLE = None
+
+
+def _sampled_threshold(count):
+    """Scale a HAVING row-count threshold to the sample being scanned."""
+    return max(1, round(count * (EXPLORATORY_SAMPLE or 1)))
+
+
+def _sample_note():
+    """Report-header suffix flagging counts that cover only the sample."""
+    if not EXPLORATORY_SAMPLE:
+        return ""
+    return f" [{EXPLORATORY_SAMPLE:.0%} sample: counts not scaled up]"
+
+
+# =================================================================
+# SHARED QUERIES
+# =================================================================
+# The heavier analysis queries live here as constants with their tunable
+# thresholds bound as {name} values, so every run sends byte-identical
+# HogQL and PostHog can reuse its cached parse and results across runs.
+# Like every workflow here, they count users with uniq() - approximate
+# (~1% error) but far lighter than an exact count(DISTINCT ...) hash set;
+# swap in uniqExact() where an exact figure matters.
+
+# Complex query joining events and person properties; events are
+# aggregated per person before the join, so the properties JSON is
+# parsed once per person rather than once per event
+CONVERSION_BY_REFERRER_SQL = """
+SELECT
+    p.properties.initial_referrer as referrer,
+    p.properties.plan_type as plan,
+    sum(e.users) as users,
+    sum(e.total_events) as total_events,
+    sum(e.conversions) as conversions,
+    (conversions / users) * 100 as conversion_rate
+FROM (
+    SELECT
+        person_id,
+        uniq(distinct_id) as users,
+        count() as total_events,
+        countIf(event = 'Purchase Completed') as conversions
+    FROM events
+    WHERE timestamp >= now() - INTERVAL 90 DAY
+    GROUP BY person_id
+) AS e
+LEFT JOIN persons AS p ON p.id = e.person_id
+GROUP BY referrer, plan
+HAVING users >= {min_users}
+ORDER BY conversion_rate DESC
+LIMIT 50
+"""
+
+# Analyze signups by marketing channel; campaigns with too few signups
+# to compare are dropped server-side so noise can't top the list
+CHANNEL_PERFORMANCE_SQL = """
+SELECT
+    properties.utm_source as source,
+    properties.utm_campaign as campaign,
+    uniq(distinct_id) as signups,
+    countIf(distinct_id, event = 'Purchase Completed') as conversions,
+    (conversions / signups) * 100 as conversion_rate
+FROM events
+WHERE
+    event = 'User Signup'
+    AND timestamp >= now() - INTERVAL 30 DAY
+    AND properties.utm_source IS NOT NULL
+GROUP BY source, campaign
+HAVING signups >= {min_signups}
+ORDER BY signups DESC
+LIMIT 20
+"""
+
+# Find users who use key features frequently. The thresholds are applied
+# before joining persons, so email and plan are only read for the
+# (at most 50) power users rather than for every event
+POWER_USERS_SQL = """
+SELECT
+    e.distinct_id as distinct_id,
+    p.properties.email as email,
+    p.properties.plan_type as plan,
+    e.event_count as event_count,
+    e.key_feature_uses as key_feature_uses,
+    e.last_active as last_active
+FROM (
+    SELECT
+        person_id,
+        any(distinct_id) as distinct_id,
+        count() as event_count,
+        countIf(event = 'Key Feature Used') as key_feature_uses,
+        max(timestamp) as last_active
+    FROM events
+    WHERE
+        timestamp >= now() - INTERVAL 30 DAY
+    GROUP BY person_id
+    HAVING event_count >= {min_events}
+        AND key_feature_uses >= {min_key_feature_uses}
+    ORDER BY event_count DESC
+    LIMIT 50
+) AS e
+LEFT JOIN persons AS p ON p.id = e.person_id
+ORDER BY event_count DESC
+"""
+
+
 # =================================================================
 # PRODUCT ENGINEER WORKFLOWS
 # =================================================================
 
-def feature_impact_analysis():
+def feature_impact_analysis(out=None):
     """
     Product Engineer: "Did our new feature actually improve engagement?"
 
@@ -41,40 +190,44 @@ def feature_impact_analysis():
     """
     client = setup_client()
 
-    # Get usage of new feature over last 7 days
+    # Daily feature usage and overall engagement over the last 7 days, fetched
+    # in one round trip and split on the section column
     hogql = """
     SELECT
-        toDate(timestamp) as date,
-        count(DISTINCT distinct_id) as active_users,
-        count() as feature_uses
+        'per_day' as section,
+        toString(toDate(timestamp)) as date,
+        uniq(distinct_id) as users,
+        count() as uses
     FROM events
     WHERE
         event = 'New Feature Used'
         AND timestamp >= now() - INTERVAL 7 DAY
     GROUP BY date
-    ORDER BY date
-    """
-
-    results = client.query(hogql)
-
-    print("=== Feature Impact Analysis ===")
-    print(json.dumps(results, indent=2))
-
-    # Also check overall engagement
-    engagement_query = """
+    UNION ALL
     SELECT
-        count(DISTINCT distinct_id) as total_users,
-        countIf(distinct_id, event = 'New Feature Used') as feature_users
+        'overall' as section,
+        '' as date,
+        uniq(distinct_id) as users,
+        uniqIf(distinct_id, event = 'New Feature Used') as uses
     FROM events
     WHERE timestamp >= now() - INTERVAL 7 DAY
     """
 
-    engagement = client.query(engagement_query)
-    print("\n=== Engagement Metrics ===")
-    print(json.dumps(engagement, indent=2))
+    rows = cached_query(client, hogql)
+
+    # [date, active_users, feature_uses], oldest first
+    results = sorted(row[1:] for row in rows if row[0] == 'per_day')
+    # [total_users, feature_users]
+    engagement = [row[2:] for row in rows if row[0] == 'overall']
+
+    print("=== Feature Impact Analysis ===", file=out)
+    print(format_json(results), file=out)
+
+    print("\n=== Engagement Metrics ===", file=out)
+    print(format_json(engagement), file=out)
 
 
-def bug_investigation_with_error_tracking():
+def bug_investigation_with_error_tracking(out=None):
     """
     Product Engineer / QA: "What errors are affecting users most?"
 
@@ -91,7 +244,7 @@ def bug_investigation_with_error_tracking():
         properties.error_type as error_type,
         properties.error_message as message,
         count() as occurrences,
-        count(DISTINCT distinct_id) as affected_users,
+        uniq(distinct_id) as affected_users,
         max(timestamp) as last_occurrence
     FROM events
     WHERE
@@ -102,23 +255,26 @@ def bug_investigation_with_error_tracking():
     LIMIT 20
     """
 
-    errors = client.query(hogql)
+    errors = cached_query(client, hogql)
 
-    print("=== Critical Errors (Last 24h) ===")
-    for error in errors:
-        print(f"Type: {error['error_type']}")
-        print(f"Message: {error['message']}")
-        print(f"Occurrences: {error['occurrences']}")
-        print(f"Affected Users: {error['affected_users']}")
-        print(f"Last Seen: {error['last_occurrence']}")
-        print("-" * 50)
+    print("=== Critical Errors (Last 24h) ===", file=out)
+    lines = []
+    for error_type, message, occurrences, affected_users, last_occurrence in errors:
+        lines.append(f"Type: {error_type}")
+        lines.append(f"Message: {message}")
+        lines.append(f"Occurrences: {occurrences}")
+        lines.append(f"Affected Users: {affected_users}")
+        lines.append(f"Last Seen: {last_occurrence}")
+        lines.append("-" * 50)
+    if lines:
+        print("\n".join(lines), file=out)
 
 
 # =================================================================
 # TECHNICAL PRODUCT MANAGER WORKFLOWS
 # =================================================================
 
-def user_journey_funnel_analysis():
+def user_journey_funnel_analysis(out=None):
     """
     Technical PM: "Where are users dropping off in our funnel?"
 
@@ -138,43 +294,36 @@ def user_journey_funnel_analysis():
         'First Action Taken'
     ]
 
-    # Calculate users at each step
-    start_date = (datetime.now() - timedelta(days=30)).strftime('%Y-%m-%d')
-    end_date = datetime.now().strftime('%Y-%m-%d')
+    print("=== Signup Funnel Analysis ===", file=out)
+    print("Date Range: Last 30 days\n", file=out)
 
-    print("=== Signup Funnel Analysis ===")
-    print(f"Date Range: {start_date} to {end_date}\n")
+    # PostHog's funnel engine matches steps in order per user, so each
+    # count only includes users who completed the previous steps. The
+    # range is relative ('-30d' up to now) rather than fixed dates, so the
+    # query is identical on every run and PostHog can serve it from cache
+    funnel = client.query_funnel(funnel_steps, '-30d')
 
     prev_count = None
-    for step in funnel_steps:
-        hogql = f"""
-        SELECT count(DISTINCT distinct_id) as count
-        FROM events
-        WHERE
-            event = '{step}'
-            AND timestamp >= '{start_date}'
-            AND timestamp <= '{end_date}'
-        """
-
-        result = client.query(hogql)
-        count = result[0]['count'] if result else 0
+    for step_result in funnel:
+        step = step_result['name']
+        count = step_result['count']
 
         conversion_rate = None
         if prev_count is not None and prev_count > 0:
             conversion_rate = (count / prev_count) * 100
             dropoff_rate = 100 - conversion_rate
 
-        print(f"Step: {step}")
-        print(f"  Users: {count}")
+        print(f"Step: {step}", file=out)
+        print(f"  Users: {count}", file=out)
         if conversion_rate is not None:
-            print(f"  Conversion: {conversion_rate:.1f}%")
-            print(f"  Drop-off: {dropoff_rate:.1f}%")
-        print()
+            print(f"  Conversion: {conversion_rate:.1f}%", file=out)
+            print(f"  Drop-off: {dropoff_rate:.1f}%", file=out)
+        print(file=out)
 
         prev_count = count
 
 
-def cohort_comparison_analysis():
+def cohort_comparison_analysis(out=None):
     """
     Technical PM: "How do paid users behave differently from free users?"
 
@@ -188,31 +337,47 @@ def cohort_comparison_analysis():
     # Get all cohorts
     cohorts = client.get_cohorts()
 
-    print("=== Available Cohorts ===")
+    print("=== Available Cohorts ===", file=out)
     for cohort in cohorts:
-        print(f"{cohort['name']}: {cohort.get('count', 'N/A')} users")
-    print()
+        print(f"{cohort['name']}: {cohort.get('count', 'N/A')} users", file=out)
+    print(file=out)
 
     # Compare activity levels between cohorts
     # (Assuming cohorts exist for 'Paid Users' and 'Free Users')
+    # Events are aggregated per person first, so plan_type is read from the
+    # person's properties JSON once per person instead of once per event;
+    # groups too small to compare are dropped server-side
     comparison_query = """
     SELECT
-        if(person.properties.plan_type = 'paid', 'Paid', 'Free') as user_type,
-        count(DISTINCT distinct_id) as users,
-        count() as total_events,
-        count() / count(DISTINCT distinct_id) as avg_events_per_user
-    FROM events
-    WHERE timestamp >= now() - INTERVAL 30 DAY
+        if(p.properties.plan_type = 'paid', 'Paid', 'Free') as user_type,
+        sum(e.users) as users,
+        sum(e.total_events) as total_events,
+        total_events / users as avg_events_per_user
+    FROM (
+        SELECT
+            person_id,
+            uniq(distinct_id) as users,
+            count() as total_events
+        FROM events
+        WHERE timestamp >= now() - INTERVAL 30 DAY
+        GROUP BY person_id
+    ) AS e
+    LEFT JOIN persons AS p ON p.id = e.person_id
     GROUP BY user_type
+    HAVING users >= {min_users}
     """
 
-    comparison = client.query(comparison_query)
+    comparison = client.query(
+        comparison_query,
+        {'min_users': _sampled_threshold(100)},
+        sample=EXPLORATORY_SAMPLE
+    )
 
-    print("=== Cohort Activity Comparison (Last 30 Days) ===")
-    print(json.dumps(comparison, indent=2))
+    print(f"=== Cohort Activity Comparison (Last 30 Days){_sample_note()} ===", file=out)
+    print(format_json(comparison), file=out)
 
 
-def ab_test_evaluation():
+def ab_test_evaluation(out=None):
     """
     Technical PM / Experiments: "Did our A/B test variant perform better?"
 
@@ -226,26 +391,26 @@ def ab_test_evaluation():
     # Get all experiments
     experiments = client.get_experiments()
 
-    print("=== Running Experiments ===")
+    print("=== Running Experiments ===", file=out)
     for exp in experiments:
-        print(f"\nExperiment: {exp['name']}")
-        print(f"Feature Flag: {exp.get('feature_flag_key')}")
-        print(f"Start Date: {exp.get('start_date')}")
+        print(f"\nExperiment: {exp['name']}", file=out)
+        print(f"Feature Flag: {exp.get('feature_flag_key')}", file=out)
+        print(f"Start Date: {exp.get('start_date')}", file=out)
 
         results = exp.get('results', {})
         if results:
-            print("Results:")
-            print(json.dumps(results, indent=2))
+            print("Results:", file=out)
+            print(format_json(results), file=out)
         else:
-            print("No results yet")
-        print("-" * 50)
+            print("No results yet", file=out)
+        print("-" * 50, file=out)
 
 
 # =================================================================
 # DATA ANALYST WORKFLOWS
 # =================================================================
 
-def complex_hogql_analysis():
+def complex_hogql_analysis(out=None):
     """
     Data Analyst: "What behavioral patterns correlate with conversion?"
 
@@ -257,30 +422,17 @@ def complex_hogql_analysis():
     """
     client = setup_client()
 
-    # Complex query joining events and person properties
-    hogql = """
-    SELECT
-        person.properties.initial_referrer as referrer,
-        person.properties.plan_type as plan,
-        count(DISTINCT distinct_id) as users,
-        count() as total_events,
-        countIf(event = 'Purchase Completed') as conversions,
-        (conversions / users) * 100 as conversion_rate
-    FROM events
-    WHERE timestamp >= now() - INTERVAL 90 DAY
-    GROUP BY referrer, plan
-    HAVING users >= 10
-    ORDER BY conversion_rate DESC
-    LIMIT 50
-    """
-
-    results = client.query(hogql)
+    results = client.query(
+        CONVERSION_BY_REFERRER_SQL,
+        {'min_users': _sampled_threshold(10)},
+        sample=EXPLORATORY_SAMPLE
+    )
 
-    print("=== Conversion Analysis by Referrer & Plan ===")
-    print(json.dumps(results, indent=2))
+    print(f"=== Conversion Analysis by Referrer & Plan{_sample_note()} ===", file=out)
+    print(format_json(results), file=out)
 
 
-def data_warehouse_export():
+def data_warehouse_export(out=None):
     """
     Data Analyst: "Export PostHog data for data warehouse sync"
 
@@ -292,32 +444,47 @@ def data_warehouse_export():
     """
     client = setup_client()
 
-    # Export all events for last week
-    start_date = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
-    end_date = datetime.now().strftime('%Y-%m-%d')
+    # Export all events for last week. Unlike the dashboards' relative
+    # now() - INTERVAL ranges, an export is paged, so it needs fixed dates:
+    # every page must see the same window or rows shift between pages
+    today = datetime.now()
+    start_date = (today - timedelta(days=7)).strftime('%Y-%m-%d')
+    end_date = today.strftime('%Y-%m-%d')
 
-    print(f"=== Exporting Events ({start_date} to {end_date}) ===")
+    print(f"=== Exporting Events ({start_date} to {end_date}) ===", file=out)
 
-    events = client.export_events(
+    # Paged export: only one batch of events is held in memory at a time
+    events = client.iter_export_events(
         start_date=start_date,
         end_date=end_date,
         event_names=['User Signup', 'Purchase Completed', 'Feature Used']
     )
 
-    print(f"Exported {len(events)} events")
-    print("\nSample (first 3 events):")
-    print(json.dumps(events[:3], indent=2))
-
-    # In production, you would write this to S3, BigQuery, etc.
-    # For example:
-    # upload_to_bigquery(events, table='posthog_events')
+    exported = 0
+    sample = []
+    batch = []
+    for event in events:
+        if len(sample) < 3:
+            sample.append(event)
+        batch.append(event)
+        if len(batch) == 10000:
+            # In production, you would write each batch to S3, BigQuery, etc.
+            # For example:
+            # upload_to_bigquery(batch, table='posthog_events')
+            exported += len(batch)
+            batch = []
+    exported += len(batch)
+
+    print(f"Exported {exported} events", file=out)
+    print("\nSample (first 3 events):", file=out)
+    print(format_json(sample), file=out)
 
 
 # =================================================================
 # GROWTH MARKETER WORKFLOWS
 # =================================================================
 
-def marketing_channel_performance():
+def marketing_channel_performance(out=None):
     """
     Growth Marketer: "Which marketing channels drive the best users?"
 
@@ -329,92 +496,124 @@ def marketing_channel_performance():
     """
     client = setup_client()
 
-    # Analyze signups by marketing channel
-    hogql = """
-    SELECT
-        properties.utm_source as source,
-        properties.utm_campaign as campaign,
-        count(DISTINCT distinct_id) as signups,
-        countIf(distinct_id, event = 'Purchase Completed') as conversions,
-        (conversions / signups) * 100 as conversion_rate
-    FROM events
-    WHERE
-        event = 'User Signup'
-        AND timestamp >= now() - INTERVAL 30 DAY
-        AND properties.utm_source IS NOT NULL
-    GROUP BY source, campaign
-    ORDER BY signups DESC
-    LIMIT 20
-    """
-
-    channel_performance = client.query(hogql)
+    channel_performance = client.query(
+        CHANNEL_PERFORMANCE_SQL,
+        {'min_signups': _sampled_threshold(50)},
+        sample=EXPLORATORY_SAMPLE
+    )
 
-    print("=== Marketing Channel Performance (Last 30 Days) ===")
-    for channel in channel_performance:
-        print(f"\nSource: {channel['source']}")
-        print(f"Campaign: {channel['campaign']}")
-        print(f"Signups: {channel['signups']}")
-        print(f"Conversions: {channel['conversions']}")
-        print(f"Conversion Rate: {channel['conversion_rate']:.2f}%")
+    # Format every row first and write the report in one go
+    print(f"=== Marketing Channel Performance (Last 30 Days){_sample_note()} ===", file=out)
+    print("".join(
+        f"\nSource: {source}\n"
+        f"Campaign: {campaign}\n"
+        f"Signups: {signups}\n"
+        f"Conversions: {conversions}\n"
+        f"Conversion Rate: {conversion_rate:.2f}%\n"
+        for source, campaign, signups, conversions, conversion_rate
+        in channel_performance
+    ), end='', file=out)
 
 
 # =================================================================
 # CUSTOMER SUCCESS WORKFLOWS
 # =================================================================
 
-def individual_user_journey():
+def individual_user_journey(emails=("user@example.com",), out=None):
     """
-    Customer Success: "What has this user been doing? Why did they churn?"
+    Customer Success: "What have these users been doing? Why did they churn?"
 
     Workflow:
-    1. Look up user by email/ID
+    1. Look up users by email
     2. Get full event history
     3. Review session replays
     4. Identify pain points
-    """
-    client = setup_client()
 
-    # Look up specific user
-    user_email = "user@example.com"
+    CS usually triages a batch of churned users at once, so every user is
+    looked up in the same round trip. Users are selected from persons with
+    their recent events LEFT JOINed on, so a churned user with no recent
+    activity still gets their person details. Person properties come from a
+    second, concurrent query so the blob is fetched once per person rather
+    than on every event row.
 
-    # Get person details
-    persons = client.get_persons(search=user_email)
-
-    if not persons:
-        print(f"User not found: {user_email}")
-        return
-
-    person = persons[0]
-    distinct_id = person['distinct_ids'][0]
-
-    print(f"=== User Journey for {user_email} ===")
-    print(f"Person ID: {person['id']}")
-    print(f"Distinct ID: {distinct_id}")
-    print(f"\nPerson Properties:")
-    print(json.dumps(person['properties'], indent=2))
+    Args:
+        emails: Emails of the users to look up
+        out: Stream to print to (default: stdout)
+    """
+    client = setup_client()
+    emails = list(emails)
 
-    # Get recent events for this user
-    hogql = f"""
+    # Only event and timestamp are shown, so the events' own (large)
+    # properties blob is left out of the SELECT. Emails are bound, not
+    # formatted in, so values containing quotes can't break out of the query.
+    journey_query = """
     SELECT
-        event,
-        timestamp,
-        properties
-    FROM events
-    WHERE
-        distinct_id = '{distinct_id}'
-        AND timestamp >= now() - INTERVAL 30 DAY
-    ORDER BY timestamp DESC
-    LIMIT 50
+        p.properties.email as email,
+        p.id as person_id,
+        e.distinct_id as distinct_id,
+        e.event as event,
+        e.timestamp as timestamp
+    FROM persons AS p
+    LEFT JOIN (
+        SELECT person_id, distinct_id, event, timestamp
+        FROM events
+        WHERE
+            has({emails}, person.properties.email)
+            AND timestamp >= now() - INTERVAL 30 DAY
+    ) AS e ON e.person_id = p.id
+    WHERE has({emails}, p.properties.email)
+    ORDER BY person_id, timestamp DESC
+    LIMIT 10 BY person_id
     """
-
-    user_events = client.query(hogql)
-
-    print(f"\n=== Recent Events (Last 30 Days) ===")
-    for event in user_events[:10]:  # Show first 10
-        print(f"{event['timestamp']}: {event['event']}")
-
-
-def power_user_identification():
+    properties_query = """
+    SELECT id, properties
+    FROM persons
+    WHERE has({emails}, properties.email)
+    """
+    rows, person_properties = client.query_many(
+        [journey_query, properties_query], {'emails': emails}
+    )
+    person_properties = dict(person_properties)
+
+    # Rows arrive newest first per person; a person with no recent events
+    # has a single row with an empty event
+    journeys = {}
+    for email, person_id, distinct_id, event, timestamp in rows:
+        journey = journeys.setdefault(person_id, {
+            'email': email,
+            'distinct_id': distinct_id,
+            'events': [],
+        })
+        if event:
+            journey['distinct_id'] = journey['distinct_id'] or distinct_id
+            journey['events'].append((timestamp, event))
+
+    found = {journey['email'] for journey in journeys.values()}
+    for email in emails:
+        if email not in found:
+            print(f"No person found: {email}", file=out)
+
+    for person_id, journey in journeys.items():
+        properties = person_properties.get(person_id, {})
+        if isinstance(properties, str):
+            properties = json.loads(properties)
+
+        print(f"=== User Journey for {journey['email']} ===", file=out)
+        print(f"Person ID: {person_id}", file=out)
+        if journey['distinct_id']:
+            print(f"Distinct ID: {journey['distinct_id']}", file=out)
+        print(f"\nPerson Properties:", file=out)
+        print(format_json(properties), file=out)
+
+        print(f"\n=== Recent Events (Last 30 Days) ===", file=out)
+        if not journey['events']:
+            print("No activity in the last 30 days", file=out)
+        for timestamp, event in journey['events']:
+            print(f"{timestamp}: {event}", file=out)
+        print(file=out)
+
+
+def power_user_identification(out=None):
     """
     Product / Customer Success: "Who are our power users?"
 
@@ -426,66 +625,82 @@ def power_user_identification():
     """
     client = setup_client()
 
-    # Find users who use key features frequently
-    hogql = """
-    SELECT
-        distinct_id,
-        person.properties.email as email,
-        person.properties.plan_type as plan,
-        count() as event_count,
-        countIf(event = 'Key Feature Used') as key_feature_uses,
-        max(timestamp) as last_active
-    FROM events
-    WHERE
-        timestamp >= now() - INTERVAL 30 DAY
-    GROUP BY distinct_id, email, plan
-    HAVING event_count >= 100 AND key_feature_uses >= 20
-    ORDER BY event_count DESC
-    LIMIT 50
-    """
-
-    power_users = client.query(hogql)
-
-    print("=== Power Users (Last 30 Days) ===")
-    print(f"Criteria: 100+ total events, 20+ key feature uses\n")
+    power_users = client.query(
+        POWER_USERS_SQL, {'min_events': 100, 'min_key_feature_uses': 20}
+    )
 
-    for user in power_users[:10]:
-        print(f"Email: {user['email']}")
-        print(f"Plan: {user['plan']}")
-        print(f"Total Events: {user['event_count']}")
-        print(f"Key Feature Uses: {user['key_feature_uses']}")
-        print(f"Last Active: {user['last_active']}")
-        print("-" * 50)
+    print("=== Power Users (Last 30 Days) ===", file=out)
+    print(f"Criteria: 100+ total events, 20+ key feature uses\n", file=out)
 
+    print("".join(
+        f"Email: {email}\n"
+        f"Plan: {plan}\n"
+        f"Total Events: {event_count}\n"
+        f"Key Feature Uses: {key_feature_uses}\n"
+        f"Last Active: {last_active}\n"
+        f"{'-' * 50}\n"
+        for _distinct_id, email, plan, event_count, key_feature_uses, last_active
+        in power_users[:10]
+    ), end='', file=out)
 
-# =================================================================
-# MAIN - Run Example Workflows
-# =================================================================
-
-if __name__ == '__main__':
-    print("PostHog Driver - Persona-Based Workflow Examples\n")
-    print("=" * 70)
-
-    # Uncomment the workflow you want to run:
 
+# Workflows runnable from the command line, by short name
+WORKFLOWS = {
     # Product Engineer
-    # feature_impact_analysis()
-    # bug_investigation_with_error_tracking()
+    'feature_impact': feature_impact_analysis,
+    'bugs': bug_investigation_with_error_tracking,
 
     # Technical PM
-    # user_journey_funnel_analysis()
-    # cohort_comparison_analysis()
-    # ab_test_evaluation()
+    'funnel': user_journey_funnel_analysis,
+    'cohort': cohort_comparison_analysis,
+    'ab_test': ab_test_evaluation,
 
     # Data Analyst
-    # complex_hogql_analysis()
-    # data_warehouse_export()
+    'analysis': complex_hogql_analysis,
+    'export': data_warehouse_export,
 
     # Growth Marketer
-    # marketing_channel_performance()
+    'marketing': marketing_channel_performance,
 
     # Customer Success
-    # individual_user_journey()
-    # power_user_identification()
+    'user_journey': individual_user_journey,
+    'power_users': power_user_identification,
+}
+
+
+# =================================================================
+# MAIN - Run Example Workflows
+# =================================================================
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(
+        description="Run persona workflows (several run concurrently)"
+    )
+    parser.add_argument(
+        'workflows', nargs='*', metavar='workflow',
+        help=f"one or more of: {', '.join(WORKFLOWS)}"
+    )
+    parser.add_argument(
+        '--fast', action='store_true',
+        help="approximate the exploratory workflows from a 10%% sample"
+    )
+    args = parser.parse_args()
+    unknown = [name for name in args.workflows if name not in WORKFLOWS]
+    if unknown:
+        parser.error(f"unknown workflow(s): {', '.join(unknown)}")
+
+    print("PostHog Driver - Persona-Based Workflow Examples\n")
+    print("=" * 70)
 
-    print("\nTo run a workflow, uncomment the desired function in __main__")
+    if args.fast:
+        EXPLORATORY_SAMPLE = 0.1
+
+    if args.workflows:
+        # One process: the client, its connection pool and the metadata
+        # cache are shared by every selected workflow. They only wait on
+        # PostHog queries, so together they take about as long as the
+        # slowest one
+        run_concurrently([WORKFLOWS[name] for name in args.workflows], end='\n')
+    else:
+        print(f"\nTo run workflows, name them: {', '.join(WORKFLOWS)}")
+        print("Example: python persona_workflows.py funnel cohort ab_test")
@@ -7,10 +7,20 @@ Answers real business questions using actual PostHog data
 import sys
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
 from posthog_driver import PostHogClient
 from datetime import datetime, timedelta
 
 
+# Event-name substrings marking conversion-related events, and the narrower
+# set counted as an actual conversion. Matched case-insensitively in one
+# multiSearchAnyCaseInsensitive() pass instead of an ILIKE '%...%' per term.
+CONVERSION_KEYWORDS = [
+    'purchase', 'checkout', 'complete', 'success', 'paid', 'conversion', 'subscribe'
+]
+CONVERTED_KEYWORDS = ['purchase', 'complete', 'subscribe']
+
+
 def print_header(text):
     """Print formatted header."""
     print("\n" + "=" * 80)
@@ -24,6 +34,68 @@ def print_subheader(text):
     print("-" * 80)
 
 
+def to_columns(rows, columns):
+    """
+    Turn query result rows into one list per column.
+
+    Args:
+        rows: Query result rows, each a list of values in SELECT order
+        columns: Column names, in SELECT order
+
+    Returns:
+        Dict mapping each column name to its list of values
+    """
+    return {col: [row[i] for row in rows] for i, col in enumerate(columns)}
+
+
+def scale_counts(counts, sample):
+    """Scale counts measured on a sample back up to estimated totals."""
+    if not sample:
+        return counts
+    return [round(count / sample) for count in counts]
+
+
+def funnel_step_users(client, steps, window_seconds=1800):
+    """
+    Count users reaching each step of an ordered funnel.
+
+    Uses ClickHouse's windowFunnel, which walks each user's events in
+    timestamp order in a single scan, so step N only counts users who did
+    steps 1..N-1 first within the window.
+
+    Args:
+        client: PostHogClient instance
+        steps: Event names, in funnel order
+        window_seconds: Time allowed from the first step to the last
+
+    Returns:
+        List of user counts, one per step
+    """
+    conditions = ", ".join(f"event = {{step_{i}}}" for i in range(len(steps)))
+    query = f"""
+    SELECT level, count() as users
+    FROM (
+        SELECT windowFunnel({int(window_seconds)})(timestamp, {conditions}) as level
+        FROM events
+        WHERE has({{steps}}, event)
+            AND timestamp >= now() - INTERVAL 30 DAY
+        GROUP BY distinct_id
+    )
+    GROUP BY level
+    """
+    values = {f"step_{i}": step for i, step in enumerate(steps)}
+    values['steps'] = list(steps)
+
+    # Users stopping at each level; a step is reached by everyone at or past it
+    stopped = dict(client.query(query, values))
+    reached = []
+    remaining = sum(stopped.values())
+    for level in range(1, len(steps) + 1):
+        remaining -= stopped.get(level - 1, 0)
+        reached.append(remaining)
+    return reached
+
+
 def analyze_dropoff(client):
     """
     Question: "Where do users drop off?"
@@ -38,41 +110,65 @@ def analyze_dropoff(client):
 
     print("\n🔍 Step 1: Discovering available events...")
 
-    # Query to find most common events (these form the user journey)
+    # One round trip for the whole analysis: the most common events (these
+    # form the user journey), plus the signup and activation totals used in
+    # step 4, split apart on the kind column
     query = """
-    SELECT
-        event,
-        count() as occurrences,
-        count(DISTINCT distinct_id) as unique_users
+    SELECT 'top' as kind, event, occurrences, unique_users
+    FROM (
+        SELECT
+            event,
+            count() as occurrences,
+            uniq(distinct_id) as unique_users
+        FROM events
+        WHERE timestamp >= now() - INTERVAL 30 DAY
+        GROUP BY event
+        ORDER BY occurrences DESC
+        LIMIT 20
+    )
+    UNION ALL
+    SELECT 'signup' as kind, '' as event, 0 as occurrences,
+        uniq(distinct_id) as unique_users
     FROM events
-    WHERE timestamp >= now() - INTERVAL 30 DAY
-    GROUP BY event
-    ORDER BY occurrences DESC
-    LIMIT 20
+    WHERE (event ILIKE '%signup%' OR event ILIKE '%register%')
+        AND timestamp >= now() - INTERVAL 30 DAY
+    UNION ALL
+    SELECT 'active' as kind, '' as event, 0 as occurrences,
+        count() as unique_users
+    FROM (
+        SELECT distinct_id
+        FROM events
+        WHERE timestamp >= now() - INTERVAL 30 DAY
+        GROUP BY distinct_id
+        HAVING count() >= 5
+    )
     """
 
     try:
-        results = client.query(query)
+        rows = client.query(query)
+
+        # [event, occurrences, unique_users], most frequent first
+        results = sorted(
+            (row[1:] for row in rows if row[0] == 'top'),
+            key=lambda row: row[1],
+            reverse=True
+        )
+        # 'signup' / 'active' -> user count
+        totals = {row[0]: row[3] for row in rows if row[0] != 'top'}
 
         if not results:
             print("\n⚠️  No events found in the last 30 days")
             return
 
+        top = to_columns(results, ('event', 'occurrences', 'unique_users'))
+        names = [str(name) for name in top['event']]
+
         print(f"\n✓ Found {len(results)} most common events (last 30 days):")
         print("\n{:<40} {:>15} {:>15}".format("Event", "Total Events", "Unique Users"))
         print("-" * 80)
 
-        for i, event in enumerate(results[:10], 1):
-            # Handle both dict and list results
-            if isinstance(event, dict):
-                event_name = event.get('event', 'Unknown')
-                occurrences = event.get('occurrences', 0)
-                users = event.get('unique_users', 0)
-            else:
-                # If it's a list, try to parse it
-                event_name = str(event[0]) if len(event) > 0 else 'Unknown'
-                occurrences = int(event[1]) if len(event) > 1 else 0
-                users = int(event[2]) if len(event) > 2 else 0
+        top_10 = zip(names[:10], top['occurrences'], top['unique_users'])
+        for i, (event_name, occurrences, users) in enumerate(top_10, 1):
             print(f"{i:2}. {event_name:<37} {occurrences:>12,} {users:>15,}")
 
         # Identify potential funnel steps based on event names
@@ -89,102 +185,58 @@ def analyze_dropoff(client):
             'purchase', 'checkout', 'payment', 'buy'
         ]
 
-        journey_events = []
-        for event_data in results:
-            if isinstance(event_data, dict):
-                event_name = event_data.get('event', '').lower()
-            else:
-                event_name = str(event_data[0]).lower() if len(event_data) > 0 else ''
-
-            for keyword in journey_keywords:
-                if keyword in event_name:
-                    journey_events.append(event_data)
-                    break
+        journey_events = [
+            name for name in names
+            if any(keyword in name.lower() for keyword in journey_keywords)
+        ]
 
         if journey_events:
             print(f"\n✓ Identified {len(journey_events)} potential journey events:")
-            for event in journey_events[:5]:
-                if isinstance(event, dict):
-                    print(f"   • {event.get('event')}")
-                else:
-                    print(f"   • {event[0] if len(event) > 0 else 'Unknown'}")
+            for name in journey_events[:5]:
+                print(f"   • {name}")
 
         # Calculate drop-off rates between sequential events
         print("\n🔍 Step 3: Calculating drop-off rates...")
 
-        if len(results) >= 2:
-            print("\nSequential event conversion:")
+        # Funnel over the journey events (or the top events if too few
+        # matched), in frequency order. windowFunnel follows each user's own
+        # event order, so a step only counts users who did the earlier ones.
+        steps = (journey_events if len(journey_events) >= 2 else names)[:4]
+        transitions = []
+
+        if len(steps) >= 2:
+            reached = funnel_step_users(client, steps)
+
+            print("\nSequential event conversion (ordered per user, 30 min window):")
             print("\n{:<35} → {:<35} {:>10}".format("From Event", "To Event", "Retention"))
             print("-" * 80)
 
-            # Compare first few events to see drop-off
-            for i in range(min(3, len(results) - 1)):
-                from_event = results[i]
-                to_event = results[i + 1]
-
-                # Handle both dict and list
-                if isinstance(from_event, dict):
-                    from_users = from_event.get('unique_users', 1)
-                    from_name = from_event.get('event', '')[:33]
-                else:
-                    from_users = int(from_event[2]) if len(from_event) > 2 else 1
-                    from_name = str(from_event[0])[:33] if len(from_event) > 0 else ''
-
-                if isinstance(to_event, dict):
-                    to_users = to_event.get('unique_users', 0)
-                    to_name = to_event.get('event', '')[:33]
-                else:
-                    to_users = int(to_event[2]) if len(to_event) > 2 else 0
-                    to_name = str(to_event[0])[:33] if len(to_event) > 0 else ''
-
-                retention = (to_users / from_users * 100) if from_users > 0 else 0
+            for i in range(len(steps) - 1):
+                retention = (reached[i + 1] / reached[i] * 100) if reached[i] > 0 else 0
                 drop_off = 100 - retention
+                transitions.append((steps[i], steps[i + 1], drop_off))
 
-                print(f"{from_name:<35} → {to_name:<35} {retention:>9.1f}%")
+                print(f"{steps[i][:33]:<35} → {steps[i + 1][:33]:<35} {retention:>9.1f}%")
                 if drop_off > 50:
                     print(f"   ⚠️  HIGH DROP-OFF: {drop_off:.1f}% of users don't continue")
 
         # Look for specific funnel patterns
         print("\n🔍 Step 4: Checking for funnel patterns...")
 
-        # Try to find signup → activation pattern
-        signup_query = """
-        SELECT
-            count(DISTINCT distinct_id) as signup_users
-        FROM events
-        WHERE event ILIKE '%signup%' OR event ILIKE '%register%'
-            AND timestamp >= now() - INTERVAL 30 DAY
-        """
+        # Signup → activation pattern (both counted in the query above)
+        signups = totals.get('signup', 0)
+        activated = totals.get('active', 0)
 
-        activation_query = """
-        SELECT
-            count(DISTINCT distinct_id) as active_users
-        FROM events
-        WHERE timestamp >= now() - INTERVAL 30 DAY
-        GROUP BY distinct_id
-        HAVING count() >= 5
-        """
+        if activated > 0 and signups > 0:
+            activation_rate = (activated / signups * 100)
+            print(f"\n📊 Signup to Activation:")
+            print(f"   Signups: {signups:,} users")
+            print(f"   Activated (5+ events): {activated:,} users")
+            print(f"   Activation rate: {activation_rate:.1f}%")
 
-        try:
-            signup_result = client.query(signup_query)
-            activation_result = client.query(activation_query)
-
-            if signup_result and len(activation_result) > 0:
-                signups = signup_result[0].get('signup_users', 0) if signup_result else 0
-                activated = len(activation_result)
-
-                if signups > 0:
-                    activation_rate = (activated / signups * 100)
-                    print(f"\n📊 Signup to Activation:")
-                    print(f"   Signups: {signups:,} users")
-                    print(f"   Activated (5+ events): {activated:,} users")
-                    print(f"   Activation rate: {activation_rate:.1f}%")
-
-                    if activation_rate < 50:
-                        print(f"\n   ⚠️  Only {activation_rate:.1f}% of signups become active")
-                        print(f"   💡 Recommendation: Improve onboarding flow")
-        except Exception as e:
-            print(f"\n   (Could not calculate activation: {e})")
+            if activation_rate < 50:
+                print(f"\n   ⚠️  Only {activation_rate:.1f}% of signups become active")
+                print(f"   💡 Recommendation: Improve onboarding flow")
 
         # Summary
         print("\n" + "=" * 80)
@@ -192,42 +244,15 @@ def analyze_dropoff(client):
         print("=" * 80)
 
         if len(results) >= 2:
-            biggest_drop = None
-            biggest_drop_pct = 0
-
-            for i in range(min(5, len(results) - 1)):
-                if isinstance(results[i], dict):
-                    from_users = results[i].get('unique_users', 1)
-                    from_event_name = results[i].get('event')
-                else:
-                    from_users = int(results[i][2]) if len(results[i]) > 2 else 1
-                    from_event_name = str(results[i][0]) if len(results[i]) > 0 else ''
-
-                if isinstance(results[i+1], dict):
-                    to_users = results[i + 1].get('unique_users', 0)
-                    to_event_name = results[i + 1].get('event')
-                else:
-                    to_users = int(results[i+1][2]) if len(results[i+1]) > 2 else 0
-                    to_event_name = str(results[i+1][0]) if len(results[i+1]) > 0 else ''
-
-                drop_pct = ((from_users - to_users) / from_users * 100) if from_users > 0 else 0
-
-                if drop_pct > biggest_drop_pct:
-                    biggest_drop_pct = drop_pct
-                    biggest_drop = (from_event_name, to_event_name)
-
-            if biggest_drop:
-                print(f"\n1. Biggest drop-off: {biggest_drop_pct:.1f}%")
-                print(f"   Between '{biggest_drop[0]}' → '{biggest_drop[1]}'")
+            if transitions:
+                from_name, to_name, drop_pct = max(transitions, key=lambda t: t[2])
+                if drop_pct > 0:
+                    print(f"\n1. Biggest drop-off: {drop_pct:.1f}%")
+                    print(f"   Between '{from_name}' → '{to_name}'")
 
             print(f"\n2. Top events by user count:")
-            for i, event in enumerate(results[:3], 1):
-                if isinstance(event, dict):
-                    print(f"   {i}. {event.get('event')}: {event.get('unique_users', 0):,} users")
-                else:
-                    event_name = str(event[0]) if len(event) > 0 else 'Unknown'
-                    users = int(event[2]) if len(event) > 2 else 0
-                    print(f"   {i}. {event_name}: {users:,} users")
+            for i, (event_name, users) in enumerate(zip(names[:3], top['unique_users']), 1):
+                print(f"   {i}. {event_name}: {users:,} users")
 
             if journey_events:
                 print(f"\n3. Identified {len(journey_events)} journey-related events")
@@ -238,78 +263,155 @@ def analyze_dropoff(client):
         print(f"   Make sure your API key has query permissions")
 
 
-def analyze_conversion_drivers(client):
+def fetch_conversion_drivers(client, sample=None):
     """
-    Question: "What drives conversion?"
+    Run the four conversion-driver queries for analyze_conversion_drivers().
 
-    Strategy:
-    1. Define what "conversion" means (purchases, completions, etc.)
-    2. Look at user properties and behaviors that correlate
-    3. Analyze by traffic source, user attributes, timing
-    """
-    print_header("QUESTION 2: What drives conversion?")
+    The queries are independent, so they run concurrently: the wait is the
+    slowest query instead of the sum of all four. main() starts this in the
+    background while analyze_dropoff() runs.
 
-    print("\n🔍 Step 1: Identifying conversion events...")
+    Args:
+        client: PostHogClient instance
+        sample: Fraction of users to scan (see analyze_conversion_drivers())
 
+    Returns:
+        List of [conversion_events, sources, behavior, timing] rows, with a
+        failed query's exception in its slot so each step reports its own
+        failure
+    """
     # Look for conversion-related events
     conversion_query = """
     SELECT
         event,
         count() as occurrences,
-        count(DISTINCT distinct_id) as converters
+        uniq(distinct_id) as converters
     FROM events
-    WHERE (
-        event ILIKE '%purchase%' OR
-        event ILIKE '%checkout%' OR
-        event ILIKE '%complete%' OR
-        event ILIKE '%success%' OR
-        event ILIKE '%paid%' OR
-        event ILIKE '%conversion%' OR
-        event ILIKE '%subscribe%'
-    )
+    WHERE multiSearchAnyCaseInsensitive(event, {conversion_keywords})
     AND timestamp >= now() - INTERVAL 30 DAY
     GROUP BY event
     ORDER BY occurrences DESC
     LIMIT 10
     """
 
+    # Analyze conversion by traffic source
+    source_query = """
+    SELECT
+        properties.$initial_utm_source as source,
+        uniq(distinct_id) as users,
+        countIf(multiSearchAnyCaseInsensitive(event, {converted_keywords})) as conversions
+    FROM events
+    WHERE timestamp >= now() - INTERVAL 30 DAY
+        AND properties.$initial_utm_source IS NOT NULL
+    GROUP BY source
+    ORDER BY users DESC
+    LIMIT 10
+    """
+
+    # Analyze by user behavior patterns: average activity of converters vs.
+    # everyone else, computed server-side so only the two means come back
+    behavior_query = """
+    SELECT
+        avgIf(total_events, has_conversion > 0) as avg_converters,
+        avgIf(total_events, has_conversion = 0) as avg_non_converters,
+        countIf(has_conversion > 0) as converters,
+        countIf(has_conversion = 0) as non_converters
+    FROM (
+        SELECT
+            count() as total_events,
+            countIf(multiSearchAnyCaseInsensitive(event, {converted_keywords})) as has_conversion
+        FROM events
+        WHERE timestamp >= now() - INTERVAL 30 DAY
+        GROUP BY distinct_id
+    )
+    """
+
+    # Look at time-based patterns
+    timing_query = """
+    SELECT
+        toDayOfWeek(timestamp) as day_of_week,
+        toHour(timestamp) as hour_of_day,
+        count() as events,
+        countIf(multiSearchAnyCaseInsensitive(event, {converted_keywords})) as conversions
+    FROM events
+    WHERE timestamp >= now() - INTERVAL 30 DAY
+    GROUP BY day_of_week, hour_of_day
+    HAVING conversions > 0
+    ORDER BY conversions DESC
+    LIMIT 5
+    """
+
+    return client.query_many(
+        [conversion_query, source_query, behavior_query, timing_query],
+        values={
+            'conversion_keywords': CONVERSION_KEYWORDS,
+            'converted_keywords': CONVERTED_KEYWORDS,
+        },
+        return_exceptions=True,
+        sample=sample
+    )
+
+
+def analyze_conversion_drivers(client, sample=None, results=None):
+    """
+    Question: "What drives conversion?"
+
+    Strategy:
+    1. Define what "conversion" means (purchases, completions, etc.)
+    2. Look at user properties and behaviors that correlate
+    3. Analyze by traffic source, user attributes, timing
+
+    Args:
+        client: PostHogClient instance
+        sample: Fraction of users to scan (e.g. 0.1 with --fast); counts
+            are scaled back up by it, so they are estimates
+        results: Rows already returned by fetch_conversion_drivers() for
+            the same sample; fetched here when omitted
+    """
+    print_header("QUESTION 2: What drives conversion?")
+    if sample:
+        print(f"\n(Fast mode: estimated from a {sample:.0%} sample of users)")
+
+    print("\n🔍 Step 1: Identifying conversion events...")
+
     try:
-        conversion_events = client.query(conversion_query)
+        if results is None:
+            results = fetch_conversion_drivers(client, sample)
+        conversion_events, source_results, behavior_results, timing_results = (
+            results
+        )
+        if isinstance(conversion_events, Exception):
+            raise conversion_events
+        conversions_by_event = to_columns(
+            conversion_events, ('event', 'occurrences', 'converters')
+        )
+        conversions_by_event['converters'] = scale_counts(
+            conversions_by_event['converters'], sample
+        )
 
         if not conversion_events:
             print("\n⚠️  No obvious conversion events found")
             print("   Looking for events with: purchase, checkout, complete, subscribe, etc.")
         else:
             print(f"\n✓ Found {len(conversion_events)} conversion-related events:")
-            for i, event in enumerate(conversion_events, 1):
-                if isinstance(event, dict):
-                    event_name = event.get('event', 'Unknown')
-                    converters = event.get('converters', 0)
-                else:
-                    event_name = str(event[0]) if len(event) > 0 else 'Unknown'
-                    converters = int(event[2]) if len(event) > 2 else 0
+            conversion_rows = zip(
+                conversions_by_event['event'], conversions_by_event['converters']
+            )
+            for i, (event_name, converters) in enumerate(conversion_rows, 1):
                 print(f"   {i}. {event_name}: {converters:,} users converted")
 
         # Analyze conversion by traffic source
         print("\n🔍 Step 2: Analyzing conversion by traffic source...")
 
-        source_query = """
-        SELECT
-            properties.$initial_utm_source as source,
-            count(DISTINCT distinct_id) as users,
-            countIf(event ILIKE '%purchase%' OR event ILIKE '%complete%' OR event ILIKE '%subscribe%') as conversions
-        FROM events
-        WHERE timestamp >= now() - INTERVAL 30 DAY
-            AND properties.$initial_utm_source IS NOT NULL
-        GROUP BY source
-        ORDER BY users DESC
-        LIMIT 10
-        """
-
+        sources = to_columns([], ('source', 'users', 'conversions'))
         try:
-            source_results = client.query(source_query)
+            if isinstance(source_results, Exception):
+                raise source_results
+            sources = to_columns(source_results, ('source', 'users', 'conversions'))
+            for column in ('users', 'conversions'):
+                sources[column] = scale_counts(sources[column], sample)
 
-            if source_results and len(source_results) > 0:
+            if source_results:
                 print("\n✓ Conversion by traffic source:")
                 print("\n{:<25} {:>12} {:>12} {:>15}".format("Source", "Total Users", "Conversions", "Conv. Rate"))
                 print("-" * 80)
@@ -317,16 +419,10 @@ def analyze_conversion_drivers(client):
                 best_source = None
                 best_rate = 0
 
-                for source_data in source_results:
-                    if isinstance(source_data, dict):
-                        source = source_data.get('source', 'Unknown')[:23]
-                        users = source_data.get('users', 0)
-                        conversions = source_data.get('conversions', 0)
-                    else:
-                        source = str(source_data[0])[:23] if len(source_data) > 0 else 'Unknown'
-                        users = int(source_data[1]) if len(source_data) > 1 else 0
-                        conversions = int(source_data[2]) if len(source_data) > 2 else 0
-
+                for source, users, conversions in zip(
+                    sources['source'], sources['users'], sources['conversions']
+                ):
+                    source = str(source)[:23]
                     rate = (conversions / users * 100) if users > 0 else 0
 
                     print(f"{source:<25} {users:>12,} {conversions:>12,} {rate:>14.1f}%")
@@ -345,43 +441,19 @@ def analyze_conversion_drivers(client):
         # Analyze by user behavior patterns
         print("\n🔍 Step 3: Analyzing user behavior patterns...")
 
-        behavior_query = """
-        SELECT
-            count() as total_events,
-            countIf(event ILIKE '%purchase%' OR event ILIKE '%complete%' OR event ILIKE '%subscribe%') as has_conversion
-        FROM events
-        WHERE timestamp >= now() - INTERVAL 30 DAY
-        GROUP BY distinct_id
-        ORDER BY total_events DESC
-        LIMIT 100
-        """
-
         try:
-            behavior_results = client.query(behavior_query)
+            if isinstance(behavior_results, Exception):
+                raise behavior_results
 
             if behavior_results:
-                converters = []
-                non_converters = []
-
-                for b in behavior_results:
-                    if isinstance(b, dict):
-                        has_conv = b.get('has_conversion', 0)
-                    else:
-                        has_conv = int(b[1]) if len(b) > 1 else 0
-
-                    if has_conv > 0:
-                        converters.append(b)
-                    else:
-                        non_converters.append(b)
+                behavior = to_columns(behavior_results, (
+                    'avg_converters', 'avg_non_converters',
+                    'converters', 'non_converters'
+                ))
 
-                if converters and non_converters:
-                    def get_total_events(item):
-                        if isinstance(item, dict):
-                            return item.get('total_events', 0)
-                        return int(item[0]) if len(item) > 0 else 0
-
-                    avg_events_converters = sum(get_total_events(b) for b in converters) / len(converters)
-                    avg_events_non = sum(get_total_events(b) for b in non_converters) / len(non_converters)
+                if behavior['converters'][0] and behavior['non_converters'][0]:
+                    avg_events_converters = behavior['avg_converters'][0]
+                    avg_events_non = behavior['avg_non_converters'][0]
 
                     print(f"\n✓ Activity patterns:")
                     print(f"   Converters average: {avg_events_converters:.1f} events")
@@ -396,38 +468,23 @@ def analyze_conversion_drivers(client):
         # Look at time-based patterns
         print("\n🔍 Step 4: Checking timing patterns...")
 
-        timing_query = """
-        SELECT
-            toDayOfWeek(timestamp) as day_of_week,
-            toHour(timestamp) as hour_of_day,
-            count() as events,
-            countIf(event ILIKE '%purchase%' OR event ILIKE '%complete%' OR event ILIKE '%subscribe%') as conversions
-        FROM events
-        WHERE timestamp >= now() - INTERVAL 30 DAY
-        GROUP BY day_of_week, hour_of_day
-        HAVING conversions > 0
-        ORDER BY conversions DESC
-        LIMIT 5
-        """
-
         try:
-            timing_results = client.query(timing_query)
+            if isinstance(timing_results, Exception):
+                raise timing_results
 
             if timing_results:
                 print(f"\n✓ Peak conversion times:")
 
                 days = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
 
-                for time_data in timing_results[:3]:
-                    if isinstance(time_data, dict):
-                        day = time_data.get('day_of_week', 0)
-                        hour = time_data.get('hour_of_day', 0)
-                        conversions = time_data.get('conversions', 0)
-                    else:
-                        day = int(time_data[0]) if len(time_data) > 0 else 0
-                        hour = int(time_data[1]) if len(time_data) > 1 else 0
-                        conversions = int(time_data[3]) if len(time_data) > 3 else 0
-
+                timing = to_columns(
+                    timing_results[:3],
+                    ('day_of_week', 'hour_of_day', 'events', 'conversions')
+                )
+                timing['conversions'] = scale_counts(timing['conversions'], sample)
+                for day, hour, conversions in zip(
+                    timing['day_of_week'], timing['hour_of_day'], timing['conversions']
+                ):
                     day_name = days[day - 1] if 1 <= day <= 7 else 'Unknown'
                     print(f"   • {day_name} at {hour:02d}:00 - {conversions:,} conversions")
         except Exception as e:
@@ -441,38 +498,18 @@ def analyze_conversion_drivers(client):
         findings = []
 
         if conversion_events:
-            def get_converters(e):
-                if isinstance(e, dict):
-                    return e.get('converters', 0)
-                return int(e[2]) if len(e) > 2 else 0
-
-            total_converters = sum(get_converters(e) for e in conversion_events)
+            total_converters = sum(conversions_by_event['converters'])
             findings.append(f"Found {len(conversion_events)} conversion events with {total_converters:,} total converters")
 
-        if source_results and len(source_results) > 0:
-            def get_rate(x):
-                if isinstance(x, dict):
-                    users = x.get('users', 1)
-                    convs = x.get('conversions', 0)
-                else:
-                    users = int(x[1]) if len(x) > 1 else 1
-                    convs = int(x[2]) if len(x) > 2 else 0
-                return (convs / users) if users > 10 else 0
-
-            best = max(source_results, key=get_rate)
-            if best:
-                if isinstance(best, dict):
-                    best_users = best.get('users', 0)
-                    best_convs = best.get('conversions', 0)
-                    best_source = best.get('source')
-                else:
-                    best_users = int(best[1]) if len(best) > 1 else 0
-                    best_convs = int(best[2]) if len(best) > 2 else 0
-                    best_source = str(best[0]) if len(best) > 0 else 'Unknown'
-
-                if best_users > 10:
-                    rate = (best_convs / best_users * 100)
-                    findings.append(f"Best traffic source: {best_source} ({rate:.1f}% conversion)")
+        if sources['source']:
+            best_source, best_users, best_convs = max(
+                zip(sources['source'], sources['users'], sources['conversions']),
+                key=lambda row: (row[2] / row[1]) if row[1] > 10 else 0
+            )
+
+            if best_users > 10:
+                rate = (best_convs / best_users * 100)
+                findings.append(f"Best traffic source: {best_source} ({rate:.1f}% conversion)")
 
         if findings:
             for i, finding in enumerate(findings, 1):
@@ -518,10 +555,16 @@ def main():
         print(f"❌ Failed to connect: {e}")
         return
 
-    # Run analyses
+    # Run analyses. The conversion-driver queries don't depend on the
+    # drop-off results, so fetch them in the background while the drop-off
+    # report runs; the reports still print one after the other.
+    # --fast: estimate conversion drivers from a 10% sample of users
+    sample = 0.1 if '--fast' in sys.argv else None
     try:
-        analyze_dropoff(client)
-        analyze_conversion_drivers(client)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            drivers = executor.submit(fetch_conversion_drivers, client, sample)
+            analyze_dropoff(client)
+            analyze_conversion_drivers(client, sample, drivers.result())
 
         print("\n" + "=" * 80)
         print("✅ Analysis Complete!")
@@ -22,7 +22,7 @@ Usage:
     results = client.query("SELECT * FROM events WHERE event = 'Page View' LIMIT 10")
 """
 
-from .client import PostHogClient
+from .client import PostHogClient, format_json
 from .exceptions import (
     PostHogError,
     AuthenticationError,
@@ -36,6 +36,7 @@ from .exceptions import (
 __version__ = '1.0.0'
 __all__ = [
     'PostHogClient',
+    'format_json',
     'PostHogError',
     'AuthenticationError',
     'ObjectNotFoundError',
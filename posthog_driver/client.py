@@ -15,8 +15,13 @@ Based on PostHog's comprehensive API:
 """
 
 import os
+import re
+import json
+import time
 import requests
-from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
+from typing import List, Dict, Any, Iterator, Optional, Union
 from datetime import datetime, timedelta
 from .exceptions import (
     PostHogError,
@@ -28,6 +33,69 @@ from .exceptions import (
     ValidationError
 )
 
+try:
+    import orjson
+    _json_loads = orjson.loads  # Much faster on large HogQL result sets
+except ImportError:
+    orjson = None
+    _json_loads = json.loads
+
+# "FROM events", "FROM events AS e" or "FROM events e"; SAMPLE goes right
+# after the alias. String literals are matched too so they can be skipped.
+_FROM_EVENTS_RE = re.compile(
+    r"'(?:[^'\\]|\\.)*'"
+    r"|\bFROM\s+events\b(?:\s+AS\s+\w+|\s+(?!(?:"
+    r"WHERE|PREWHERE|GROUP|ORDER|HAVING|LIMIT|OFFSET|SETTINGS|FORMAT|SAMPLE|"
+    r"FINAL|UNION|EXCEPT|INTERSECT|WINDOW|QUALIFY|JOIN|INNER|LEFT|RIGHT|FULL|"
+    r"CROSS|OUTER|ANY|ALL|ASOF|SEMI|ANTI|GLOBAL|ARRAY|ON|USING"
+    r")\b)\w+)?",
+    re.IGNORECASE
+)
+
+# Columns selected by export_events_table(); every one is stored as a string
+_EXPORT_COLUMNS = ('uuid', 'event', 'distinct_id', 'timestamp', 'properties')
+
+
+def _rows_to_batch(pa, schema, rows):
+    """
+    Turn a page of positional export rows into an Arrow record batch.
+
+    Each column is converted straight from the rows, so only one column's
+    Python values exist alongside the page at a time.
+    """
+    arrays = [
+        pa.array(
+            [
+                value if value is None or isinstance(value, str)
+                else json.dumps(value)
+                for value in (row[index] for row in rows)
+            ],
+            type=field.type
+        )
+        for index, field in enumerate(schema)
+    ]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def format_json(obj: Any) -> str:
+    """
+    Pretty-print a query result as JSON.
+
+    Uses orjson when it is installed, which is several times faster than
+    json on large results.
+
+    Args:
+        obj: JSON-serializable value, e.g. rows returned by query()
+
+    Returns:
+        JSON text indented by two spaces
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+        ).decode()
+    return json.dumps(obj, indent=2)
+
 
 class PostHogClient:
     """
@@ -49,6 +117,7 @@ class PostHogClient:
         project_api_key: Optional[str] = None,  # For event capture
         timeout: int = 30,
         max_retries: int = 3,
+        metadata_cache_ttl: float = 300,
         **kwargs
     ):
         """
@@ -61,6 +130,8 @@ class PostHogClient:
             project_api_key: Project API key for event capture (optional)
             timeout: Request timeout in seconds
             max_retries: Maximum retry attempts for failed requests
+            metadata_cache_ttl: Seconds to reuse cohort and experiment
+                lists before fetching them again (0 disables caching)
         """
         self.api_url = (api_url or
                        os.getenv('POSTHOG_API_URL', 'https://us.posthog.com')).rstrip('/')
@@ -69,6 +140,12 @@ class PostHogClient:
         self.project_api_key = project_api_key or os.getenv('POSTHOG_PROJECT_API_KEY')
         self.timeout = timeout
         self.max_retries = max_retries
+        self.metadata_cache_ttl = metadata_cache_ttl
+
+        # Cohort and experiment lists change rarely; keep them for a few
+        # minutes so workflows run in the same session don't refetch them.
+        # Keyed by (endpoint, params) -> (expiry, results)
+        self._metadata_cache: Dict[Any, Any] = {}
 
         # Validation
         if not self.api_key:
@@ -82,7 +159,9 @@ class PostHogClient:
                 "POSTHOG_PROJECT_ID environment variable."
             )
 
-        # Setup HTTP session
+        # Setup HTTP session. requests already sends Accept-Encoding for every
+        # codec urllib3 can decode (gzip/deflate, plus br and zstd when brotli
+        # or zstandard is installed), so responses arrive compressed.
         self.session = requests.Session()
         self.session.headers.update({
             'Authorization': f'Bearer {self.api_key}',
@@ -153,7 +232,7 @@ class PostHogClient:
 
                 # Return JSON if available, otherwise return success indicator
                 try:
-                    return response.json()
+                    return _json_loads(response.content)
                 except ValueError:
                     return {'success': True, 'status_code': response.status_code}
 
@@ -175,6 +254,38 @@ class PostHogClient:
                 if attempt == self.max_retries - 1:
                     raise PostHogError(f"HTTP error: {str(e)}")
 
+    def _get_cached_list(
+        self,
+        endpoint: str,
+        params: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        GET a list endpoint, reusing the results for metadata_cache_ttl seconds.
+
+        Args:
+            endpoint: API endpoint path
+            params: Query parameters (part of the cache key)
+
+        Returns:
+            List of result objects (a fresh list; the objects are shared)
+        """
+        key = (endpoint, tuple(sorted((params or {}).items())))
+        now = time.monotonic()
+
+        cached = self._metadata_cache.get(key)
+        if cached and cached[0] > now:
+            return list(cached[1])
+
+        results = self._make_request(endpoint, params=params or {}).get('results', [])
+        if self.metadata_cache_ttl > 0:
+            self._metadata_cache[key] = (now + self.metadata_cache_ttl, results)
+        return list(results)
+
+    def _invalidate_cached_list(self, endpoint: str) -> None:
+        """Drop cached results for an endpoint after it was written to."""
+        for key in [key for key in self._metadata_cache if key[0] == endpoint]:
+            self._metadata_cache.pop(key, None)
+
     # ==================== DRIVER CONTRACT METHODS ====================
 
     def list_objects(self) -> List[str]:
@@ -353,7 +464,12 @@ class PostHogClient:
 
         return schemas[object_name]
 
-    def query(self, hogql_query: str) -> List[Dict[str, Any]]:
+    def query(
+        self,
+        hogql_query: str,
+        values: Optional[Dict[str, Any]] = None,
+        sample: Optional[float] = None
+    ) -> List[List[Any]]:
         """
         Execute HogQL query (PostHog's SQL-like query language).
 
@@ -363,30 +479,52 @@ class PostHogClient:
         - SELECT distinct_id, count() FROM events GROUP BY distinct_id
         - SELECT * FROM events WHERE properties.$current_url LIKE '%/blog%'
 
+        Literal values can be bound to {name} placeholders instead of being
+        formatted into the query, so repeated queries share the same text:
+        - SELECT count() FROM events WHERE event = {event_name}
+
+        For exploration, sample=0.1 reads roughly a tenth of the events
+        (SAMPLE 0.1 on every events table in the query). Ratios such as
+        conversion rates stay comparable; counts cover only the sample.
+
         Args:
             hogql_query: HogQL query string (SQL-like syntax)
+            values: Values for {name} placeholders in the query (optional)
+            sample: Fraction of events to scan, between 0 and 1 (optional)
 
         Returns:
-            List of result rows as dictionaries
+            List of result rows, each a list of column values in SELECT order
 
         Raises:
+            ValidationError: Empty query or sample outside (0, 1]
             QueryError: Invalid query syntax or execution error
             RateLimitError: Query rate limit exceeded (2400/hour)
         """
         if not hogql_query or not hogql_query.strip():
             raise ValidationError("Query cannot be empty")
+        if sample is not None:
+            if not 0 < sample <= 1:
+                raise ValidationError("sample must be between 0 and 1")
+            if sample < 1:
+                hogql_query = _FROM_EVENTS_RE.sub(
+                    lambda m: m.group(0) if m.group(0).startswith("'")
+                    else f"{m.group(0)} SAMPLE {sample}",
+                    hogql_query
+                )
 
         try:
             endpoint = f'/api/projects/{self.project_id}/query/'
+            query = {
+                'kind': 'HogQLQuery',
+                'query': hogql_query
+            }
+            if values:
+                query['values'] = values
+
             result = self._make_request(
                 endpoint,
                 method='POST',
-                json={
-                    'query': {
-                        'kind': 'HogQLQuery',
-                        'query': hogql_query
-                    }
-                }
+                json={'query': query}
             )
 
             return result.get('results', [])
@@ -396,6 +534,99 @@ class PostHogClient:
         except Exception as e:
             raise QueryError(f"Query execution failed: {str(e)}")
 
+    def query_many(
+        self,
+        hogql_queries: List[str],
+        values: Optional[Dict[str, Any]] = None,
+        max_workers: int = 4,
+        return_exceptions: bool = False,
+        sample: Optional[float] = None
+    ) -> List[Union[List[List[Any]], Exception]]:
+        """
+        Execute several independent HogQL queries concurrently.
+
+        PostHog's query endpoint takes one query per request, so the queries
+        are issued in parallel over the shared session. Total latency is that
+        of the slowest query rather than the sum of all of them.
+
+        Args:
+            hogql_queries: HogQL query strings
+            values: Placeholder values shared by all queries (optional)
+            max_workers: Maximum number of queries in flight at once
+            return_exceptions: Return a failed query's exception in its slot
+                instead of raising it
+            sample: Fraction of events every query scans (see query())
+
+        Returns:
+            List of row lists (see query()), in the same order as hogql_queries
+
+        Raises:
+            QueryError: A query failed and return_exceptions is False
+        """
+        def run(hogql_query):
+            try:
+                return self.query(hogql_query, values, sample)
+            except Exception as e:
+                if not return_exceptions:
+                    raise
+                return e
+
+        if not hogql_queries:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(hogql_queries))) as pool:
+            return list(pool.map(run, hogql_queries))
+
+    def iter_query(
+        self,
+        hogql_query: str,
+        values: Optional[Dict[str, Any]] = None,
+        page_size: int = 1000,
+        order_by: Optional[str] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Execute a HogQL query page by page, yielding rows as pages arrive.
+
+        The query is wrapped in a LIMIT/OFFSET subquery, so only one page is
+        held in memory at a time and the caller can start on the first rows
+        (or stop early) before the rest is fetched. Pass order_by so pages
+        are stable: it is applied to the paged query itself, because an
+        ORDER BY inside the subquery is not guaranteed to survive paging.
+
+        Every page re-runs the query up to its offset, so for large ordered
+        exports prefer iter_export_events(), which pages by key instead.
+
+        Args:
+            hogql_query: HogQL query string (SQL-like syntax)
+            values: Values for {name} placeholders in the query (optional)
+            page_size: Rows fetched per request
+            order_by: ORDER BY expression for the pages, e.g. "timestamp, uuid"
+
+        Yields:
+            Result rows (lists of column values), in query order
+
+        Raises:
+            ValidationError: Empty query or non-positive page_size
+            QueryError: Invalid query syntax or execution error
+        """
+        if not hogql_query or not hogql_query.strip():
+            raise ValidationError("Query cannot be empty")
+        if page_size < 1:
+            raise ValidationError("page_size must be positive")
+
+        order = f" ORDER BY {order_by}" if order_by else ""
+        offset = 0
+        while True:
+            page = self.query(
+                f"SELECT * FROM ({hogql_query}){order} "
+                f"LIMIT {int(page_size)} OFFSET {offset}",
+                values
+            )
+            yield from page
+            if len(page) < page_size:
+                return
+            offset += page_size
+
     # ==================== EVENT CAPTURE & TRACKING ====================
 
     def capture_event(
@@ -560,6 +791,64 @@ class PostHogClient:
 
         return self._make_request(endpoint, method='POST', json=payload)
 
+    def query_funnel(
+        self,
+        steps: List[str],
+        date_from: str,
+        date_to: Optional[str] = None,
+        conversion_window_days: int = 14
+    ) -> List[Dict[str, Any]]:
+        """
+        Run an ordered conversion funnel server-side.
+
+        Uses PostHog's funnel engine (FunnelsQuery), so a user only counts at
+        a step if they completed the earlier steps in order within the
+        conversion window - unlike independent per-event counts.
+
+        Args:
+            steps: Event names, in funnel order
+            date_from: Start of the date range (e.g., '2024-01-01', '-30d')
+            date_to: End of the date range (default: now)
+            conversion_window_days: Time allowed to complete the funnel
+
+        Returns:
+            List of step results (name, order, count, ...) in funnel order
+
+        Raises:
+            ValidationError: No steps given
+            QueryError: Funnel query failed
+        """
+        if not steps:
+            raise ValidationError("Funnel requires at least one step")
+
+        try:
+            endpoint = f'/api/projects/{self.project_id}/query/'
+            query = {
+                'kind': 'FunnelsQuery',
+                'series': [
+                    {'kind': 'EventsNode', 'event': step, 'name': step}
+                    for step in steps
+                ],
+                'dateRange': {'date_from': date_from, 'date_to': date_to},
+                'funnelsFilter': {
+                    'funnelWindowInterval': conversion_window_days,
+                    'funnelWindowIntervalUnit': 'day'
+                }
+            }
+
+            result = self._make_request(
+                endpoint,
+                method='POST',
+                json={'query': query}
+            )
+
+            return result.get('results', [])
+
+        except PostHogError:
+            raise
+        except Exception as e:
+            raise QueryError(f"Funnel query failed: {str(e)}")
+
     # ==================== EVENTS & DATA EXPORT ====================
 
     def get_events(
@@ -639,6 +928,154 @@ class PostHogClient:
                 end_date="2024-01-31"
             )
         """
+        return self.query(
+            self._export_events_query(start_date, end_date, event_names, properties_filter)
+        )
+
+    def iter_export_events(
+        self,
+        start_date: str,
+        end_date: str,
+        event_names: Optional[List[str]] = None,
+        properties_filter: Optional[Dict[str, Any]] = None,
+        page_size: int = 10000
+    ) -> Iterator[List[Any]]:
+        """
+        Export events page by page instead of as one list.
+
+        Same filters as export_events(), but events are fetched in pages
+        ordered by timestamp, so memory stays bounded by page_size and a
+        loader can start writing the first page while later ones are fetched.
+        Each page picks up after the last (timestamp, uuid) seen, so pages
+        never overlap or skip rows and each request reads only its own page.
+
+        Args:
+            start_date: ISO date string (inclusive)
+            end_date: ISO date string (inclusive)
+            event_names: Optional list of specific events to export
+            properties_filter: Optional property filters
+            page_size: Events fetched per request
+
+        Returns:
+            Iterator over event rows (lists of column values), oldest first
+
+        Example:
+            # Load January 2024 into a warehouse in batches
+            batch = []
+            for event in client.iter_export_events("2024-01-01", "2024-01-31"):
+                batch.append(event)
+                if len(batch) == 10000:
+                    upload(batch)
+                    batch = []
+        """
+        return chain.from_iterable(self._iter_export_pages(
+            start_date, end_date, event_names, properties_filter, page_size
+        ))
+
+    def export_events_table(
+        self,
+        start_date: str,
+        end_date: str,
+        event_names: Optional[List[str]] = None,
+        properties_filter: Optional[Dict[str, Any]] = None,
+        page_size: int = 10000
+    ):
+        """
+        Export events as a columnar pyarrow Table.
+
+        Same filters as export_events(). Each page is converted to an Arrow
+        record batch as it arrives, so only one page of Python rows is alive
+        at a time and the result can go straight to Parquet for S3, BigQuery
+        or Snowflake loads. Requires the optional pyarrow package.
+
+        Columns: uuid, event, distinct_id, timestamp, properties (JSON string)
+
+        Args:
+            start_date: ISO date string (inclusive)
+            end_date: ISO date string (inclusive)
+            event_names: Optional list of specific events to export
+            properties_filter: Optional property filters
+            page_size: Events fetched per request
+
+        Returns:
+            pyarrow.Table with one row per event, oldest first
+
+        Raises:
+            ImportError: pyarrow is not installed
+
+        Example:
+            import pyarrow.parquet as pq
+            table = client.export_events_table("2024-01-01", "2024-01-31")
+            pq.write_table(table, "events.parquet", compression="zstd")
+        """
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError(
+                "export_events_table() requires pyarrow: pip install pyarrow"
+            ) from None
+
+        schema = pa.schema([(name, pa.string()) for name in _EXPORT_COLUMNS])
+        batches = [
+            _rows_to_batch(pa, schema, page)
+            for page in self._iter_export_pages(
+                start_date, end_date, event_names, properties_filter, page_size,
+                columns=_EXPORT_COLUMNS
+            )
+        ]
+
+        return pa.Table.from_batches(batches, schema=schema)
+
+    def _iter_export_pages(
+        self,
+        start_date: str,
+        end_date: str,
+        event_names: Optional[List[str]],
+        properties_filter: Optional[Dict[str, Any]],
+        page_size: int,
+        columns: Optional[tuple] = None
+    ) -> Iterator[List[Any]]:
+        """
+        Yield pages of export rows using keyset pagination on (timestamp, uuid).
+
+        Each page is its own ORDER BY ... LIMIT query that continues after the
+        last row of the previous page, rather than an OFFSET into one big
+        sorted result. The cursor columns are selected after the requested
+        ones and stripped from the rows yielded. Always yields at least one
+        (possibly empty) page.
+        """
+        if page_size < 1:
+            raise ValidationError("page_size must be positive")
+
+        hogql = self._export_events_query(
+            start_date, end_date, event_names, properties_filter,
+            columns=(columns or ('*',)) + ('timestamp', 'uuid')
+        )
+        after = ""
+        values = None
+        while True:
+            page = self.query(
+                f"{hogql}{after} ORDER BY timestamp, uuid LIMIT {int(page_size)}",
+                values
+            )
+            yield [row[:-2] for row in page]
+            if len(page) < page_size:
+                return
+            after = (
+                " AND (timestamp, uuid) > "
+                "(toDateTime({after_timestamp}), toUUID({after_uuid}))"
+            )
+            values = {'after_timestamp': page[-1][-2], 'after_uuid': page[-1][-1]}
+
+    def _export_events_query(
+        self,
+        start_date: str,
+        end_date: str,
+        event_names: Optional[List[str]],
+        properties_filter: Optional[Dict[str, Any]],
+        columns: Optional[tuple] = None
+    ) -> str:
+        """Build the HogQL used by the export_events() family."""
         conditions = [
             f"timestamp >= '{start_date}'",
             f"timestamp <= '{end_date}'"
@@ -654,9 +1091,8 @@ class PostHogClient:
                 conditions.append(f"properties.{key} = '{value}'")
 
         where_clause = f"WHERE {' AND '.join(conditions)}"
-        hogql = f"SELECT * FROM events {where_clause}"
-
-        return self.query(hogql)
+        select = ', '.join(columns) if columns else '*'
+        return f"SELECT {select} FROM events {where_clause}"
 
     # ==================== PERSONS & COHORTS ====================
 
@@ -719,8 +1155,7 @@ class PostHogClient:
         if search:
             params['search'] = search
 
-        result = self._make_request(endpoint, params=params)
-        return result.get('results', [])
+        return self._get_cached_list(endpoint, params)
 
     def create_cohort(
         self,
@@ -746,7 +1181,9 @@ class PostHogClient:
             'filters': filters or {}
         }
 
-        return self._make_request(endpoint, method='POST', json=payload)
+        result = self._make_request(endpoint, method='POST', json=payload)
+        self._invalidate_cached_list(endpoint)
+        return result
 
     # ==================== FEATURE FLAGS & EXPERIMENTS ====================
 
@@ -805,8 +1242,7 @@ class PostHogClient:
             List of experiment objects with results and statistical analysis
         """
         endpoint = f'/api/projects/{self.project_id}/experiments/'
-        result = self._make_request(endpoint)
-        return result.get('results', [])
+        return self._get_cached_list(endpoint)
 
     # ==================== ANNOTATIONS ====================
 
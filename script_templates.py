@@ -3,6 +3,14 @@ PostHog Script Templates for Common Operations
 
 Pre-built script templates for typical analytics, ETL, and data lookup tasks.
 These templates can be executed in E2B sandboxes with variable substitution.
+
+Templates never embed credentials: PostHogClient() reads them from the
+POSTHOG_* environment variables that PostHogAgentExecutor passes to the
+sandbox, so the script text is identical for every project.
+
+Results are printed as compact JSON (no indentation or spaces): the output
+is read by agents and parsers, and pretty-printing a row list puts every
+value on its own indented line, which mostly adds tokens.
 """
 
 # ==================== EVENT TRACKING ====================
@@ -15,11 +23,7 @@ sys.path.insert(0, '/home/user')
 from posthog_driver import PostHogClient
 
 # Initialize client
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>',
-    project_api_key='<project_api_key_placeholder>'
-)
+client = PostHogClient()
 
 # Capture event
 result = client.capture_event(
@@ -38,11 +42,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>',
-    project_api_key='<project_api_key_placeholder>'
-)
+client = PostHogClient()
 
 # Batch event capture
 events = {events_list}
@@ -61,10 +61,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Query recent events
 events = client.get_events(
@@ -77,7 +74,7 @@ print(json.dumps({{
     'success': True,
     'count': len(events),
     'events': events
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 HOGQL_QUERY = """
@@ -87,10 +84,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Execute HogQL query
 query = '''{hogql_query}'''
@@ -101,7 +95,7 @@ print(json.dumps({{
     'success': True,
     'rows': len(results),
     'results': results
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 GET_INSIGHTS = """
@@ -111,10 +105,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # List insights
 insights = client.get_insights(
@@ -137,7 +128,7 @@ print(json.dumps({{
     'success': True,
     'count': len(insights),
     'insights': formatted_insights
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 # ==================== DATA EXPORT / ETL ====================
@@ -149,10 +140,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Export events for date range
 events = client.export_events(
@@ -169,7 +157,7 @@ print(json.dumps({{
         'end': '{end_date}'
     }},
     'sample': events[:5] if len(events) > 5 else events
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 EXPORT_COHORT_DATA = """
@@ -179,10 +167,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Get cohort details
 cohort_id = {cohort_id}
@@ -193,7 +178,7 @@ print(json.dumps({{
     'cohort_id': cohort_id,
     'persons_count': len(persons),
     'persons': persons
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 # ==================== COHORT & PERSONA ANALYSIS ====================
@@ -205,10 +190,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Find power users using HogQL
 # Users who performed key action {min_occurrences} or more times in last {days} days
@@ -238,7 +220,7 @@ print(json.dumps({{
         'time_period_days': {days}
     }},
     'power_users': power_users
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 IDENTIFY_CHURN_RISK = """
@@ -248,10 +230,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Find users at risk of churning
 # Users who were active in previous period but not in recent period
@@ -284,7 +263,7 @@ print(json.dumps({{
         'previously_active_days': {lookback_days}
     }},
     'users': churn_risk_users
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 # ==================== FUNNEL & CONVERSION ANALYSIS ====================
@@ -296,28 +275,23 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Analyze funnel drop-off points
 # Simple sequential funnel analysis with HogQL
 funnel_steps = {funnel_steps}  # e.g., ['Signup Started', 'Email Verified', 'Profile Completed']
 
-# Get count for each step
-results = {{}}
-for step in funnel_steps:
-    hogql = f'''
-    SELECT count(DISTINCT distinct_id) as count
-    FROM events
-    WHERE event = '{{step}}'
-    AND timestamp >= '{{start_date}}'
-    AND timestamp <= '{{end_date}}'
-    '''
-
-    step_result = client.query(hogql)
-    results[step] = step_result[0]['count'] if step_result else 0
+# Count every step in one query; filtering on the step events up front lets
+# ClickHouse skip parts that hold none of them instead of scanning all events
+hogql = '''
+SELECT event, uniq(distinct_id) as count
+FROM events
+WHERE has({{steps}}, event)
+AND timestamp >= now() - INTERVAL 30 DAY
+GROUP BY event
+'''
+counts = dict(client.query(hogql, {{'steps': funnel_steps}}))
+results = {{step: counts.get(step, 0) for step in funnel_steps}}
 
 # Calculate drop-off rates
 funnel_data = []
@@ -339,7 +313,7 @@ print(json.dumps({{
     'success': True,
     'funnel_steps': len(funnel_steps),
     'funnel_analysis': funnel_data
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 # ==================== FEATURE FLAG & EXPERIMENTATION ====================
@@ -351,10 +325,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Get experiment results
 experiments = client.get_experiments()
@@ -376,7 +347,7 @@ print(json.dumps({{
     'success': True,
     'experiments_count': len(experiments),
     'experiments': formatted_experiments
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 EVALUATE_FEATURE_FLAGS = """
@@ -386,11 +357,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>',
-    project_api_key='<project_api_key_placeholder>'
-)
+client = PostHogClient()
 
 # Get all feature flags
 flags = client.get_feature_flags()
@@ -406,7 +373,7 @@ print(json.dumps({{
     'total_flags': len(flags),
     'evaluation': flag_evaluation,
     'user': '{distinct_id}'
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 # ==================== ERROR TRACKING & MONITORING ====================
@@ -418,10 +385,7 @@ sys.path.insert(0, '/home/user')
 
 from posthog_driver import PostHogClient
 
-client = PostHogClient(
-    api_key='<api_key_placeholder>',
-    project_id='<project_id_placeholder>'
-)
+client = PostHogClient()
 
 # Query error events
 hogql = '''
@@ -447,7 +411,7 @@ print(json.dumps({{
     'success': True,
     'error_types_count': len(errors),
     'errors': errors
-}}, indent=2))
+}}, separators=(',', ':')))
 """
 
 # ==================== TEMPLATE REGISTRY ====================
@@ -5,8 +5,7 @@ Shows actual execution and real outputs
 """
 
 import sys
-import json
-from posthog_driver import PostHogClient
+from posthog_driver import PostHogClient, format_json
 from script_templates import list_templates, get_template, TEMPLATES
 import time
 
@@ -31,13 +30,12 @@ def print_output(label, data):
     """Print output in colored format."""
     print(f"\n\033[92m✓ {label}:\033[0m")
     if isinstance(data, (dict, list)):
-        json_str = json.dumps(data, indent=2)
-        # Colorize JSON
-        for line in json_str.split('\n'):
-            if ':' in line:
-                print(f"\033[93m{line}\033[0m")
-            else:
-                print(f"\033[90m{line}\033[0m")
+        json_str = format_json(data)
+        # Colorize JSON, writing all lines at once
+        print("\n".join(
+            f"\033[93m{line}\033[0m" if ':' in line else f"\033[90m{line}\033[0m"
+            for line in json_str.split('\n')
+        ))
     else:
         print(f"\033[93m  {data}\033[0m")
 
@@ -6,11 +6,13 @@ Tests driver contract implementation and core functionality.
 
 import sys
 import os
+import json
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import unittest
+import importlib.util
 from unittest.mock import Mock, patch, MagicMock
-from posthog_driver import PostHogClient
+from posthog_driver import PostHogClient, format_json
 from posthog_driver.exceptions import (
     AuthenticationError,
     ObjectNotFoundError,
@@ -183,6 +185,158 @@ class TestQueryMethod(unittest.TestCase):
         self.assertEqual(call_args[0][0], '/api/projects/12345/query/')
         self.assertEqual(call_args[1]['method'], 'POST')
 
+    def test_make_request_parses_json_body(self):
+        """Test responses are decoded from the raw body."""
+        response = Mock(status_code=200, content=b'{"results": [[1, "a"]]}')
+        self.client.session.request = Mock(return_value=response)
+
+        result = self.client._make_request('/api/projects/12345/query/', method='POST')
+
+        self.assertEqual(result, {'results': [[1, 'a']]})
+
+    @patch('posthog_driver.client.PostHogClient._make_request')
+    def test_query_with_values(self, mock_request):
+        """Test placeholder values are sent alongside the query."""
+        mock_request.return_value = {'results': [[3]]}
+
+        self.client.query(
+            "SELECT count() FROM events WHERE event = {name}",
+            values={'name': 'User Signup'}
+        )
+
+        query = mock_request.call_args[1]['json']['query']
+        self.assertEqual(query['values'], {'name': 'User Signup'})
+
+    @patch('posthog_driver.client.PostHogClient.query')
+    def test_query_many_preserves_order(self, mock_query):
+        """Test query_many returns results in query order."""
+        mock_query.side_effect = lambda q, values=None, sample=None: [[q]]
+
+        results = self.client.query_many(['SELECT 1', 'SELECT 2', 'SELECT 3'])
+
+        self.assertEqual(results, [[['SELECT 1']], [['SELECT 2']], [['SELECT 3']]])
+
+    @patch('posthog_driver.client.PostHogClient.query')
+    def test_query_many_return_exceptions(self, mock_query):
+        """Test query_many raises or returns failures per return_exceptions."""
+        def fake_query(q, values=None, sample=None):
+            if q == 'bad':
+                raise QueryError('boom')
+            return [[1]]
+        mock_query.side_effect = fake_query
+
+        with self.assertRaises(QueryError):
+            self.client.query_many(['SELECT 1', 'bad'])
+
+        results = self.client.query_many(['SELECT 1', 'bad'], return_exceptions=True)
+        self.assertEqual(results[0], [[1]])
+        self.assertIsInstance(results[1], QueryError)
+
+    @patch('posthog_driver.client.PostHogClient._make_request')
+    def test_query_funnel(self, mock_request):
+        """Test query_funnel sends an ordered FunnelsQuery."""
+        mock_request.return_value = {'results': [
+            {'name': 'Signup', 'order': 0, 'count': 10},
+            {'name': 'Purchase', 'order': 1, 'count': 4}
+        ]}
+
+        steps = self.client.query_funnel(['Signup', 'Purchase'], '-30d')
+
+        self.assertEqual([s['count'] for s in steps], [10, 4])
+        query = mock_request.call_args[1]['json']['query']
+        self.assertEqual(query['kind'], 'FunnelsQuery')
+        self.assertEqual([n['event'] for n in query['series']], ['Signup', 'Purchase'])
+
+    @patch('posthog_driver.client.PostHogClient.query')
+    def test_iter_export_events_pages_by_key(self, mock_query):
+        """Test iter_export_events continues each page after the last key."""
+        mock_query.side_effect = [
+            [['e1', '2024-01-01T00:00:00Z', 'u1'], ['e2', '2024-01-02T00:00:00Z', 'u2']],
+            [['e3', '2024-01-03T00:00:00Z', 'u3']],
+        ]
+
+        events = list(self.client.iter_export_events(
+            '2024-01-01', '2024-01-31', event_names=['Purchase'], page_size=2
+        ))
+
+        self.assertEqual(events, [['e1'], ['e2'], ['e3']])
+        first, second = mock_query.call_args_list
+        self.assertIn("event IN ('Purchase')", first[0][0])
+        self.assertTrue(first[0][0].endswith('ORDER BY timestamp, uuid LIMIT 2'))
+        self.assertNotIn('OFFSET', second[0][0])
+        self.assertIn('(timestamp, uuid) > (', second[0][0])
+        self.assertEqual(
+            second[0][1],
+            {'after_timestamp': '2024-01-02T00:00:00Z', 'after_uuid': 'u2'}
+        )
+
+    @unittest.skipUnless(importlib.util.find_spec('pyarrow'), 'pyarrow not installed')
+    @patch('posthog_driver.client.PostHogClient.query')
+    def test_export_events_table_is_columnar(self, mock_query):
+        """Test export_events_table builds string columns across pages."""
+        rows = [
+            ['u1', 'Signup', 'd1', '2024-01-01T00:00:00Z', {'plan': 'pro'}],
+            ['u2', 'Purchase', 'd2', '2024-01-02T00:00:00Z', '{}'],
+            ['u3', 'Purchase', 'd1', '2024-01-03T00:00:00Z', None],
+        ]
+        # Each row also carries the (timestamp, uuid) cursor columns
+        rows = [row + [row[3], row[0]] for row in rows]
+        mock_query.side_effect = [rows[:2], rows[2:]]
+
+        table = self.client.export_events_table(
+            '2024-01-01', '2024-01-31', page_size=2
+        )
+
+        self.assertEqual(table.num_rows, 3)
+        self.assertEqual(table.column_names[:2], ['uuid', 'event'])
+        self.assertEqual(
+            table.column('properties').to_pylist(),
+            ['{"plan": "pro"}', '{}', None]
+        )
+        hogql = mock_query.call_args[0][0]
+        self.assertTrue(hogql.startswith('SELECT uuid, event, distinct_id'))
+
+    @patch('posthog_driver.client.PostHogClient._make_request')
+    def test_query_sample_adds_sample_clause(self, mock_request):
+        """Test sample= samples every events table in the query."""
+        mock_request.return_value = {'results': []}
+
+        self.client.query(
+            "SELECT count() FROM (SELECT * FROM events AS e) JOIN persons",
+            sample=0.1
+        )
+
+        sent = mock_request.call_args[1]['json']['query']['query']
+        self.assertEqual(
+            sent,
+            "SELECT count() FROM (SELECT * FROM events AS e SAMPLE 0.1) JOIN persons"
+        )
+
+        self.client.query(
+            "SELECT 'FROM events' FROM events e WHERE e.event = 'x'", sample=0.5
+        )
+
+        sent = mock_request.call_args[1]['json']['query']['query']
+        self.assertEqual(
+            sent,
+            "SELECT 'FROM events' FROM events e SAMPLE 0.5 WHERE e.event = 'x'"
+        )
+        with self.assertRaises(ValidationError):
+            self.client.query("SELECT 1 FROM events", sample=0)
+
+    @patch('posthog_driver.client.PostHogClient.query')
+    def test_iter_query_pages_until_short_page(self, mock_query):
+        """Test iter_query yields rows across pages and stops on a short page."""
+        mock_query.side_effect = [[[1], [2]], [[3]]]
+
+        rows = list(self.client.iter_query('SELECT x FROM t', page_size=2, order_by='x'))
+
+        self.assertEqual(rows, [[1], [2], [3]])
+        self.assertEqual(mock_query.call_count, 2)
+        self.assertTrue(
+            mock_query.call_args[0][0].endswith(') ORDER BY x LIMIT 2 OFFSET 2')
+        )
+
 
 class TestEventCapture(unittest.TestCase):
     """Test event capture functionality."""
@@ -280,6 +434,38 @@ class TestHelperMethods(unittest.TestCase):
 
         self.assertFalse(result)
 
+    @patch('posthog_driver.client.PostHogClient._make_request')
+    def test_cohorts_cached_until_written(self, mock_request):
+        """Test cohort list is reused until a cohort is created."""
+        mock_request.return_value = {'results': [{'id': 1, 'name': 'Paid'}]}
+
+        first = self.client.get_cohorts()
+        second = self.client.get_cohorts()
+        self.assertEqual(first, second)
+        self.assertEqual(mock_request.call_count, 1)
+
+        self.client.create_cohort('Free')
+        self.client.get_cohorts()
+        self.assertEqual(mock_request.call_count, 3)
+
+    @patch('posthog_driver.client.PostHogClient._make_request')
+    def test_metadata_cache_disabled(self, mock_request):
+        """Test metadata_cache_ttl=0 fetches experiments every time."""
+        mock_request.return_value = {'results': []}
+        self.client.metadata_cache_ttl = 0
+
+        self.client.get_experiments()
+        self.client.get_experiments()
+
+        self.assertEqual(mock_request.call_count, 2)
+
+    def test_format_json(self):
+        """Test format_json pretty-prints results with or without orjson."""
+        text = format_json({'rows': [['Signup', 3]]})
+
+        self.assertIn('\n  "rows"', text)
+        self.assertEqual(json.loads(text), {'rows': [['Signup', 3]]})
+
     def test_repr(self):
         """Test string representation."""
         repr_str = repr(self.client)
@@ -342,15 +528,13 @@ class TestScriptTemplates(unittest.TestCase):
         with self.assertRaises(KeyError):
             get_template('nonexistent_template')
 
-    def test_template_placeholders(self):
-        """Test templates contain placeholders."""
-        from script_templates import get_template
-
-        template = get_template('get_recent_events')
+    def test_templates_read_credentials_from_env(self):
+        """Test templates build the client from env vars, not spliced keys."""
+        from script_templates import TEMPLATES
 
-        # Check for API key placeholders
-        self.assertIn('<api_key_placeholder>', template)
-        self.assertIn('<project_id_placeholder>', template)
+        for name, template in TEMPLATES.items():
+            self.assertNotIn('_placeholder>', template, name)
+            self.assertIn('PostHogClient()', template, name)
 
 
 class TestExceptions(unittest.TestCase):
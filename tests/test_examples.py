@@ -4,12 +4,15 @@ Integration Tests for PostHog Driver Examples
 Tests that example code is valid and imports work correctly.
 """
 
+import io
 import sys
 import os
+import tarfile
+import time
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 import unittest
-from unittest.mock import patch
+from unittest.mock import Mock, MagicMock, patch
 
 
 class TestExampleImports(unittest.TestCase):
@@ -89,6 +92,488 @@ class TestAgentExecutor(unittest.TestCase):
         self.assertEqual(executor.e2b_api_key, 'test_e2b_key')
 
 
+class TestSandboxPool(unittest.TestCase):
+    """Test warm sandbox pooling."""
+
+    def _sandbox(self, alive=True):
+        """Build a mock sandbox whose liveness probe succeeds or fails."""
+        sandbox = MagicMock()
+        sandbox.commands.run.return_value.exit_code = 0 if alive else 1
+        return sandbox
+
+    def test_acquire_empty_pool_uses_factory(self):
+        """Test acquire provisions a new sandbox when none is idle."""
+        from agent_executor import SandboxPool
+
+        pool = SandboxPool(max_size=2)
+        sandbox = self._sandbox()
+
+        self.assertIs(pool.acquire(lambda: sandbox), sandbox)
+
+    def test_release_then_acquire_reuses_sandbox(self):
+        """Test released sandboxes are handed out again."""
+        from agent_executor import SandboxPool
+
+        pool = SandboxPool(max_size=2)
+        sandbox = self._sandbox()
+        pool.release(sandbox)
+        factory = Mock()
+
+        self.assertIs(pool.acquire(factory), sandbox)
+        factory.assert_not_called()
+        pool.close()
+
+    def test_dead_sandbox_is_replaced(self):
+        """Test acquire discards sandboxes that fail the liveness probe."""
+        from agent_executor import SandboxPool
+
+        pool = SandboxPool(max_size=2)
+        dead = self._sandbox(alive=False)
+        fresh = self._sandbox()
+        pool.release(dead)
+
+        self.assertIs(pool.acquire(lambda: fresh), fresh)
+        dead.kill.assert_called_once()
+        pool.close()
+
+    def test_release_when_full_kills_sandbox(self):
+        """Test sandboxes beyond max_size are killed instead of pooled."""
+        from agent_executor import SandboxPool
+
+        pool = SandboxPool(max_size=1)
+        kept, extra = self._sandbox(), self._sandbox()
+        pool.release(kept)
+        pool.release(extra)
+
+        self.assertEqual(len(pool), 1)
+        extra.kill.assert_called_once()
+        kept.kill.assert_not_called()
+        pool.close()
+        kept.kill.assert_called_once()
+
+    def test_evict_idle(self):
+        """Test sandboxes idle past the timeout are evicted."""
+        from agent_executor import SandboxPool
+
+        pool = SandboxPool(max_size=2, idle_timeout=0)
+        sandbox = self._sandbox()
+        pool.release(sandbox)
+        pool.evict_idle()
+
+        self.assertEqual(len(pool), 0)
+        sandbox.kill.assert_called_once()
+        pool.close()
+
+    @patch('agent_executor.Sandbox')
+    def test_executor_returns_sandbox_to_pool(self, mock_sandbox):
+        """Test executor exit releases its sandbox rather than killing it."""
+        from agent_executor import PostHogAgentExecutor, get_sandbox_pool
+
+        mock_sandbox.return_value.commands.run.return_value.exit_code = 0
+        executor = PostHogAgentExecutor(
+            e2b_api_key='test_pool_key',
+            posthog_api_key='test_ph_key',
+            posthog_project_id='12345'
+        )
+
+        with executor:
+            sandbox = executor.sandbox
+        with executor:
+            self.assertIs(executor.sandbox, sandbox)
+
+        self.assertEqual(mock_sandbox.call_count, 1)
+        sandbox.kill.assert_not_called()
+        get_sandbox_pool('test_pool_key').close()
+
+    @patch('agent_executor.Sandbox')
+    def test_template_only_uploads_changed_files(self, mock_sandbox):
+        """Test template sandboxes skip pip and re-upload only stale files."""
+        from agent_executor import PostHogAgentExecutor, _DRIVER_HASHES
+
+        manifest = '\n'.join(
+            f"{digest}  posthog_driver/{name}"
+            for name, digest in _DRIVER_HASHES.items()
+            if name != 'client.py'
+        )
+        sandbox = mock_sandbox.return_value
+        sandbox.files.read.return_value = manifest
+        sandbox.commands.run.return_value.exit_code = 0
+
+        executor = PostHogAgentExecutor(
+            e2b_api_key='test_e2b_key',
+            posthog_api_key='test_ph_key',
+            posthog_project_id='12345',
+            connection_pool_size=0,
+            template_id='posthog-driver'
+        )
+
+        with executor:
+            pass
+
+        mock_sandbox.assert_called_once_with(
+            api_key='test_e2b_key', template='posthog-driver'
+        )
+        sandbox.files.write.assert_called_once()
+        archive = sandbox.files.write.call_args.args[1]
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            self.assertEqual(tar.getnames(), ['posthog_driver/client.py'])
+        commands = [c.args[0] for c in sandbox.commands.run.call_args_list]
+        self.assertEqual(len(commands), 1)
+        self.assertIn('tar -xzf', commands[0])
+        sandbox.kill.assert_called_once()
+
+    def test_upload_driver_sends_single_archive(self):
+        """Test upload_driver writes one archive holding every driver file."""
+        from agent_executor import upload_driver, DRIVER_FILES
+
+        sandbox = MagicMock()
+        sandbox.commands.run.return_value.exit_code = 0
+
+        upload_driver(sandbox)
+
+        sandbox.files.write.assert_called_once()
+        archive = sandbox.files.write.call_args.args[1]
+        with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+            self.assertEqual(
+                sorted(tar.getnames()),
+                sorted(f'posthog_driver/{name}' for name in DRIVER_FILES)
+            )
+
+
+class TestBatchExecute(unittest.TestCase):
+    """Test concurrent batch execution."""
+
+    def _executor(self, pool_size=0):
+        """Build an executor with a mock sandbox already attached."""
+        from agent_executor import PostHogAgentExecutor
+
+        executor = PostHogAgentExecutor(
+            e2b_api_key='test_e2b_key',
+            posthog_api_key='test_ph_key',
+            posthog_project_id='12345',
+            connection_pool_size=pool_size
+        )
+        executor.sandbox = MagicMock()
+        return executor
+
+    def _run_code(self, failing=()):
+        """run_code side effect that echoes the script, failing on request."""
+        def run_code(code, envs):
+            result = MagicMock()
+            result.error = 'boom' if code in failing else None
+            result.logs.stdout = code
+            return result
+        return run_code
+
+    @patch('agent_executor.get_sandbox_pool')
+    def test_batch_uses_extra_sandboxes(self, mock_pool):
+        """Test scripts are spread over extra sandboxes and keep their order."""
+        executor = self._executor(pool_size=2)
+        executor.sandbox.run_code.side_effect = self._run_code()
+        extra = MagicMock()
+        extra.run_code.side_effect = self._run_code()
+        mock_pool.return_value.acquire.return_value = extra
+
+        scripts = [{'code': f'script_{i}', 'description': str(i)} for i in range(3)]
+        results = executor.batch_execute(scripts, fail_fast=False)
+
+        self.assertEqual([r['output'] for r in results],
+                         ['script_0', 'script_1', 'script_2'])
+        mock_pool.return_value.acquire.assert_called_once()
+        mock_pool.return_value.release.assert_called_once_with(extra)
+
+    @patch('agent_executor.get_sandbox_pool')
+    def test_batch_fail_fast(self, mock_pool):
+        """Test fail_fast runs scripts in order and stops at the first failure."""
+        executor = self._executor(pool_size=2)
+        executor.sandbox.run_code.side_effect = self._run_code(failing={'b'})
+
+        scripts = [{'code': c} for c in ('a', 'b', 'c')]
+        results = executor.batch_execute(scripts)
+
+        self.assertEqual(len(results), 2)
+        self.assertFalse(results[1]['success'])
+        self.assertEqual(executor.sandbox.run_code.call_count, 2)
+        mock_pool.return_value.acquire.assert_not_called()
+
+    def test_batch_without_fail_fast(self):
+        """Test every script runs when fail_fast is disabled."""
+        executor = self._executor()
+        executor.sandbox.run_code.side_effect = self._run_code(failing={'b'})
+
+        scripts = [{'code': c} for c in ('a', 'b', 'c')]
+        results = executor.batch_execute(scripts, fail_fast=False)
+
+        self.assertEqual([r['success'] for r in results], [True, False, True])
+
+
+class TestE2BIntegrationExamples(unittest.TestCase):
+    """Test the E2B integration examples share one sandbox session."""
+
+    def test_run_examples_uses_single_batch(self):
+        """Test all example scripts are sent in one batch_execute call."""
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import e2b_integration
+        finally:
+            sys.path.remove(examples_dir)
+
+        executor = MagicMock()
+        executor.__enter__.return_value = executor
+        executor.batch_execute.side_effect = lambda scripts, fail_fast: [
+            {'success': False, 'output': '', 'error': 'offline',
+             'description': script['description']}
+            for script in scripts
+        ]
+
+        with patch.object(e2b_integration, '_executor', return_value=executor), \
+                patch('sys.stdout', new_callable=io.StringIO):
+            e2b_integration.run_examples()
+
+        executor.batch_execute.assert_called_once()
+        scripts = executor.batch_execute.call_args[0][0]
+        self.assertEqual(len(scripts), 7)
+        self.assertNotIn('{key_event}', scripts[2]['code'])
+
+    def test_run_examples_runs_duplicate_scripts_once(self):
+        """Test identical scripts are executed once and share a result."""
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import e2b_integration
+        finally:
+            sys.path.remove(examples_dir)
+
+        executor = MagicMock()
+        executor.__enter__.return_value = executor
+        executor.batch_execute.side_effect = lambda scripts, fail_fast: [
+            {'success': True, 'output': 'ok', 'error': None,
+             'description': script['description']}
+            for script in scripts
+        ]
+        reports = []
+        build = lambda: [{'code': 'print(1)', 'description': 'same'}]
+        examples = [('A', build, reports.append), ('B', build, reports.append)]
+
+        with patch.object(e2b_integration, '_executor', return_value=executor), \
+                patch('sys.stdout', new_callable=io.StringIO):
+            e2b_integration.run_examples(examples)
+
+        self.assertEqual(len(executor.batch_execute.call_args[0][0]), 1)
+        self.assertEqual(len(reports), 2)
+        self.assertEqual(reports[1][0]['output'], 'ok')
+
+    def test_example_reuses_given_executor(self):
+        """Test an example runs on a caller's executor without opening its own."""
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import e2b_integration
+        finally:
+            sys.path.remove(examples_dir)
+
+        executor = MagicMock()
+        executor.batch_execute.return_value = [
+            {'success': False, 'output': '', 'error': 'offline', 'description': ''}
+        ]
+
+        with patch.object(e2b_integration, '_executor') as make_executor, \
+                patch('sys.stdout', new_callable=io.StringIO):
+            e2b_integration.example_basic_execution(executor)
+
+        make_executor.assert_not_called()
+        executor.__exit__.assert_not_called()
+        executor.batch_execute.assert_called_once()
+
+
+class TestBasicUsageConcurrency(unittest.TestCase):
+    """Test basic_usage runs read-only demos concurrently without mixing output."""
+
+    def test_run_concurrently_keeps_output_order(self):
+        """Test each demo's output is printed whole and in submission order."""
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import basic_usage
+        finally:
+            sys.path.remove(examples_dir)
+
+        def slow_demo(out=None):
+            time.sleep(0.05)
+            print("first", file=out)
+
+        def fast_demo(out=None):
+            print("second", file=out)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            basic_usage.run_concurrently([slow_demo, fast_demo])
+
+        self.assertEqual(stdout.getvalue(), "first\nsecond\n")
+
+
+class TestPersonaConcurrency(unittest.TestCase):
+    """Test persona workflows can run side by side without mixing output."""
+
+    def test_run_concurrently_keeps_output_order(self):
+        """Test each workflow's output is printed whole and in order."""
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import persona_workflows
+        finally:
+            sys.path.remove(examples_dir)
+
+        def slow_workflow(out=None):
+            time.sleep(0.05)
+            print("first", file=out)
+
+        def fast_workflow(out=None):
+            print("second", file=out)
+
+        with patch('sys.stdout', new_callable=io.StringIO) as stdout:
+            persona_workflows.run_concurrently(
+                [slow_workflow, fast_workflow], end='\n'
+            )
+
+        self.assertEqual(stdout.getvalue(), "first\n\nsecond\n\n")
+
+    def test_workflows_registry_covers_all_workflows(self):
+        """Test every workflow is runnable by name and accepts out=."""
+        import inspect
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import persona_workflows
+        finally:
+            sys.path.remove(examples_dir)
+
+        self.assertEqual(len(persona_workflows.WORKFLOWS), 10)
+        for workflow in persona_workflows.WORKFLOWS.values():
+            self.assertIn('out', inspect.signature(workflow).parameters)
+
+
+class TestPersonaQueryCache(unittest.TestCase):
+    """Test the HogQL result cache used by persona workflows."""
+
+    def setUp(self):
+        examples_dir = os.path.join(
+            os.path.dirname(os.path.dirname(__file__)),
+            'examples'
+        )
+        sys.path.insert(0, examples_dir)
+        try:
+            import persona_workflows
+        finally:
+            sys.path.remove(examples_dir)
+        self.workflows = persona_workflows
+        self.workflows._QUERY_CACHE.clear()
+
+    def test_repeat_query_is_served_from_cache(self):
+        """Test whitespace variants of a query hit the same cache entry."""
+        client = Mock(project_id='12345')
+        client.query.return_value = [{'count': 1}]
+
+        first = self.workflows.cached_query(client, "SELECT count()\n  FROM events")
+        second = self.workflows.cached_query(client, "SELECT count() FROM events")
+
+        self.assertEqual(first, second)
+        client.query.assert_called_once()
+
+    def test_cache_is_per_value(self):
+        """Test the same query with different bound values is not shared."""
+        client = Mock(project_id='12345')
+        client.query.return_value = []
+
+        for distinct_id in ('a', 'b', 'a'):
+            self.workflows.cached_query(
+                client, "SELECT 1 WHERE distinct_id = {id}", {'id': distinct_id}
+            )
+
+        self.assertEqual(client.query.call_count, 2)
+
+    def test_cache_is_per_project(self):
+        """Test the same query for another project is not shared."""
+        for project_id in ('1', '2'):
+            client = Mock(project_id=project_id)
+            client.query.return_value = []
+            self.workflows.cached_query(client, "SELECT 1")
+            client.query.assert_called_once()
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_reports_read_positional_rows(self, stdout):
+        """Test reports unpack query rows as lists of column values."""
+        client = Mock(project_id='12345')
+        client.query.side_effect = [
+            [['TypeError', 'x is undefined', 12, 5, '2024-01-02']],
+            [['google', 'spring', 80, 8, 10.0]],
+            [['id-a', 'a@example.com', 'pro', 150, 30, '2024-01-03']],
+        ]
+
+        with patch.object(self.workflows, 'setup_client', return_value=client):
+            self.workflows.bug_investigation_with_error_tracking()
+            self.workflows.marketing_channel_performance()
+            self.workflows.power_user_identification()
+
+        output = stdout.getvalue()
+        self.assertIn('Type: TypeError\nMessage: x is undefined', output)
+        self.assertIn('Source: google\nCampaign: spring', output)
+        self.assertIn('Conversion Rate: 10.00%', output)
+        self.assertIn('Email: a@example.com\nPlan: pro', output)
+
+    @patch('sys.stdout', new_callable=io.StringIO)
+    def test_user_journey_includes_inactive_users(self, stdout):
+        """Test users are looked up together, inactive ones included."""
+        client = Mock(project_id='12345')
+        client.query_many.return_value = [
+            [
+                ['a@example.com', 'p1', 'id-a', 'Page View', '2024-01-02'],
+                ['a@example.com', 'p1', 'id-a', 'Signup', '2024-01-01'],
+                ['b@example.com', 'p2', None, None, None],
+            ],
+            [['p1', '{"plan": "pro"}'], ['p2', {'plan': 'free'}]],
+        ]
+
+        with patch.object(self.workflows, 'setup_client', return_value=client):
+            self.workflows.individual_user_journey(
+                ['a@example.com', 'b@example.com', 'c@example.com']
+            )
+
+        client.query_many.assert_called_once()
+        journey_query = client.query_many.call_args[0][0][0]
+        self.assertIn('FROM persons AS p', journey_query)
+        self.assertIn('LEFT JOIN', journey_query)
+        self.assertNotIn('person.properties as', journey_query)
+        self.assertEqual(
+            client.query_many.call_args[0][1],
+            {'emails': ['a@example.com', 'b@example.com', 'c@example.com']}
+        )
+        output = stdout.getvalue()
+        self.assertIn('No person found: c@example.com', output)
+        self.assertIn('2024-01-02: Page View\n2024-01-01: Signup', output)
+        self.assertIn('Person ID: p2', output)
+        self.assertIn('"plan": "free"', output)
+        self.assertIn('No activity in the last 30 days', output)
+
+
 class TestPackageStructure(unittest.TestCase):
     """Test overall package structure."""
 